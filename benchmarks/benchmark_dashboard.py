@@ -0,0 +1,302 @@
+"""
+benchmark_dashboard.py
+Latência, memória e tamanho de resposta do dashboard em vários volumes.
+
+Para cada tamanho de dataset simulado (gerar_vendas) e cada combinação de
+filtros, mede os callbacks, os construtores criar_grafico_* e a leitura do
+CSV com carregar_dados (a frio e a quente). Com --inicializacao, mede também
+em um processo novo o tempo até o servidor subir e até a primeira resposta,
+com e sem DASHBOARD_INICIO_RAPIDO. Para cada alvo são registrados:
+- latência p50/p95/p99 (ms) de --repeticoes chamadas, incluindo a
+  serialização JSON da resposta, como o Dash faz;
+- pico de memória alocada em uma chamada (tracemalloc);
+- bytes da resposta serializada.
+
+O resultado pode ser salvo em JSON (--salvar) e comparado com um baseline
+anterior (--comparar); o processo termina com código 1 quando algum alvo
+piorou além da tolerância.
+
+Exemplo:
+    python benchmarks/benchmark_dashboard.py --linhas 100000 1000000 10000000 \\
+        --salvar benchmarks/baseline.json
+"""
+import argparse
+import json
+import os
+import platform
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+RAIZ_PROJETO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(RAIZ_PROJETO, 'src'))
+sys.path.insert(0, os.path.join(RAIZ_PROJETO, 'src', 'dashboard'))
+
+# Sem cache de resultados: cada chamada mede o cálculo, não a consulta ao cache
+os.environ.setdefault('DASHBOARD_CACHE_MB', '0')
+os.environ.setdefault('DASHBOARD_CACHE_DIR', '')
+os.environ.setdefault('DASHBOARD_ATUALIZACAO_SEG', '0')
+os.environ.setdefault('DASHBOARD_INICIO_RAPIDO', '0')
+os.environ.setdefault('DASHBOARD_AQUECIMENTO_THREADS', '0')
+
+import plotly.io.json as pio_json  # noqa: E402
+
+import app  # noqa: E402
+from conjunto import ConjuntoVendas  # noqa: E402
+from data.load_data import carregar_dados  # noqa: E402
+from data.simulacao import gerar_vendas  # noqa: E402
+
+GRAFICOS = ['evolucao', 'regioes', 'produtos', 'performance', 'mensal']
+
+# Chaves que identificam uma medição ao comparar com o baseline
+CHAVE = ['linhas', 'alvo', 'filtros']
+
+
+def percentis(tempos):
+    """p50/p95/p99 em milissegundos"""
+    p50, p95, p99 = np.percentile(np.asarray(tempos) * 1000, [50, 95, 99])
+    return {'p50_ms': round(p50, 3), 'p95_ms': round(p95, 3), 'p99_ms': round(p99, 3)}
+
+
+def medir(funcao, repeticoes):
+    """
+    Executa funcao() repeticoes vezes e retorna latências, pico de memória de
+    uma chamada extra sob tracemalloc e o tamanho da resposta serializada.
+    """
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append(time.perf_counter() - inicio)
+
+    tracemalloc.start()
+    resposta = funcao()
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {**percentis(tempos), 'pico_memoria_bytes': pico, 'payload_bytes': len(resposta) if resposta is not None else None}
+
+
+def serializado(funcao, *args):
+    """Chamada que inclui a serialização JSON do resultado e retorna o texto"""
+    return lambda: pio_json.to_json_plotly(funcao(*args))
+
+
+def combinacoes_filtros(df):
+    """
+    Filtros medidos: nenhum, cada dimensão isolada, todas juntas, um produto
+    raro e um período de 30 dias, sozinho e com a região
+    """
+    mes = df['Mês'].value_counts().index[0]
+    regiao = df['Região'].value_counts().index[0]
+    produtos = df['Produto'].value_counts()
+    inicio = df['Data'].min() + (df['Data'].max() - df['Data'].min()) / 2
+    periodo = (inicio.strftime('%Y-%m-%d'), (inicio + pd.Timedelta(days=29)).strftime('%Y-%m-%d'))
+    return {
+        'todos': ('', '', '', None, None),
+        'mes': (mes, '', '', None, None),
+        'regiao': ('', regiao, '', None, None),
+        'produto': ('', '', produtos.index[0], None, None),
+        'mes+regiao+produto': (mes, regiao, produtos.index[0], None, None),
+        'produto_raro': ('', '', produtos.index[-1], None, None),
+        'periodo': ('', '', '', *periodo),
+        'periodo+regiao': ('', regiao, '', *periodo),
+    }
+
+
+def alvos(filtros):
+    """Funções medidas para uma combinação de filtros"""
+    mes, regiao, produto, inicio, fim = filtros
+    funcoes = {
+        'atualizar_kpis': serializado(app.atualizar_kpis, mes, regiao, produto, inicio, fim),
+        'atualizar_evolucao': serializado(app.atualizar_evolucao, mes, regiao, produto, inicio, fim, None),
+        'atualizar_tabela': serializado(app.atualizar_tabela, mes, regiao, produto, inicio, fim, 0, app.TAMANHO_PAGINA, None),
+    }
+    for grafico in GRAFICOS[1:]:
+        funcoes[f'atualizar_{grafico}'] = serializado(getattr(app, f'atualizar_{grafico}'), mes, regiao, produto, inicio, fim)
+
+    fatia = app.fatiar(app.conjunto, mes, regiao, produto, periodo=(inicio, fim))
+    for grafico in GRAFICOS:
+        criar = getattr(app, f'criar_grafico_{grafico}')
+        funcoes[f'criar_grafico_{grafico}'] = lambda criar=criar: pio_json.to_json_plotly(criar(fatia))
+    funcoes['criar_graficos'] = lambda: pio_json.to_json_plotly(app.criar_graficos(fatia))
+    return funcoes
+
+
+def medir_carga(df, repeticoes):
+    """carregar_dados a frio (importando o CSV) e a quente (cache colunar mapeado)"""
+    diretorio = tempfile.mkdtemp(prefix='benchmark-dashboard-')
+    try:
+        caminho = os.path.join(diretorio, 'dados.csv')
+        df.to_csv(caminho, index=False)
+        colunar = os.path.join(diretorio, 'dados.colunas')
+
+        def frio():
+            shutil.rmtree(colunar, ignore_errors=True)
+            carregar_dados(caminho=caminho, diretorio_colunar=colunar)
+
+        def quente():
+            carregar_dados(caminho=caminho, diretorio_colunar=colunar)
+
+        return {
+            'carregar_dados[frio]': medir(frio, max(repeticoes // 10, 1)),
+            'carregar_dados[quente]': medir(quente, repeticoes),
+        }
+    finally:
+        shutil.rmtree(diretorio, ignore_errors=True)
+
+
+# Executado em um processo novo: importa o app, espera os dados e faz a primeira chamada
+CODIGO_INICIALIZACAO = '''
+import json, sys, time
+sys.path.insert(0, {dashboard!r})
+import app
+while app.conjunto is None:
+    time.sleep(0.005)
+app.atualizar_kpis('', '', '')
+print(json.dumps(app.INICIALIZACAO))
+'''
+
+
+def medir_inicializacao(df):
+    """
+    Segundos até o servidor ficar pronto e até a primeira resposta, com os
+    dados lidos de um CSV, com e sem início rápido. A primeira resposta é a
+    de um clique frio (sem cache de resultados).
+    """
+    diretorio = tempfile.mkdtemp(prefix='benchmark-dashboard-')
+    try:
+        caminho = os.path.join(diretorio, 'dados.csv')
+        df.to_csv(caminho, index=False)
+        codigo = CODIGO_INICIALIZACAO.format(dashboard=os.path.join(RAIZ_PROJETO, 'src', 'dashboard'))
+
+        medicoes = {}
+        for modo, rapido in [('normal', '0'), ('rapido', '1')]:
+            ambiente = {
+                **os.environ,
+                'DASHBOARD_FONTE_CSV': caminho,
+                'DASHBOARD_INICIO_RAPIDO': rapido,
+                'DASHBOARD_METADADOS': os.path.join(diretorio, 'metadados.json'),
+                'DASHBOARD_FREQUENCIA': os.path.join(diretorio, 'frequencia.json'),
+            }
+            saida = subprocess.run([sys.executable, '-c', codigo], env=ambiente, capture_output=True, text=True, check=True)
+            tempos = json.loads(saida.stdout.strip().splitlines()[-1])
+            for marco in ['servidor_pronto', 'primeira_resposta']:
+                medicoes[(f'inicializacao[{modo}]', marco)] = tempos[f'{marco}_seg']
+        return medicoes
+    finally:
+        shutil.rmtree(diretorio, ignore_errors=True)
+
+
+def executar(args):
+    resultados = []
+    for linhas in args.linhas:
+        print(f'# {linhas:,} linhas', file=sys.stderr)
+        df = gerar_vendas(linhas, regioes=args.regioes, produtos=args.produtos, dias=args.dias,
+                          assimetria=args.assimetria, compacto=True)
+
+        inicio = time.perf_counter()
+        app.publicar_conjunto(ConjuntoVendas.construir(app.preparar_vendas(df, relatorio=False)))
+        preparo = time.perf_counter() - inicio
+
+        for nome, filtros in combinacoes_filtros(df).items():
+            for alvo, funcao in alvos(filtros).items():
+                resultados.append({'linhas': linhas, 'alvo': alvo, 'filtros': nome, **medir(funcao, args.repeticoes)})
+
+        if args.carga:
+            for alvo, medicao in medir_carga(df, args.repeticoes).items():
+                resultados.append({'linhas': linhas, 'alvo': alvo, 'filtros': '-', **medicao})
+
+        if args.inicializacao:
+            for (alvo, marco), segundos in medir_inicializacao(df).items():
+                resultados.append({'linhas': linhas, 'alvo': alvo, 'filtros': marco, **percentis([segundos]),
+                                   'pico_memoria_bytes': None, 'payload_bytes': None})
+
+        resultados.append({
+            'linhas': linhas, 'alvo': 'ConjuntoVendas.construir', 'filtros': '-',
+            **percentis([preparo]), 'pico_memoria_bytes': None, 'payload_bytes': None,
+            'rss_maximo_bytes': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024,
+        })
+
+    return {
+        'gerado_em': datetime.now().isoformat(timespec='seconds'),
+        'ambiente': {
+            'python': platform.python_version(),
+            'pandas': pd.__version__,
+            'numpy': np.__version__,
+            'plataforma': platform.platform(),
+            'cpus': os.cpu_count(),
+        },
+        'parametros': {k: v for k, v in vars(args).items() if k not in ('salvar', 'comparar')},
+        'resultados': resultados,
+    }
+
+
+def comparar(atual, baseline, tolerancia, folga_ms=1.0):
+    """
+    Medições que pioraram: p95 ou pico de memória acima da tolerância
+    relativa, ou resposta maior. folga_ms evita acusar ruído em alvos que
+    levam poucos milissegundos.
+    """
+    base = pd.DataFrame(baseline['resultados']).set_index(CHAVE)
+    novo = pd.DataFrame(atual['resultados']).set_index(CHAVE)
+    juntos = novo.join(base, rsuffix='_baseline', how='inner')
+
+    piorou = (
+        (juntos['p95_ms'] > juntos['p95_ms_baseline'] * (1 + tolerancia) + folga_ms)
+        | (juntos['pico_memoria_bytes'] > juntos['pico_memoria_bytes_baseline'] * (1 + tolerancia))
+        | (juntos['payload_bytes'] > juntos['payload_bytes_baseline'])
+    )
+    colunas = ['p95_ms', 'p95_ms_baseline', 'pico_memoria_bytes', 'pico_memoria_bytes_baseline',
+               'payload_bytes', 'payload_bytes_baseline']
+    return juntos.loc[piorou, colunas]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0], formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--linhas', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    parser.add_argument('--regioes', type=int, default=5)
+    parser.add_argument('--produtos', type=int, default=4)
+    parser.add_argument('--dias', type=int, default=121)
+    parser.add_argument('--assimetria', type=float, default=0.0, help='expoente de Zipf de regiões e produtos')
+    parser.add_argument('--repeticoes', type=int, default=30)
+    parser.add_argument('--sem-carga', dest='carga', action='store_false', help='não mede carregar_dados')
+    parser.add_argument('--inicializacao', action='store_true',
+                        help='mede o tempo até o servidor subir e até a primeira resposta, com e sem início rápido')
+    parser.add_argument('--salvar', help='grava os resultados neste arquivo JSON')
+    parser.add_argument('--comparar', help='baseline JSON para detectar regressões')
+    parser.add_argument('--tolerancia', type=float, default=0.2)
+    parser.add_argument('--folga-ms', type=float, default=1.0)
+    args = parser.parse_args()
+
+    atual = executar(args)
+
+    tabela = pd.DataFrame(atual['resultados']).set_index(CHAVE)
+    with pd.option_context('display.max_rows', None, 'display.width', 200):
+        print(tabela.drop(columns=['rss_maximo_bytes'], errors='ignore').to_string())
+
+    if args.salvar:
+        os.makedirs(os.path.dirname(os.path.abspath(args.salvar)), exist_ok=True)
+        with open(args.salvar, 'w', encoding='utf-8') as f:
+            json.dump(atual, f, indent=2, ensure_ascii=False, default=str)
+
+    if args.comparar:
+        with open(args.comparar, encoding='utf-8') as f:
+            regressoes = comparar(atual, json.load(f), args.tolerancia, args.folga_ms)
+        if len(regressoes):
+            print(f'\n{len(regressoes)} regressões acima de {args.tolerancia:.0%}:')
+            print(regressoes.to_string())
+            sys.exit(1)
+        print('\nSem regressões em relação ao baseline')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,48 @@
+"""
+amostragem.py
+Redução de séries temporais para exibição.
+
+lttb() implementa o Largest-Triangle-Three-Buckets: divide a série em baldes
+e escolhe, em cada um, o ponto que forma o maior triângulo com o ponto
+escolhido no balde anterior e a média do próximo. Picos e vales continuam
+visíveis mesmo com poucos pontos.
+"""
+import numpy as np
+
+
+def lttb(x, y, pontos):
+    """
+    Retorna os índices (ordenados) dos pontos escolhidos para representar a
+    série (x crescente, numérico) com no máximo `pontos` pontos.
+    """
+    n = len(x)
+    if pontos >= n:
+        return np.arange(n)
+    if pontos < 3:
+        return np.array([0, n - 1][:max(pontos, 0)], dtype=np.int64)
+
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+
+    # Primeiro e último pontos são mantidos; o miolo é dividido em baldes
+    limites = np.linspace(1, n - 1, pontos - 1).astype(np.int64)
+    escolhidos = np.empty(pontos, dtype=np.int64)
+    escolhidos[0] = 0
+    escolhidos[-1] = n - 1
+
+    anterior = 0
+    for i in range(pontos - 2):
+        inicio, fim = limites[i], limites[i + 1]
+        prox_inicio, prox_fim = limites[i + 1], (limites[i + 2] if i + 2 < len(limites) else n)
+        media_x = x[prox_inicio:prox_fim].mean()
+        media_y = y[prox_inicio:prox_fim].mean()
+
+        area = np.abs(
+            (x[anterior] - media_x) * (y[inicio:fim] - y[anterior])
+            - (x[anterior] - x[inicio:fim]) * (media_y - y[anterior])
+        )
+        anterior = inicio + int(area.argmax())
+        escolhidos[i + 1] = anterior
+
+    return escolhidos
+
@@ -1,45 +1,303 @@
+import time
+
+# Referência dos tempos de inicialização, tomada antes dos imports pesados
+INICIO_PROCESSO = time.perf_counter()
+
 import dash
-from dash import dcc, html, Input, Output, callback
+from dash import dcc, html, dash_table, ClientsideFunction, Input, Output, State, Patch, callback, ctx, no_update
+from dash.dash_table.Format import Format, Group, Scheme, Symbol
+from dash.exceptions import PreventUpdate
+from flask import Response, jsonify, request
 import plotly.graph_objects as go
 import pandas as pd
-import numpy as np
-from datetime import datetime
+import atexit
+import json
+import logging
 import os
+import sys
+import threading
+import uuid
+from urllib.parse import urlencode
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data.colunar import abrir_colunas, ler_manifesto, materializar, salvar_colunas
+from data.compactacao import compactar_vendas, relatorio_memoria
+from data.backlog import BacklogChamados
+from data.incremental import LeitorIncremental
+from data.kpis_chamados import ler_chamados
+from data.load_data import DATAS_VENDAS, TAMANHO_BLOCO, TIPOS_VENDAS, carregar_dados
+from data.simulacao import gerar_vendas
+from cubo import DIMENSOES, FILTROS, MEDIDAS, construir_cubo, fatiar_cubo, filtros_por_coluna, calcular_kpis, kpis_de_totais
+from indice import IndiceDimensoes
+from amostragem import lttb
+from tabela import ORDENACAO_PADRAO, pagina_detalhes
+from cache import calcular_versao, criar_cache
+from conjunto import AtualizadorIncremental, ConjuntoVendas
+from banco import BancoVendas, materializar_banco, motor_disponivel
+from aquecimento import Aquecimento, FrequenciaFiltros, combinacoes_filtros
+from cliente import codificar_cubo
+from periodo import limites_periodo, normalizar_periodo
+from exportacao import COLUNAS_EXPORTACAO, GERADORES, TIPOS_CONTEUDO, formatos_disponiveis
+import metricas
 
 # =============================
 # CONFIGURAÇÃO INICIAL
 # =============================
+logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(name)s: %(message)s')
+logger = logging.getLogger(__name__)
+
 app = dash.Dash(__name__)
 server = app.server
 
+RAIZ_PROJETO = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Cache de resultados: limite em MB (0 desativa) e diretório do arquivo
+# compartilhado entre workers (vazio = cache apenas em memória no processo)
+CACHE_MB = float(os.environ.get('DASHBOARD_CACHE_MB', 64))
+CACHE_DIR = os.environ.get('DASHBOARD_CACHE_DIR', os.path.join(RAIZ_PROJETO, 'data', 'processed', 'cache'))
+
+# Armazenamento compacto do DataFrame (categorias, inteiros reduzidos e
+# datas formatadas só quando exibidas)
+COMPACTO = os.environ.get('DASHBOARD_COMPACTO', '1') != '0'
+
+# Diretório onde o dataset, o cubo e o índice são materializados uma única vez
+# em arquivos .npy mapeados somente leitura por todos os workers (vazio = cada
+# worker gera sua própria cópia em memória)
+DADOS_DIR = os.environ.get('DASHBOARD_DADOS_DIR', '')
+
+# CSV de vendas usado no lugar dos dados simulados. O arquivo é acompanhado
+# em segundo plano: linhas acrescentadas no final entram no dashboard a cada
+# DASHBOARD_ATUALIZACAO_SEG segundos sem reprocessar o restante
+FONTE_CSV = os.environ.get('DASHBOARD_FONTE_CSV', '')
+ATUALIZACAO_SEG = float(os.environ.get('DASHBOARD_ATUALIZACAO_SEG', 5))
+
+# Máximo de pontos enviados para o gráfico de evolução (aprox. a largura do
+# gráfico em pixels); séries maiores são reduzidas preservando os picos
+PONTOS_EVOLUCAO = int(os.environ.get('DASHBOARD_PONTOS_EVOLUCAO', 800))
+
+# Linhas por página da tabela de detalhes
+TAMANHO_PAGINA = int(os.environ.get('DASHBOARD_TAMANHO_PAGINA', 10))
+
+# CSV de chamados usado no gráfico de backlog (vazio ou inexistente = sem gráfico)
+CHAMADOS_CSV = os.environ.get('DASHBOARD_CHAMADOS_CSV', os.path.join(RAIZ_PROJETO, 'data', 'raw', 'chamados.csv'))
+
+# Constrói as figuras de um mesmo recorte ao mesmo tempo em um pool de threads.
+# Desligado por padrão: as agregações seguram o GIL na maior parte do tempo
+# e cada gráfico já tem seu próprio callback, disparado em paralelo
+FIGURAS_PARALELAS = os.environ.get('DASHBOARD_FIGURAS_PARALELAS', '0') == '1'
+
+# Diretório onde é gravado um perfil de cada requisição de callback (vazio =
+# sem perfil). Use só para investigar lentidão: o perfil tem custo próprio
+PERFIL_DIR = os.environ.get('DASHBOARD_PERFIL_DIR', '')
+
+# Onde filtros e agregações são calculados: 'pandas' (cubo em memória) ou um
+# banco embutido, 'sqlite' ou 'duckdb', gravado em DASHBOARD_BANCO_DIR e
+# consultado com SQL, para datasets que não cabem na memória
+BACKEND = os.environ.get('DASHBOARD_BACKEND', 'pandas')
+BANCO_DIR = os.environ.get('DASHBOARD_BANCO_DIR', os.path.join(RAIZ_PROJETO, 'data', 'processed', 'banco'))
+
+# Início rápido: o servidor sobe sem esperar os dados, carregados em segundo
+# plano; até lá os filtros usam as opções gravadas em METADADOS_ARQUIVO
+INICIO_RAPIDO = os.environ.get('DASHBOARD_INICIO_RAPIDO', '0') == '1'
+METADADOS_ARQUIVO = os.environ.get('DASHBOARD_METADADOS', os.path.join(RAIZ_PROJETO, 'data', 'processed', 'metadados_filtros.json'))
+
+# Depois da carga, threads pré-calculam no cache os resultados de até
+# AQUECIMENTO_MAX combinações de filtros, das mais pedidas (contagens em
+# FREQUENCIA_ARQUIVO) para as menos. Ligado por padrão só com o início
+# rápido, e nunca no modo cliente, em que os gráficos não vêm do servidor
+AQUECIMENTO = os.environ.get('DASHBOARD_AQUECIMENTO', '1' if INICIO_RAPIDO else '0') == '1'
+AQUECIMENTO_THREADS = int(os.environ.get('DASHBOARD_AQUECIMENTO_THREADS', 2))
+AQUECIMENTO_MAX = int(os.environ.get('DASHBOARD_AQUECIMENTO_MAX', 1000))
+FREQUENCIA_ARQUIVO = os.environ.get('DASHBOARD_FREQUENCIA', os.path.join(RAIZ_PROJETO, 'data', 'processed', 'frequencia_filtros.json'))
+
+# Modo cliente: o cubo vai uma vez para o navegador, que filtra e agrega
+# KPIs e gráficos sem ida ao servidor (a tabela continua no servidor)
+MODO_CLIENTE = os.environ.get('DASHBOARD_MODO_CLIENTE', '0') == '1'
+
+# Linhas por bloco nos downloads de /exportar: limita a memória de cada
+# download, independentemente do total exportado
+EXPORTACAO_BLOCO = int(os.environ.get('DASHBOARD_EXPORTACAO_BLOCO', 50000))
+
+metricas.instrumentar_servidor(server, PERFIL_DIR)
+
 # =============================
 # DADOS SIMULADOS
 # =============================
-def gerar_dados():
-    """Gera dados simulados para o dashboard"""
+def gerar_dados(**parametros):
+    """
+    Gera dados simulados para o dashboard. Sem parâmetros, as mesmas 500
+    vendas de sempre; veja gerar_vendas() para volume, cardinalidade e
+    assimetria configuráveis.
+    """
+    return gerar_vendas(**parametros)
+
+def preparar_vendas(df, relatorio=True):
+    """Coloca um DataFrame de vendas no formato usado pelo dashboard"""
+    if 'Mês' not in df.columns:
+        df = df.assign(Mês=df['Data'].dt.strftime('%B'))
+    if COMPACTO:
+        df_original, df = df, compactar_vendas(df)
+        if relatorio:
+            logger.info('Memória por coluna (bytes):\n%s', relatorio_memoria(df_original, df).to_string())
+    return df
+
+def preparar_dados():
+    """Gera o DataFrame de vendas simulado no formato usado pelo dashboard"""
+    return preparar_vendas(gerar_dados())
+
+def salvar_derivados(df, diretorio):
+    """Grava o cubo, o índice de linhas e a versão junto ao dataset materializado"""
+    cubo = construir_cubo(df)
+    salvar_colunas(cubo, os.path.join(diretorio, 'cubo'))
+    IndiceDimensoes(df, FILTROS.values()).salvar(os.path.join(diretorio, 'indice'))
+    return {'versao': calcular_versao(df)}
+
+def abrir_materializado(destino):
+    """Retrato com linhas, cubo e índice mapeados de um diretório gravado com salvar_derivados"""
+    return ConjuntoVendas.abrir(
+        abrir_colunas(destino),
+        abrir_colunas(os.path.join(destino, 'cubo')),
+        IndiceDimensoes.carregar(os.path.join(destino, 'indice')),
+        ler_manifesto(destino)['metadados']['versao'],
+    )
+
+def blocos_vendas():
+    """Vendas em blocos para importar no banco, sem ler o CSV inteiro de uma vez"""
+    if FONTE_CSV:
+        for bloco in pd.read_csv(FONTE_CSV, dtype=TIPOS_VENDAS, parse_dates=DATAS_VENDAS, chunksize=TAMANHO_BLOCO):
+            yield preparar_vendas(bloco, relatorio=False)
+        return
+    df = preparar_vendas(gerar_dados(), relatorio=False)
+    for inicio in range(0, len(df), TAMANHO_BLOCO):
+        yield df.iloc[inicio:inicio + TAMANHO_BLOCO]
+
+def carregar_banco():
+    """Abre o banco embutido, importando os dados na primeira vez"""
+    motor = motor_disponivel(BACKEND)
+    if FONTE_CSV:
+        info = os.stat(FONTE_CSV)
+        chave = f'{os.path.abspath(FONTE_CSV)}|{info.st_size}|{info.st_mtime_ns}'
+    else:
+        chave = 'gerar_dados'
+    return BancoVendas(materializar_banco(BANCO_DIR, chave, blocos_vendas, motor), motor)
+
+def carregar_conjunto():
+    """Monta o retrato inicial dos dados conforme a configuração"""
+    if BACKEND != 'pandas':
+        # O banco é reimportado quando o CSV muda; não há atualização incremental
+        return carregar_banco(), None
     
-    datas = pd.date_range(start='2024-01-01', end='2024-04-30', freq='D')
-    regioes = ['Norte', 'Nordeste', 'Centro-Oeste', 'Sudeste', 'Sul']
-    produtos = ['Produto A', 'Produto B', 'Produto C', 'Produto D']
+    if FONTE_CSV:
+        df = carregar_dados(caminho=FONTE_CSV)
+        bytes_lidos = df.attrs['bytes_lidos']
+        # Linhas preparadas, cubo, índice e versão ficam ao lado do cache colunar do CSV
+        destino = materializar(
+            os.path.splitext(FONTE_CSV)[0] + '.derivados',
+            f"{df.attrs['chave']}|compacto={COMPACTO}",
+            lambda: preparar_vendas(df),
+            salvar_derivados,
+        )
+        return abrir_materializado(destino), LeitorIncremental(FONTE_CSV, bytes_lidos=bytes_lidos)
     
-    np.random.seed(42)
+    if DADOS_DIR:
+        destino = materializar(DADOS_DIR, f'gerar_dados|compacto={COMPACTO}', preparar_dados, salvar_derivados)
+        return abrir_materializado(destino), None
     
-    dados = {
-        'Data': np.random.choice(datas, 500),
-        'Região': np.random.choice(regioes, 500),
-        'Produto': np.random.choice(produtos, 500),
-        'Quantidade': np.random.randint(50, 300, 500),
-        'Valor': np.random.uniform(1000, 10000, 500),
-        'Status': np.random.choice(['Completo', 'Pendente'], 500, p=[0.9, 0.1])
+    return ConjuntoVendas.construir(preparar_dados()), None
+
+def ler_metadados():
+    """Metadados gravados na última carga (valores dos filtros), ou {} sem o arquivo"""
+    try:
+        with open(METADADOS_ARQUIVO, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def gravar_metadados(dados):
+    """Grava os valores dos filtros e o intervalo de datas para a próxima inicialização (gravação atômica)"""
+    metadados = {
+        'versao': dados.versao,
+        'valores': {c: dados.valores(c) for c in FILTROS.values()},
+        'datas': list(dados.intervalo_datas()),
     }
+    os.makedirs(os.path.dirname(METADADOS_ARQUIVO) or '.', exist_ok=True)
+    temporario = f'{METADADOS_ARQUIVO}.tmp-{os.getpid()}-{uuid.uuid4().hex[:8]}'
+    with open(temporario, 'w', encoding='utf-8') as f:
+        json.dump(metadados, f, ensure_ascii=False, default=str)
+    os.replace(temporario, METADADOS_ARQUIVO)
+
+# Segundos desde INICIO_PROCESSO até cada marco da inicialização
+INICIALIZACAO = {
+    'inicio_rapido': INICIO_RAPIDO,
+    'servidor_pronto_seg': None,
+    'dados_prontos_seg': None,
+    'primeira_resposta_seg': None,
+}
+
+conjunto = None
+cache_resultados = criar_cache(int(CACHE_MB * 1024 * 1024), CACHE_DIR)
+frequencia_filtros = FrequenciaFiltros(FREQUENCIA_ARQUIVO)
+atexit.register(frequencia_filtros.gravar)
+
+def publicar_conjunto(novo):
+    """Troca o retrato usado pelos callbacks e descarta resultados da versão anterior"""
+    global conjunto
+    conjunto = novo
+    cache_resultados.descartar_outras_versoes(novo.versao)
+
+def inicializar_dados():
+    """Carrega o retrato inicial, grava os metadados e inicia a atualização incremental"""
+    inicio = time.perf_counter()
+    novo, leitor_incremental = carregar_conjunto()
+    publicar_conjunto(novo)
+    INICIALIZACAO['dados_prontos_seg'] = time.perf_counter() - INICIO_PROCESSO
+    logger.info('Dados carregados em %.3f s (%.3f s desde o início do processo)',
+                time.perf_counter() - inicio, INICIALIZACAO['dados_prontos_seg'])
     
-    df = pd.DataFrame(dados)
-    df['Mês'] = df['Data'].dt.strftime('%B')
-    df['Data_Formatada'] = df['Data'].dt.strftime('%d/%m/%Y')
+    try:
+        gravar_metadados(novo)
+    except OSError:
+        logger.exception('Não foi possível gravar %s', METADADOS_ARQUIVO)
     
-    return df
+    if leitor_incremental is not None and ATUALIZACAO_SEG > 0:
+        AtualizadorIncremental(
+            leitor_incremental,
+            obter=lambda: conjunto,
+            publicar=publicar_conjunto,
+            preparar=lambda df_lido: preparar_vendas(df_lido, relatorio=False),
+            intervalo=ATUALIZACAO_SEG,
+        ).start()
+
+# Sem início rápido os dados são carregados aqui, antes de o servidor subir
+metadados_filtros = ler_metadados() if INICIO_RAPIDO else {}
+if not INICIO_RAPIDO:
+    inicializar_dados()
+
+def valores_filtro(coluna):
+    """Valores de um filtro: do retrato carregado ou, antes da carga, dos metadados gravados"""
+    if conjunto is not None:
+        return conjunto.valores(coluna)
+    return metadados_filtros.get('valores', {}).get(coluna, [])
+
+def intervalo_filtro():
+    """Primeira e última data selecionáveis no filtro de período"""
+    if conjunto is not None:
+        return conjunto.intervalo_datas()
+    return tuple(metadados_filtros.get('datas') or (None, None))
 
-df = gerar_dados()
+def carregar_backlog():
+    """
+    Eventos de abertura/fechamento dos chamados, ou None sem o CSV. O CSV é
+    lido uma vez, na inicialização: o gráfico mostra esse retrato e linhas
+    acrescentadas depois só entram quando o servidor reinicia.
+    """
+    if not CHAMADOS_CSV or not os.path.exists(CHAMADOS_CSV):
+        return None
+    return BacklogChamados.construir(ler_chamados(CHAMADOS_CSV))
+
+backlog_chamados = carregar_backlog()
 
 # =============================
 # CORES DO DESIGN SYSTEM
@@ -51,163 +309,266 @@ COR_PERIGO = '#d83b01'
 COR_BG = '#f3f3f3'
 COR_CARD = 'white'
 
+# =============================
+# MODELO DE LAYOUT DOS GRÁFICOS
+# =============================
+# As figuras são dicionários montados a partir deste modelo, sem a validação
+# propriedade a propriedade do go.Figure. O template padrão do Plotly é
+# resolvido uma única vez e embutido em cada figura, como o go.Figure faz
+TEMPLATE_PLOTLY = go.Figure().to_plotly_json()['layout']['template']
+
+EIXO = dict(gridcolor='#f0f0f0', showgrid=True)
+
+LAYOUT_BASE = {
+    'template': TEMPLATE_PLOTLY,
+    'paper_bgcolor': COR_CARD,
+    'plot_bgcolor': COR_CARD,
+    'margin': dict(l=60, r=30, t=30, b=50),
+    'font': dict(family='Segoe UI, sans-serif', size=12),
+    'height': 350,
+}
+
+LAYOUT_EIXOS = {
+    **LAYOUT_BASE,
+    'xaxis': EIXO,
+    'yaxis': EIXO,
+    'hoverlabel': dict(bgcolor='white', font=dict(size=13), bordercolor=COR_PRIMARIA),
+    'showlegend': False,
+}
+
+def layout_grafico(titulo, **ajustes):
+    """Layout de um gráfico com eixos: o modelo comum mais título e ajustes"""
+    return {**LAYOUT_EIXOS, 'title': {'text': titulo}, **ajustes}
+
 # =============================
 # COMPONENTES DOS GRÁFICOS
 # =============================
+def intervalo_zoom(relayout):
+    """Extrai do relayoutData do gráfico o intervalo de datas com zoom (ou None)"""
+    if not relayout:
+        return None
+    if 'xaxis.range[0]' in relayout and 'xaxis.range[1]' in relayout:
+        return relayout['xaxis.range[0]'], relayout['xaxis.range[1]']
+    if 'xaxis.range' in relayout:
+        return tuple(relayout['xaxis.range'])
+    return None
+
+def dados_grafico_evolucao(df_filtrado, intervalo=None):
+    """
+    Dados do traço do gráfico de evolução de vendas, somados por data e
+    reduzidos a no máximo PONTOS_EVOLUCAO pontos. Com um intervalo de zoom,
+    só o trecho visível (mais um ponto de cada lado) é reduzido, o que
+    devolve o detalhe ao aproximar.
+    """
+    serie = df_filtrado.groupby('Data', observed=True)['Valor'].sum().sort_index()
+    
+    if intervalo is not None:
+        datas = serie.index.to_numpy()
+        inicio = max(datas.searchsorted(pd.Timestamp(intervalo[0]).to_datetime64(), 'left') - 1, 0)
+        fim = datas.searchsorted(pd.Timestamp(intervalo[1]).to_datetime64(), 'right') + 1
+        serie = serie.iloc[inicio:fim]
+    
+    escolhidos = lttb(serie.index.to_numpy().view('int64'), serie.to_numpy(), PONTOS_EVOLUCAO)
+    serie = serie.iloc[escolhidos]
+    
+    return {'x': serie.index.strftime('%Y-%m-%d').tolist(), 'y': serie.tolist()}
+
+@metricas.cronometrar('evolucao', 'figura')
 def criar_grafico_evolucao(df_filtrado):
     """Gráfico de evolução de vendas"""
-    df_dia = df_filtrado.groupby('Data_Formatada')['Valor'].sum().reset_index()
-    df_dia = df_dia.sort_values('Data_Formatada')
-    
-    fig = go.Figure()
-    fig.add_trace(go.Scatter(
-        x=df_dia['Data_Formatada'],
-        y=df_dia['Valor'],
-        mode='lines+markers',
-        line=dict(width=4, color=COR_PRIMARIA),
-        marker=dict(size=8, color=COR_PRIMARIA, line=dict(width=2, color='white')),
-        fill='tozeroy',
-        fillcolor='rgba(0, 120, 212, 0.1)',
-        name='Vendas',
-        hovertemplate='<b>%{x}</b><br>R$ %{y:,.0f}<extra></extra>'
-    ))
+    dados = dados_grafico_evolucao(df_filtrado)
     
-    fig.update_layout(
-        title='📈 Evolução de Vendas',
-        paper_bgcolor=COR_CARD,
-        plot_bgcolor=COR_CARD,
-        margin=dict(l=60, r=30, t=30, b=50),
-        font=dict(family='Segoe UI, sans-serif', size=12),
-        xaxis=dict(gridcolor='#f0f0f0', showgrid=True),
-        yaxis=dict(gridcolor='#f0f0f0', showgrid=True),
-        hoverlabel=dict(bgcolor='white', font=dict(size=13), bordercolor=COR_PRIMARIA),
-        showlegend=False,
-        height=350
-    )
+    return {
+        'data': [{
+            'type': 'scatter',
+            'x': dados['x'],
+            'y': dados['y'],
+            'mode': 'lines+markers',
+            'line': {'width': 4, 'color': COR_PRIMARIA},
+            'marker': {'size': 8, 'color': COR_PRIMARIA, 'line': {'width': 2, 'color': 'white'}},
+            'fill': 'tozeroy',
+            'fillcolor': 'rgba(0, 120, 212, 0.1)',
+            'name': 'Vendas',
+            'xhoverformat': '%d/%m/%Y',
+            'hovertemplate': '<b>%{x}</b><br>R$ %{y:,.0f}<extra></extra>'
+        }],
+        'layout': layout_grafico(
+            '📈 Evolução de Vendas',
+            xaxis={**EIXO, 'type': 'date', 'tickformat': '%d/%m/%Y'},
+            # Mantém o zoom do usuário quando os dados do traço são trocados
+            uirevision='evolucao'
+        )
+    }
+
+CORES_REGIOES = [COR_PRIMARIA, '#1084D7', '#1890DB', '#209CDF', '#28A8E3']
+
+def dados_grafico_regioes(df_filtrado):
+    """Dados do traço do gráfico de vendas por região"""
+    df_regiao = df_filtrado.groupby('Região', observed=True)['Valor'].sum().reset_index().sort_values('Valor', ascending=False)
     
-    return fig
+    return {'x': df_regiao['Região'].tolist(), 'y': df_regiao['Valor'].tolist(), 'marker.color': CORES_REGIOES[:len(df_regiao)]}
 
+@metricas.cronometrar('regioes', 'figura')
 def criar_grafico_regioes(df_filtrado):
     """Gráfico de vendas por região"""
-    df_regiao = df_filtrado.groupby('Região')['Valor'].sum().reset_index().sort_values('Valor', ascending=False)
-    
-    cores = [COR_PRIMARIA, '#1084D7', '#1890DB', '#209CDF', '#28A8E3']
+    dados = dados_grafico_regioes(df_filtrado)
     
-    fig = go.Figure()
-    fig.add_trace(go.Bar(
-        x=df_regiao['Região'],
-        y=df_regiao['Valor'],
-        marker=dict(color=cores[:len(df_regiao)]),
-        hovertemplate='<b>%{x}</b><br>R$ %{y:,.0f}<extra></extra>'
-    ))
-    
-    fig.update_layout(
-        title='📊 Vendas por Região',
-        paper_bgcolor=COR_CARD,
-        plot_bgcolor=COR_CARD,
-        margin=dict(l=60, r=30, t=30, b=50),
-        font=dict(family='Segoe UI, sans-serif', size=12),
-        xaxis=dict(gridcolor='#f0f0f0', showgrid=True),
-        yaxis=dict(gridcolor='#f0f0f0', showgrid=True),
-        hoverlabel=dict(bgcolor='white', font=dict(size=13), bordercolor=COR_PRIMARIA),
-        showlegend=False,
-        height=350
-    )
+    return {
+        'data': [{
+            'type': 'bar',
+            'x': dados['x'],
+            'y': dados['y'],
+            'marker': {'color': dados['marker.color']},
+            'hovertemplate': '<b>%{x}</b><br>R$ %{y:,.0f}<extra></extra>'
+        }],
+        'layout': layout_grafico('📊 Vendas por Região')
+    }
+
+def dados_grafico_produtos(df_filtrado):
+    """Dados do traço do gráfico de distribuição por produto"""
+    df_produto = df_filtrado.groupby('Produto', observed=True)['Valor'].sum().reset_index()
     
-    return fig
+    return {'labels': df_produto['Produto'].tolist(), 'values': df_produto['Valor'].tolist()}
 
+@metricas.cronometrar('produtos', 'figura')
 def criar_grafico_produtos(df_filtrado):
     """Gráfico de distribuição por produto"""
-    df_produto = df_filtrado.groupby('Produto')['Valor'].sum().reset_index()
+    dados = dados_grafico_produtos(df_filtrado)
     
     cores = [COR_PRIMARIA, '#1084D7', '#1890DB', '#209CDF']
     
-    fig = go.Figure()
-    fig.add_trace(go.Pie(
-        labels=df_produto['Produto'],
-        values=df_produto['Valor'],
-        marker=dict(colors=cores),
-        hovertemplate='<b>%{label}</b><br>R$ %{value:,.0f}<extra></extra>'
-    ))
-    
-    fig.update_layout(
-        title='🍰 Distribuição por Produto',
-        paper_bgcolor=COR_CARD,
-        plot_bgcolor=COR_CARD,
-        margin=dict(l=30, r=30, t=30, b=30),
-        font=dict(family='Segoe UI, sans-serif', size=12),
-        height=350
-    )
-    
-    return fig
+    return {
+        'data': [{
+            'type': 'pie',
+            'labels': dados['labels'],
+            'values': dados['values'],
+            'marker': {'colors': cores},
+            'hovertemplate': '<b>%{label}</b><br>R$ %{value:,.0f}<extra></extra>'
+        }],
+        'layout': {**LAYOUT_BASE, 'title': {'text': '🍰 Distribuição por Produto'}, 'margin': dict(l=30, r=30, t=30, b=30)}
+    }
 
-def criar_grafico_performance(df_filtrado):
-    """Gráfico de performance por região"""
-    df_perf = df_filtrado.groupby('Região').agg({
+def dados_grafico_performance(df_filtrado):
+    """Dados do traço do gráfico de performance por região"""
+    df_perf = df_filtrado.groupby('Região', observed=True).agg({
         'Quantidade': 'sum'
     }).reset_index().sort_values('Quantidade', ascending=True)
     
     df_perf['Performance'] = (df_perf['Quantidade'] / df_perf['Quantidade'].max() * 100).round(0)
     
-    fig = go.Figure()
-    fig.add_trace(go.Bar(
-        y=df_perf['Região'],
-        x=df_perf['Performance'],
-        orientation='h',
-        marker=dict(color=COR_SECUNDARIA),
-        hovertemplate='<b>%{y}</b><br>%{x}% de performance<extra></extra>'
-    ))
+    return {'y': df_perf['Região'].tolist(), 'x': df_perf['Performance'].tolist()}
+
+@metricas.cronometrar('performance', 'figura')
+def criar_grafico_performance(df_filtrado):
+    """Gráfico de performance por região"""
+    dados = dados_grafico_performance(df_filtrado)
     
-    fig.update_layout(
-        title='📍 Performance por Região',
-        paper_bgcolor=COR_CARD,
-        plot_bgcolor=COR_CARD,
-        margin=dict(l=150, r=30, t=30, b=50),
-        font=dict(family='Segoe UI, sans-serif', size=12),
-        xaxis=dict(gridcolor='#f0f0f0', showgrid=True),
-        yaxis=dict(gridcolor='#f0f0f0', showgrid=True),
-        hoverlabel=dict(bgcolor='white', font=dict(size=13), bordercolor=COR_PRIMARIA),
-        showlegend=False,
-        height=350
-    )
+    return {
+        'data': [{
+            'type': 'bar',
+            'y': dados['y'],
+            'x': dados['x'],
+            'orientation': 'h',
+            'marker': {'color': COR_SECUNDARIA},
+            'hovertemplate': '<b>%{y}</b><br>%{x}% de performance<extra></extra>'
+        }],
+        'layout': layout_grafico('📍 Performance por Região', margin=dict(l=150, r=30, t=30, b=50))
+    }
+
+ORDEM_MESES = ['January', 'February', 'March', 'April', 'May', 'June', 
+               'July', 'August', 'September', 'October', 'November', 'December']
+
+def dados_grafico_mensal(df_filtrado):
+    """Dados do traço do gráfico comparativo mensal"""
+    df_mensal = df_filtrado.groupby('Mês', observed=True)['Valor'].sum().reset_index()
+    
+    df_mensal['Mês'] = pd.Categorical(df_mensal['Mês'], categories=ORDEM_MESES, ordered=True)
+    df_mensal = df_mensal.sort_values('Mês')
     
-    return fig
+    return {'x': df_mensal['Mês'].astype(str).tolist(), 'y': df_mensal['Valor'].tolist()}
 
+@metricas.cronometrar('mensal', 'figura')
 def criar_grafico_mensal(df_filtrado):
     """Gráfico comparativo mensal"""
-    df_mensal = df_filtrado.groupby('Mês')['Valor'].sum().reset_index()
+    dados = dados_grafico_mensal(df_filtrado)
     
-    meses_ordem = ['January', 'February', 'March', 'April', 'May', 'June', 
-                   'July', 'August', 'September', 'October', 'November', 'December']
-    df_mensal['Mês'] = pd.Categorical(df_mensal['Mês'], categories=meses_ordem, ordered=True)
-    df_mensal = df_mensal.sort_values('Mês')
-    
-    fig = go.Figure()
-    fig.add_trace(go.Bar(
-        x=df_mensal['Mês'],
-        y=df_mensal['Valor'],
-        marker=dict(color=COR_PRIMARIA),
-        hovertemplate='<b>%{x}</b><br>R$ %{y:,.0f}<extra></extra>'
-    ))
+    return {
+        'data': [{
+            'type': 'bar',
+            'x': dados['x'],
+            'y': dados['y'],
+            'marker': {'color': COR_PRIMARIA},
+            'hovertemplate': '<b>%{x}</b><br>R$ %{y:,.0f}<extra></extra>'
+        }],
+        'layout': layout_grafico('📅 Comparativo Mensal')
+    }
+
+def dados_grafico_backlog(granularidade='mes', responsavel='', prioridade=''):
+    """Dados do traço do gráfico de backlog de chamados"""
+    if backlog_chamados is None:
+        return {'x': [], 'y': []}
+    serie = backlog_chamados.serie(granularidade, {'responsavel': responsavel, 'prioridade': prioridade})
     
-    fig.update_layout(
-        title='📅 Comparativo Mensal',
-        paper_bgcolor=COR_CARD,
-        plot_bgcolor=COR_CARD,
-        margin=dict(l=60, r=30, t=30, b=50),
-        font=dict(family='Segoe UI, sans-serif', size=12),
-        xaxis=dict(gridcolor='#f0f0f0', showgrid=True),
-        yaxis=dict(gridcolor='#f0f0f0', showgrid=True),
-        hoverlabel=dict(bgcolor='white', font=dict(size=13), bordercolor=COR_PRIMARIA),
-        showlegend=False,
-        height=350
-    )
+    return {'x': serie.index.strftime('%Y-%m-%d').tolist(), 'y': serie.tolist()}
+
+@metricas.cronometrar('backlog', 'figura')
+def criar_grafico_backlog(granularidade='mes', responsavel='', prioridade=''):
+    """Gráfico de chamados abertos no fim de cada período"""
+    dados = dados_grafico_backlog(granularidade, responsavel, prioridade)
     
-    return fig
+    return {
+        'data': [{
+            'type': 'scatter',
+            'x': dados['x'],
+            'y': dados['y'],
+            'mode': 'lines+markers',
+            'line': {'width': 3, 'color': COR_ALERTA},
+            'marker': {'size': 7, 'color': COR_ALERTA},
+            'xhoverformat': '%d/%m/%Y',
+            'hovertemplate': '<b>%{x}</b><br>%{y} chamados abertos<extra></extra>'
+        }],
+        'layout': layout_grafico(
+            '🎫 Backlog de Chamados',
+            xaxis={**EIXO, 'type': 'date'},
+            yaxis={**EIXO, 'rangemode': 'tozero'}
+        )
+    }
+
+CRIADORES_GRAFICOS = {
+    'evolucao': criar_grafico_evolucao,
+    'regioes': criar_grafico_regioes,
+    'produtos': criar_grafico_produtos,
+    'performance': criar_grafico_performance,
+    'mensal': criar_grafico_mensal,
+}
+
+_executor_figuras = (
+    ThreadPoolExecutor(max_workers=len(CRIADORES_GRAFICOS), thread_name_prefix='figuras')
+    if FIGURAS_PARALELAS else None
+)
+
+def criar_graficos(df_filtrado):
+    """
+    As cinco figuras de um mesmo recorte. Com DASHBOARD_FIGURAS_PARALELAS,
+    agregação e montagem de cada gráfico rodam ao mesmo tempo no pool e a
+    função retorna quando todas ficam prontas.
+    """
+    if _executor_figuras is None:
+        return {nome: criar(df_filtrado) for nome, criar in CRIADORES_GRAFICOS.items()}
+    futuros = {nome: _executor_figuras.submit(criar, df_filtrado) for nome, criar in CRIADORES_GRAFICOS.items()}
+    return {nome: futuro.result() for nome, futuro in futuros.items()}
 
 # =============================
 # LAYOUT DO APP
 # =============================
+# Figuras iniciais (sem dados): os callbacks trocam só os traços depois
+figuras_iniciais = criar_graficos(pd.DataFrame({
+    'Data': pd.Series(dtype='datetime64[ns]'),
+    **{coluna: pd.Series(dtype=object) for coluna in DIMENSOES[1:]},
+    **{coluna: pd.Series(dtype='float64') for coluna in MEDIDAS},
+}))
+primeira_data, ultima_data = intervalo_filtro()
+
 app.layout = html.Div([
     # HEADER
     html.Div([
@@ -231,6 +592,23 @@ app.layout = html.Div([
     
     # CONTAINER PRINCIPAL
     html.Div([
+        # AVISO DE CARREGAMENTO (início rápido)
+        html.Div('⏳ Carregando dados...', id='aviso-carregamento', style={
+            'background': COR_CARD,
+            'padding': '15px 20px',
+            'borderRadius': '8px',
+            'marginBottom': '20px',
+            'borderLeft': f'4px solid {COR_ALERTA}',
+            'boxShadow': '0 1px 3px rgba(0, 0, 0, 0.08)',
+            'color': '#666',
+            'display': 'none' if conjunto is not None else 'block'
+        }),
+        dcc.Interval(id='intervalo-carregamento', interval=500, disabled=conjunto is not None),
+        # Versão dos dados: quando a carga termina, os callbacks recalculam
+        dcc.Store(id='versao-dados', data=conjunto.versao if conjunto is not None else None),
+        # Cubo codificado para os callbacks do navegador (só no modo cliente)
+        dcc.Store(id='cubo-cliente'),
+        
         # FILTROS
         html.Div([
             html.Div([
@@ -238,7 +616,7 @@ app.layout = html.Div([
                 dcc.Dropdown(
                     id='mes-select',
                     options=[{'label': 'Todos', 'value': ''}] + 
-                            [{'label': m, 'value': m} for m in sorted(df['Mês'].unique())],
+                            [{'label': m, 'value': m} for m in valores_filtro('Mês')],
                     value='',
                     style={'minWidth': '150px', 'width': '100%'}
                 )
@@ -249,7 +627,7 @@ app.layout = html.Div([
                 dcc.Dropdown(
                     id='regiao-select',
                     options=[{'label': 'Todas', 'value': ''}] + 
-                            [{'label': r, 'value': r} for r in sorted(df['Região'].unique())],
+                            [{'label': r, 'value': r} for r in valores_filtro('Região')],
                     value='',
                     style={'minWidth': '150px', 'width': '100%'}
                 )
@@ -260,10 +638,24 @@ app.layout = html.Div([
                 dcc.Dropdown(
                     id='produto-select',
                     options=[{'label': 'Todos', 'value': ''}] + 
-                            [{'label': p, 'value': p} for p in sorted(df['Produto'].unique())],
+                            [{'label': p, 'value': p} for p in valores_filtro('Produto')],
                     value='',
                     style={'minWidth': '150px', 'width': '100%'}
                 )
+            ], style={'display': 'flex', 'alignItems': 'center', 'gap': '10px', 'flex': '1', 'minWidth': '200px'}),
+            
+            html.Div([
+                html.Label('Período:', style={'fontWeight': '600', 'fontSize': '13px', 'marginRight': '10px', 'color': '#333'}),
+                dcc.DatePickerRange(
+                    id='periodo-select',
+                    min_date_allowed=primeira_data,
+                    max_date_allowed=ultima_data,
+                    initial_visible_month=primeira_data,
+                    display_format='DD/MM/YYYY',
+                    start_date_placeholder_text='Início',
+                    end_date_placeholder_text='Fim',
+                    clearable=True
+                )
             ], style={'display': 'flex', 'alignItems': 'center', 'gap': '10px', 'flex': '1', 'minWidth': '200px'})
         ], style={
             'background': COR_CARD,
@@ -341,7 +733,7 @@ app.layout = html.Div([
         # GRÁFICOS LINHA 1
         html.Div([
             html.Div([
-                dcc.Graph(id='grafico-evolucao')
+                dcc.Graph(id='grafico-evolucao', figure=figuras_iniciais['evolucao'])
             ], style={
                 'background': COR_CARD,
                 'padding': '20px',
@@ -350,7 +742,7 @@ app.layout = html.Div([
             }),
             
             html.Div([
-                dcc.Graph(id='grafico-regioes')
+                dcc.Graph(id='grafico-regioes', figure=figuras_iniciais['regioes'])
             ], style={
                 'background': COR_CARD,
                 'padding': '20px',
@@ -367,7 +759,7 @@ app.layout = html.Div([
         # GRÁFICOS LINHA 2
         html.Div([
             html.Div([
-                dcc.Graph(id='grafico-produtos')
+                dcc.Graph(id='grafico-produtos', figure=figuras_iniciais['produtos'])
             ], style={
                 'background': COR_CARD,
                 'padding': '20px',
@@ -376,7 +768,7 @@ app.layout = html.Div([
             }),
             
             html.Div([
-                dcc.Graph(id='grafico-performance')
+                dcc.Graph(id='grafico-performance', figure=figuras_iniciais['performance'])
             ], style={
                 'background': COR_CARD,
                 'padding': '20px',
@@ -392,7 +784,7 @@ app.layout = html.Div([
         
         # GRÁFICO COMPLETO
         html.Div([
-            dcc.Graph(id='grafico-mensal')
+            dcc.Graph(id='grafico-mensal', figure=figuras_iniciais['mensal'])
         ], style={
             'background': COR_CARD,
             'padding': '20px',
@@ -401,10 +793,85 @@ app.layout = html.Div([
             'marginBottom': '30px'
         }),
         
+        # BACKLOG DE CHAMADOS
+        html.Div([
+            html.Div([
+                html.Div([
+                    html.Label('Responsável:', style={'fontWeight': '600', 'fontSize': '13px', 'marginRight': '10px', 'color': '#333'}),
+                    dcc.Dropdown(
+                        id='backlog-responsavel',
+                        options=[{'label': 'Todos', 'value': ''}] +
+                                [{'label': r, 'value': r} for r in sorted(backlog_chamados.valores('responsavel') if backlog_chamados else [])],
+                        value='',
+                        style={'minWidth': '150px', 'width': '100%'}
+                    )
+                ], style={'display': 'flex', 'alignItems': 'center', 'gap': '10px', 'flex': '1', 'minWidth': '200px'}),
+                
+                html.Div([
+                    html.Label('Prioridade:', style={'fontWeight': '600', 'fontSize': '13px', 'marginRight': '10px', 'color': '#333'}),
+                    dcc.Dropdown(
+                        id='backlog-prioridade',
+                        options=[{'label': 'Todas', 'value': ''}] +
+                                [{'label': p, 'value': p} for p in sorted(backlog_chamados.valores('prioridade') if backlog_chamados else [])],
+                        value='',
+                        style={'minWidth': '150px', 'width': '100%'}
+                    )
+                ], style={'display': 'flex', 'alignItems': 'center', 'gap': '10px', 'flex': '1', 'minWidth': '200px'}),
+                
+                dcc.RadioItems(
+                    id='backlog-granularidade',
+                    options=[{'label': 'Dia', 'value': 'dia'}, {'label': 'Semana', 'value': 'semana'}, {'label': 'Mês', 'value': 'mes'}],
+                    value='mes',
+                    inline=True,
+                    labelStyle={'marginRight': '15px', 'fontSize': '13px'}
+                )
+            ], style={'display': 'flex', 'gap': '15px', 'flexWrap': 'wrap', 'alignItems': 'center', 'marginBottom': '10px'}),
+            
+            dcc.Graph(id='grafico-backlog', figure=criar_grafico_backlog()),
+            html.Div('Chamados lidos na inicialização do servidor', style={'fontSize': '12px', 'color': '#999'})
+        ], style={
+            'background': COR_CARD,
+            'padding': '20px',
+            'borderRadius': '8px',
+            'boxShadow': '0 1px 4px rgba(0, 0, 0, 0.08)',
+            'marginBottom': '30px',
+            'display': 'block' if backlog_chamados is not None else 'none'
+        }),
+        
         # TABELA
         html.Div([
             html.H3('📋 Detalhes de Vendas', style={'marginBottom': '15px', 'paddingBottom': '10px', 'borderBottom': '1px solid #f0f0f0', 'color': '#333', 'marginTop': '0'}),
-            html.Div(id='tabela-container', style={'overflowX': 'auto'})
+            html.Div(
+                [html.Span('Exportar vendas filtradas:', style={'color': '#666', 'marginRight': '10px'})] +
+                [html.A(f'⬇ {formato.upper()}', id=f'link-exportacao-{formato}', href=app.get_relative_path(f'/exportar?formato={formato}'),
+                        style={'color': COR_PRIMARIA, 'fontWeight': '600', 'marginRight': '15px', 'textDecoration': 'none'})
+                 for formato in formatos_disponiveis()],
+                style={'fontSize': '13px', 'marginBottom': '10px'}
+            ),
+            dash_table.DataTable(
+                id='tabela-detalhes',
+                columns=[
+                    {'name': 'Data', 'id': 'Data'},
+                    {'name': 'Região', 'id': 'Região'},
+                    {'name': 'Produto', 'id': 'Produto'},
+                    {'name': 'Quantidade', 'id': 'Quantidade', 'type': 'numeric'},
+                    {'name': 'Valor (R$)', 'id': 'Valor', 'type': 'numeric',
+                     'format': Format(precision=2, scheme=Scheme.fixed, group=Group.yes, symbol=Symbol.yes, symbol_prefix='R$ ')
+                               .group_delimiter('.').decimal_delimiter(',')},
+                    {'name': 'Status', 'id': 'Status'}
+                ],
+                # Paginação e ordenação feitas no servidor: só a página visível trafega
+                page_action='custom',
+                page_current=0,
+                page_size=TAMANHO_PAGINA,
+                sort_action='custom',
+                sort_mode='single',
+                sort_by=ORDENACAO_PADRAO,
+                style_table={'overflowX': 'auto'},
+                style_cell={'padding': '12px', 'textAlign': 'left', 'border': 'none', 'borderBottom': '1px solid #f0f0f0', 'fontSize': '13px', 'fontFamily': 'Segoe UI, sans-serif'},
+                style_header={'fontWeight': '600', 'borderBottom': f'2px solid {COR_PRIMARIA}', 'backgroundColor': '#f5f5f5'}
+            ),
+            html.P(id='tabela-mensagem', style={'textAlign': 'center', 'color': '#999', 'padding': '20px'})
         ], style={
             'background': COR_CARD,
             'padding': '20px',
@@ -438,40 +905,103 @@ app.layout = html.Div([
 # =============================
 # CALLBACKS (INTERATIVIDADE)
 # =============================
-@callback(
-    [Output('kpi-vendas', 'children'),
-     Output('kpi-quantidade', 'children'),
-     Output('kpi-ticket', 'children'),
-     Output('kpi-conversao', 'children'),
-     Output('grafico-evolucao', 'figure'),
-     Output('grafico-regioes', 'figure'),
-     Output('grafico-produtos', 'figure'),
-     Output('grafico-performance', 'figure'),
-     Output('grafico-mensal', 'figure'),
-     Output('tabela-container', 'children')],
-    [Input('mes-select', 'value'),
-     Input('regiao-select', 'value'),
-     Input('produto-select', 'value')]
-)
-def atualizar_dashboard(mes, regiao, produto):
-    """Atualiza todo o dashboard baseado nos filtros"""
-    
-    # Aplicar filtros
-    df_filtrado = df.copy()
-    
-    if mes:
-        df_filtrado = df_filtrado[df_filtrado['Mês'] == mes]
-    if regiao:
-        df_filtrado = df_filtrado[df_filtrado['Região'] == regiao]
-    if produto:
-        df_filtrado = df_filtrado[df_filtrado['Produto'] == produto]
+FILTROS_ENTRADA = [
+    Input('mes-select', 'value'),
+    Input('regiao-select', 'value'),
+    Input('produto-select', 'value'),
+    Input('periodo-select', 'start_date'),
+    Input('periodo-select', 'end_date'),
+]
+VERSAO_ENTRADA = Input('versao-dados', 'data')
+
+def callback_servidor(*args, **kwargs):
+    """callback() dos grupos que, no modo cliente, são calculados no navegador"""
+    if MODO_CLIENTE:
+        return lambda funcao: funcao
+    return callback(*args, **kwargs)
+
+def chave_resultado(grupo, mes, regiao, produto, periodo, *extras):
+    return (grupo, mes or '', regiao or '', produto or '', periodo, *extras)
+
+def obter_resultado(grupo, mes, regiao, produto, periodo, *extras):
+    """
+    Resultado de um grupo de saídas para os filtros e o período (inicio,
+    fim), servido pelo cache quando a mesma combinação já foi calculada na
+    versão atual dos dados. Argumentos extras (por exemplo, o intervalo de
+    zoom) entram na chave.
+    """
+    dados = conjunto
+    if dados is None:
+        # Ainda carregando: versao-dados muda quando a carga termina
+        raise PreventUpdate
+    periodo = normalizar_periodo(*periodo)
+    chave = chave_resultado(grupo, mes, regiao, produto, periodo, *extras)
     
-    # Calcular KPIs
-    total_vendas = df_filtrado['Valor'].sum()
-    total_quantidade = df_filtrado['Quantidade'].sum()
-    ticket_medio = total_vendas / total_quantidade if total_quantidade > 0 else 0
+    with metricas.callback(grupo):
+        with metricas.etapa(grupo, 'cache'):
+            encontrado, resultado = cache_resultados.obter(chave, dados.versao)
+        if not encontrado:
+            # Latência de um clique frio: o resultado não estava no cache
+            with metricas.etapa(grupo, 'sem_cache'):
+                resultado = CALCULOS[grupo](dados, mes, regiao, produto, periodo, *extras)
+            with metricas.etapa(grupo, 'cache'):
+                cache_resultados.guardar(chave, dados.versao, resultado)
     
-    taxa_conversao = (len(df_filtrado[df_filtrado['Status'] == 'Completo']) / len(df_filtrado) * 100) if len(df_filtrado) > 0 else 0
+    if INICIALIZACAO['primeira_resposta_seg'] is None:
+        INICIALIZACAO['primeira_resposta_seg'] = time.perf_counter() - INICIO_PROCESSO
+        logger.info('Primeira resposta %.3f s após o início do processo', INICIALIZACAO['primeira_resposta_seg'])
+    return resultado
+
+# Com o backend SQL, o banco já devolve cada grupo agregado no nível de que o
+# cálculo precisa: colunas do GROUP BY e medidas
+AGREGACOES_SQL = {
+    'kpis': ([], ['Valor', 'Quantidade', 'Linhas', 'Status']),
+    'evolucao': (['Data'], ['Valor']),
+    'regioes': (['Região'], ['Valor']),
+    'produtos': (['Produto'], ['Valor']),
+    'performance': (['Região'], ['Quantidade']),
+    'mensal': (['Mês'], ['Valor']),
+}
+
+def fatiar(dados, mes, regiao, produto, grupo=None, periodo=(None, None)):
+    """Células do cubo pré-agregado (ou linhas agregadas pelo banco) que atendem aos filtros e ao período"""
+    with metricas.etapa(grupo, 'filtro'):
+        if isinstance(dados, BancoVendas):
+            fatia = dados.agregar(filtros_por_coluna(mes, regiao, produto), *AGREGACOES_SQL[grupo], periodo=periodo)
+        elif any(periodo):
+            fatia = fatiar_cubo(dados.cubo, mes, regiao, produto, indice=dados.indice_cubo,
+                                periodo=periodo, indice_datas=dados.periodo_cubo)
+        else:
+            fatia = fatiar_cubo(dados.cubo, mes, regiao, produto, indice=dados.indice_cubo)
+    metricas.observar_linhas(grupo, len(fatia))
+    return fatia
+
+def patch_grafico(dados_traco):
+    """Atualização parcial que troca só os dados do primeiro traço da figura"""
+    patch = Patch()
+    for caminho, valor in dados_traco.items():
+        alvo = patch['data'][0]
+        *partes, ultima = caminho.split('.')
+        for parte in partes:
+            alvo = alvo[parte]
+        alvo[ultima] = valor
+    return patch
+
+def calcular_kpis_formatados(dados, mes, regiao, produto, periodo=(None, None)):
+    """Textos dos quatro cards de KPI"""
+    if isinstance(dados, BancoVendas):
+        fatia = fatiar(dados, mes, regiao, produto, 'kpis', periodo)
+        with metricas.etapa('kpis', 'agregacao'):
+            kpis = calcular_kpis(fatia)
+    else:
+        # Totais do recorte no período pela diferença de duas somas acumuladas
+        with metricas.etapa('kpis', 'agregacao'):
+            totais = dados.somas_periodo.totais(filtros_por_coluna(mes, regiao, produto), *limites_periodo(*periodo))
+            kpis = kpis_de_totais(totais)
+    total_vendas = kpis['total_vendas']
+    total_quantidade = kpis['total_quantidade']
+    ticket_medio = kpis['ticket_medio']
+    taxa_conversao = kpis['taxa_conversao']
     
     # Formatar KPIs
     kpi_vendas = f'R$ {total_vendas:,.2f}'.replace(',', '.')
@@ -479,42 +1009,305 @@ def atualizar_dashboard(mes, regiao, produto):
     kpi_ticket = f'R$ {ticket_medio:,.2f}'.replace(',', '.')
     kpi_conversao = f'{taxa_conversao:.1f}%'
     
-    # Gerar gráficos
-    fig_evolucao = criar_grafico_evolucao(df_filtrado) if len(df_filtrado) > 0 else go.Figure()
-    fig_regioes = criar_grafico_regioes(df_filtrado) if len(df_filtrado) > 0 else go.Figure()
-    fig_produtos = criar_grafico_produtos(df_filtrado) if len(df_filtrado) > 0 else go.Figure()
-    fig_performance = criar_grafico_performance(df_filtrado) if len(df_filtrado) > 0 else go.Figure()
-    fig_mensal = criar_grafico_mensal(df_filtrado) if len(df_filtrado) > 0 else go.Figure()
-    
-    # Gerar tabela
-    df_tabela = df_filtrado.nlargest(10, 'Valor')[['Data_Formatada', 'Região', 'Produto', 'Quantidade', 'Valor', 'Status']]
+    return kpi_vendas, kpi_quantidade, kpi_ticket, kpi_conversao
+
+def calcular_tabela(dados, mes, regiao, produto, periodo, pagina, tamanho, ordenacao):
+    """Página da tabela de detalhes (a única saída que precisa das linhas originais)"""
+    ordenacao = [{'column_id': coluna, 'direction': direcao} for coluna, direcao in ordenacao]
+    if isinstance(dados, BancoVendas):
+        # Filtro, contagem, ordenação e LIMIT/OFFSET em consultas ao banco
+        with metricas.etapa('tabela', 'pagina'):
+            registros, paginas, total = dados.pagina_detalhes(
+                filtros_por_coluna(mes, regiao, produto), pagina, tamanho, ordenacao, periodo
+            )
+        metricas.observar_linhas('tabela', total)
+    else:
+        with metricas.etapa('tabela', 'filtro'):
+            ids = dados.linhas.filtrar(filtros_por_coluna(mes, regiao, produto), periodo)
+        metricas.observar_linhas('tabela', len(dados.linhas) if ids is None else len(ids))
+        with metricas.etapa('tabela', 'pagina'):
+            registros, paginas, total = pagina_detalhes(dados.linhas, ids, pagina, tamanho, ordenacao)
+    mensagem = f'{total:,} vendas'.replace(',', '.') if total else 'Nenhum dado encontrado'
+    return registros, paginas, mensagem
+
+def _calculo_grafico(grupo, dados_grafico):
+    def calcular(dados, mes, regiao, produto, periodo, *extras):
+        fatia = fatiar(dados, mes, regiao, produto, grupo, periodo)
+        with metricas.etapa(grupo, 'agregacao'):
+            return dados_grafico(fatia, *extras)
+    return calcular
+
+# Cada grupo de saídas é calculado e guardado no cache de forma independente
+CALCULOS = {
+    'kpis': calcular_kpis_formatados,
+    'evolucao': _calculo_grafico('evolucao', dados_grafico_evolucao),
+    'regioes': _calculo_grafico('regioes', dados_grafico_regioes),
+    'produtos': _calculo_grafico('produtos', dados_grafico_produtos),
+    'performance': _calculo_grafico('performance', dados_grafico_performance),
+    'mensal': _calculo_grafico('mensal', dados_grafico_mensal),
+    'tabela': calcular_tabela,
+}
+
+# Um callback por grupo: o navegador dispara as requisições em paralelo, cada
+# gráfico aparece assim que fica pronto e as figuras recebem só os dados novos
+# dos traços (o layout já está no componente)
+@callback_servidor(
+    [Output('kpi-vendas', 'children'),
+     Output('kpi-quantidade', 'children'),
+     Output('kpi-ticket', 'children'),
+     Output('kpi-conversao', 'children')],
+    FILTROS_ENTRADA + [VERSAO_ENTRADA]
+)
+def atualizar_kpis(mes, regiao, produto, inicio=None, fim=None, versao=None):
+    """Atualiza os cards de KPI"""
+    return obter_resultado('kpis', mes, regiao, produto, (inicio, fim))
+
+@callback_servidor(Output('grafico-evolucao', 'figure'), FILTROS_ENTRADA + [Input('grafico-evolucao', 'relayoutData'), VERSAO_ENTRADA])
+def atualizar_evolucao(mes, regiao, produto, inicio=None, fim=None, relayout=None, versao=None):
+    """Atualiza o gráfico de evolução de vendas, buscando mais detalhe ao dar zoom"""
+    intervalo = intervalo_zoom(relayout)
+    if intervalo is None and relayout and not relayout.get('xaxis.autorange') and ctx.triggered_id == 'grafico-evolucao':
+        # Eventos de layout sem mudança no eixo x (ex.: zoom só no eixo y)
+        return no_update
+    return patch_grafico(obter_resultado('evolucao', mes, regiao, produto, (inicio, fim), intervalo))
+
+@callback_servidor(Output('grafico-regioes', 'figure'), FILTROS_ENTRADA + [VERSAO_ENTRADA])
+def atualizar_regioes(mes, regiao, produto, inicio=None, fim=None, versao=None):
+    """Atualiza o gráfico de vendas por região"""
+    return patch_grafico(obter_resultado('regioes', mes, regiao, produto, (inicio, fim)))
+
+@callback_servidor(Output('grafico-produtos', 'figure'), FILTROS_ENTRADA + [VERSAO_ENTRADA])
+def atualizar_produtos(mes, regiao, produto, inicio=None, fim=None, versao=None):
+    """Atualiza o gráfico de distribuição por produto"""
+    return patch_grafico(obter_resultado('produtos', mes, regiao, produto, (inicio, fim)))
+
+@callback_servidor(Output('grafico-performance', 'figure'), FILTROS_ENTRADA + [VERSAO_ENTRADA])
+def atualizar_performance(mes, regiao, produto, inicio=None, fim=None, versao=None):
+    """Atualiza o gráfico de performance por região"""
+    return patch_grafico(obter_resultado('performance', mes, regiao, produto, (inicio, fim)))
+
+@callback_servidor(Output('grafico-mensal', 'figure'), FILTROS_ENTRADA + [VERSAO_ENTRADA])
+def atualizar_mensal(mes, regiao, produto, inicio=None, fim=None, versao=None):
+    """Atualiza o gráfico comparativo mensal"""
+    return patch_grafico(obter_resultado('mensal', mes, regiao, produto, (inicio, fim)))
+
+@callback(
+    Output('grafico-backlog', 'figure'),
+    [Input('backlog-granularidade', 'value'),
+     Input('backlog-responsavel', 'value'),
+     Input('backlog-prioridade', 'value')]
+)
+def atualizar_backlog(granularidade, responsavel, prioridade):
+    """Atualiza o gráfico de backlog de chamados"""
+    with metricas.callback('backlog'):
+        dados = dados_grafico_backlog(granularidade or 'mes', responsavel or '', prioridade or '')
+    return patch_grafico(dados)
+
+@callback(Output('tabela-detalhes', 'page_current'), FILTROS_ENTRADA)
+def reiniciar_paginacao(mes, regiao, produto, inicio, fim):
+    """
+    Volta para a primeira página quando os filtros mudam. Também conta a
+    combinação em frequencia_filtros: este callback roda uma vez por mudança
+    de filtro (e na carga da página), não a cada gráfico, página ou zoom.
+    """
+    frequencia_filtros.registrar((mes or '', regiao or '', produto or ''))
+    return 0
+
+@callback(
+    [Output('tabela-detalhes', 'data'),
+     Output('tabela-detalhes', 'page_count'),
+     Output('tabela-mensagem', 'children')],
+    FILTROS_ENTRADA + [Input('tabela-detalhes', 'page_current'),
+                       Input('tabela-detalhes', 'page_size'),
+                       Input('tabela-detalhes', 'sort_by'),
+                       VERSAO_ENTRADA]
+)
+def atualizar_tabela(mes, regiao, produto, inicio=None, fim=None, pagina=0, tamanho=None, ordenacao=None, versao=None):
+    """Atualiza a página visível da tabela de detalhes"""
+    ordenacao = tuple((o['column_id'], o['direction']) for o in (ordenacao or ORDENACAO_PADRAO))
+    return obter_resultado('tabela', mes, regiao, produto, (inicio, fim), pagina or 0, tamanho or TAMANHO_PAGINA, ordenacao)
+
+def url_exportacao(formato, mes, regiao, produto, inicio=None, fim=None):
+    """Endereço de /exportar com os filtros atuais"""
+    parametros = {'formato': formato, 'mes': mes, 'regiao': regiao, 'produto': produto, 'inicio': inicio, 'fim': fim}
+    return app.get_relative_path('/exportar?' + urlencode({k: v for k, v in parametros.items() if v}))
+
+@callback([Output(f'link-exportacao-{formato}', 'href') for formato in formatos_disponiveis()], FILTROS_ENTRADA)
+def atualizar_links_exportacao(mes, regiao, produto, inicio=None, fim=None):
+    """Links de download com os filtros e o período selecionados"""
+    return [url_exportacao(formato, mes, regiao, produto, inicio, fim) for formato in formatos_disponiveis()]
+
+@callback(
+    [Output('versao-dados', 'data'),
+     Output('aviso-carregamento', 'style'),
+     Output('intervalo-carregamento', 'disabled'),
+     Output('mes-select', 'options'),
+     Output('regiao-select', 'options'),
+     Output('produto-select', 'options'),
+     Output('periodo-select', 'min_date_allowed'),
+     Output('periodo-select', 'max_date_allowed'),
+     Output('periodo-select', 'initial_visible_month')],
+    Input('intervalo-carregamento', 'n_intervals'),
+    State('aviso-carregamento', 'style'),
+    prevent_initial_call=True
+)
+def verificar_carregamento(_, estilo_aviso):
+    """No início rápido, publica a versão dos dados e as opções e datas reais quando a carga termina"""
+    dados = conjunto
+    if dados is None:
+        raise PreventUpdate
+    opcoes = [
+        [{'label': rotulo, 'value': ''}] + [{'label': v, 'value': v} for v in dados.valores(coluna)]
+        for coluna, rotulo in [('Mês', 'Todos'), ('Região', 'Todas'), ('Produto', 'Todos')]
+    ]
+    primeira, ultima = dados.intervalo_datas()
+    return dados.versao, {**(estilo_aviso or {}), 'display': 'none'}, True, *opcoes, primeira, ultima, primeira
+
+# =============================
+# MODO CLIENTE
+# =============================
+def cubo_cliente(dados):
+    """Cubo do retrato atual codificado para o dcc.Store do navegador"""
+    if isinstance(dados, BancoVendas):
+        cubo = dados.agregar({}, DIMENSOES, ['Valor', 'Quantidade', 'Linhas', 'Status'])
+    else:
+        cubo = dados.cubo
+    parametros = {'cores_regioes': CORES_REGIOES, 'meses': ORDEM_MESES, 'pontos_evolucao': PONTOS_EVOLUCAO}
+    return codificar_cubo(cubo, dados.versao, parametros)
+
+if MODO_CLIENTE:
+    @callback(Output('cubo-cliente', 'data'), VERSAO_ENTRADA)
+    def enviar_cubo(versao):
+        """Envia o cubo uma vez por carga da página ou versão dos dados"""
+        dados = conjunto
+        if dados is None:
+            raise PreventUpdate
+        with metricas.callback('cubo_cliente'):
+            encontrado, codificado = cache_resultados.obter(('cubo_cliente',), dados.versao)
+            if not encontrado:
+                codificado = cubo_cliente(dados)
+                cache_resultados.guardar(('cubo_cliente',), dados.versao, codificado)
+        return codificado
     
-    linhas_tabela = [
-        html.Table([
-            html.Thead(
-                html.Tr([
-                    html.Th('Data', style={'padding': '12px', 'textAlign': 'left', 'fontWeight': '600', 'borderBottom': f'2px solid {COR_PRIMARIA}', 'backgroundColor': '#f5f5f5'}),
-                    html.Th('Região', style={'padding': '12px', 'textAlign': 'left', 'fontWeight': '600', 'borderBottom': f'2px solid {COR_PRIMARIA}', 'backgroundColor': '#f5f5f5'}),
-                    html.Th('Produto', style={'padding': '12px', 'textAlign': 'left', 'fontWeight': '600', 'borderBottom': f'2px solid {COR_PRIMARIA}', 'backgroundColor': '#f5f5f5'}),
-                    html.Th('Quantidade', style={'padding': '12px', 'textAlign': 'left', 'fontWeight': '600', 'borderBottom': f'2px solid {COR_PRIMARIA}', 'backgroundColor': '#f5f5f5'}),
-                    html.Th('Valor (R$)', style={'padding': '12px', 'textAlign': 'left', 'fontWeight': '600', 'borderBottom': f'2px solid {COR_PRIMARIA}', 'backgroundColor': '#f5f5f5'}),
-                    html.Th('Status', style={'padding': '12px', 'textAlign': 'left', 'fontWeight': '600', 'borderBottom': f'2px solid {COR_PRIMARIA}', 'backgroundColor': '#f5f5f5'})
-                ])
-            ),
-            html.Tbody([
-                html.Tr([
-                    html.Td(row['Data_Formatada'], style={'padding': '12px', 'borderBottom': '1px solid #f0f0f0'}),
-                    html.Td(row['Região'], style={'padding': '12px', 'borderBottom': '1px solid #f0f0f0'}),
-                    html.Td(row['Produto'], style={'padding': '12px', 'borderBottom': '1px solid #f0f0f0'}),
-                    html.Td(f"{row['Quantidade']}", style={'padding': '12px', 'borderBottom': '1px solid #f0f0f0'}),
-                    html.Td(f"R$ {row['Valor']:,.2f}".replace(',', '.'), style={'padding': '12px', 'borderBottom': '1px solid #f0f0f0'}),
-                    html.Td(f"✓ {row['Status']}", style={'padding': '12px', 'borderBottom': '1px solid #f0f0f0'})
-                ]) for _, row in df_tabela.iterrows()
-            ])
-        ], style={'width': '100%', 'borderCollapse': 'collapse', 'fontSize': '13px'})
-    ] if len(df_tabela) > 0 else [html.P('Nenhum dado encontrado', style={'textAlign': 'center', 'color': '#999', 'padding': '20px'})]
+    CUBO_ENTRADA = Input('cubo-cliente', 'data')
+    app.clientside_callback(
+        ClientsideFunction('dashboard', 'kpis'),
+        [Output('kpi-vendas', 'children'),
+         Output('kpi-quantidade', 'children'),
+         Output('kpi-ticket', 'children'),
+         Output('kpi-conversao', 'children')],
+        FILTROS_ENTRADA + [CUBO_ENTRADA]
+    )
+    app.clientside_callback(
+        ClientsideFunction('dashboard', 'evolucao'),
+        Output('grafico-evolucao', 'figure'),
+        FILTROS_ENTRADA + [Input('grafico-evolucao', 'relayoutData'), CUBO_ENTRADA, State('grafico-evolucao', 'figure')]
+    )
+    for grupo in ['regioes', 'produtos', 'performance', 'mensal']:
+        app.clientside_callback(
+            ClientsideFunction('dashboard', grupo),
+            Output(f'grafico-{grupo}', 'figure'),
+            FILTROS_ENTRADA + [CUBO_ENTRADA, State(f'grafico-{grupo}', 'figure')]
+        )
+
+# =============================
+# ROTAS DO SERVIDOR
+# =============================
+@server.route('/cache/estatisticas')
+def estatisticas_cache():
+    """Contadores de hit/miss e ocupação do cache de resultados"""
+    return jsonify({'versao_dados': conjunto.versao if conjunto is not None else None, **cache_resultados.estatisticas()})
+
+@server.route('/exportar')
+def exportar_vendas():
+    """
+    Vendas filtradas para download, com os mesmos filtros dos callbacks
+    (?formato=csv|parquet&mes=&regiao=&produto=&inicio=&fim=). O arquivo é
+    gerado e enviado em blocos de EXPORTACAO_BLOCO linhas a partir do
+    retrato atual, sem travar os callbacks.
+    """
+    dados = conjunto
+    if dados is None:
+        return jsonify({'erro': 'dados ainda carregando'}), 503
+    formato = request.args.get('formato', 'csv')
+    if formato not in formatos_disponiveis():
+        return jsonify({'erro': f'formato indisponível: {formato}', 'formatos': formatos_disponiveis()}), 400
+    try:
+        periodo = normalizar_periodo(request.args.get('inicio'), request.args.get('fim'))
+    except ValueError:
+        return jsonify({'erro': 'datas inválidas em inicio/fim'}), 400
     
-    return kpi_vendas, kpi_quantidade, kpi_ticket, kpi_conversao, fig_evolucao, fig_regioes, fig_produtos, fig_performance, fig_mensal, linhas_tabela
+    filtros = filtros_por_coluna(request.args.get('mes'), request.args.get('regiao'), request.args.get('produto'))
+    blocos = dados.iterar_linhas(filtros, EXPORTACAO_BLOCO, COLUNAS_EXPORTACAO, periodo)
+    return Response(
+        GERADORES[formato](blocos),
+        content_type=TIPOS_CONTEUDO[formato],
+        headers={'Content-Disposition': f'attachment; filename=vendas.{formato}'},
+    )
+
+@server.route('/inicializacao')
+def estado_inicializacao():
+    """Tempos até o servidor subir, os dados carregarem e a primeira resposta, e o progresso do aquecimento"""
+    return jsonify({
+        **INICIALIZACAO,
+        'dados_carregados': conjunto is not None,
+        'aquecimento': aquecimento.estado() if aquecimento is not None else None,
+    })
+
+# =============================
+# INICIALIZAÇÃO EM SEGUNDO PLANO
+# =============================
+# Argumentos extras de cada grupo no estado inicial da página (sem período)
+GRUPOS_AQUECIMENTO = {
+    'kpis': (),
+    'evolucao': (None,),
+    'regioes': (),
+    'produtos': (),
+    'performance': (),
+    'mensal': (),
+    'tabela': (0, TAMANHO_PAGINA, tuple((o['column_id'], o['direction']) for o in ORDENACAO_PADRAO)),
+}
+
+aquecimento = None
+
+def aquecer_combinacao(mes, regiao, produto):
+    """Calcula e guarda no cache os resultados de uma combinação de filtros"""
+    dados = conjunto
+    periodo = (None, None)
+    for grupo, extras in GRUPOS_AQUECIMENTO.items():
+        chave = chave_resultado(grupo, mes, regiao, produto, periodo, *extras)
+        # contem() não conta miss: só pedidos de usuários entram nas estatísticas do cache
+        if not cache_resultados.contem(chave, dados.versao):
+            cache_resultados.guardar(chave, dados.versao, CALCULOS[grupo](dados, mes, regiao, produto, periodo, *extras))
+
+def iniciar_aquecimento():
+    """Aquece o cache com as combinações de filtros, das mais pedidas para as menos"""
+    global aquecimento
+    if not AQUECIMENTO or MODO_CLIENTE or AQUECIMENTO_THREADS <= 0 or CACHE_MB <= 0:
+        return
+    combinacoes = combinacoes_filtros([valores_filtro(c) for c in FILTROS.values()])
+    combinacoes = frequencia_filtros.ordenar(combinacoes)[:AQUECIMENTO_MAX]
+    aquecimento = Aquecimento(combinacoes, aquecer_combinacao, AQUECIMENTO_THREADS)
+    aquecimento.start()
+
+def preparar_em_segundo_plano():
+    try:
+        if conjunto is None:
+            inicializar_dados()
+        iniciar_aquecimento()
+    except Exception:
+        logger.exception('Falha ao preparar os dados em segundo plano')
+
+threading.Thread(target=preparar_em_segundo_plano, name='inicializacao', daemon=True).start()
+
+INICIALIZACAO['servidor_pronto_seg'] = time.perf_counter() - INICIO_PROCESSO
+logger.info('Servidor pronto %.3f s após o início do processo%s', INICIALIZACAO['servidor_pronto_seg'],
+            ' (dados carregando em segundo plano)' if conjunto is None else '')
+
+@server.route('/metrics')
+def exportar_metricas():
+    """Histogramas de tempo por etapa, linhas filtradas e bytes de resposta (formato Prometheus)"""
+    return Response(metricas.exportar(), content_type='text/plain; version=0.0.4; charset=utf-8')
 
 # =============================
 # EXECUTAR APP
@@ -0,0 +1,128 @@
+"""
+aquecimento.py
+Pré-cálculo dos resultados do dashboard depois que os dados são carregados.
+
+FrequenciaFiltros conta quantas vezes cada combinação de filtros foi pedida
+e guarda as contagens em um arquivo JSON, que sobrevive a reinícios. O
+aquecimento percorre todas as combinações, das mais pedidas para as menos,
+em um pool de threads, de modo que o primeiro clique de cada usuário já
+encontre o resultado no cache.
+"""
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from itertools import product
+
+logger = logging.getLogger(__name__)
+
+SEPARADOR = '|'
+
+
+def combinacoes_filtros(valores):
+    """Todas as combinações de filtros, com '' (Todos) para cada dimensão"""
+    return list(product(*([''] + list(v) for v in valores)))
+
+
+class FrequenciaFiltros:
+    """
+    Contagem de pedidos por combinação de filtros, persistida em JSON.
+    Cada processo soma ao arquivo só o que contou desde a última gravação;
+    gravações simultâneas de workers diferentes podem perder contagens, o
+    que só afeta a ordem do aquecimento.
+    """
+
+    def __init__(self, caminho=None, gravar_a_cada=100):
+        self.caminho = caminho
+        self.gravar_a_cada = gravar_a_cada
+        self._novas = Counter()
+        self._pendentes = 0
+        self._lock = threading.Lock()
+
+    def _ler(self):
+        if not self.caminho or not os.path.exists(self.caminho):
+            return Counter()
+        try:
+            with open(self.caminho, encoding='utf-8') as f:
+                return Counter(json.load(f))
+        except (OSError, ValueError):
+            logger.warning('Arquivo de frequência ilegível: %s', self.caminho)
+            return Counter()
+
+    def registrar(self, combinacao):
+        with self._lock:
+            self._novas[SEPARADOR.join(combinacao)] += 1
+            self._pendentes += 1
+            gravar = self.caminho and self._pendentes >= self.gravar_a_cada
+        if gravar:
+            self.gravar()
+
+    def gravar(self):
+        """Soma as contagens novas às do arquivo (gravação atômica)"""
+        with self._lock:
+            novas, self._novas, self._pendentes = self._novas, Counter(), 0
+        if not self.caminho or not novas:
+            return
+        contagens = self._ler() + novas
+        os.makedirs(os.path.dirname(self.caminho) or '.', exist_ok=True)
+        temporario = f'{self.caminho}.tmp-{os.getpid()}-{uuid.uuid4().hex[:8]}'
+        with open(temporario, 'w', encoding='utf-8') as f:
+            json.dump(dict(contagens), f, ensure_ascii=False)
+        os.replace(temporario, self.caminho)
+
+    def contagens(self):
+        with self._lock:
+            novas = Counter(self._novas)
+        return self._ler() + novas
+
+    def ordenar(self, combinacoes):
+        """Combinações da mais pedida para a menos; empates mantêm a ordem dada"""
+        contagens = self.contagens()
+        return sorted(combinacoes, key=lambda c: -contagens.get(SEPARADOR.join(c), 0))
+
+
+class Aquecimento(threading.Thread):
+    """
+    Thread que executa aquecer(combinacao) para cada combinação, na ordem,
+    em um pool de threads, e guarda o progresso para consulta.
+    """
+
+    def __init__(self, combinacoes, aquecer, threads=2):
+        super().__init__(name='aquecimento-cache', daemon=True)
+        self.combinacoes = combinacoes
+        self.aquecer = aquecer
+        self.threads = threads
+        self.concluidas = 0
+        self.falhas = 0
+        self.segundos = None
+        self._lock = threading.Lock()
+
+    def _executar(self, combinacao):
+        try:
+            self.aquecer(*combinacao)
+        except Exception:
+            logger.exception('Falha ao aquecer %s', combinacao)
+            with self._lock:
+                self.falhas += 1
+            return
+        with self._lock:
+            self.concluidas += 1
+
+    def run(self):
+        inicio = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.threads, thread_name_prefix='aquecimento') as pool:
+            list(pool.map(self._executar, self.combinacoes))
+        self.segundos = time.perf_counter() - inicio
+        logger.info('Aquecimento: %s combinações em %.3f s (%s falhas)', self.concluidas, self.segundos, self.falhas)
+
+    def estado(self):
+        return {
+            'combinacoes': len(self.combinacoes),
+            'concluidas': self.concluidas,
+            'falhas': self.falhas,
+            'segundos': self.segundos,
+        }
@@ -0,0 +1,328 @@
+/*
+ * cliente.js
+ * Callbacks do modo cliente (DASHBOARD_MODO_CLIENTE=1).
+ *
+ * O servidor envia o cubo uma vez para o dcc.Store 'cubo-cliente' (veja
+ * cliente.py); a cada troca de filtro estas funções selecionam as células,
+ * somam as medidas e devolvem os textos dos KPIs e as figuras com os traços
+ * novos, sem ida ao servidor. Os cálculos seguem os de app.py.
+ */
+(function () {
+    'use strict';
+
+    var TIPOS = {
+        f8: Float64Array, f4: Float32Array,
+        i1: Int8Array, u1: Uint8Array, i2: Int16Array, u2: Uint16Array,
+        i4: Int32Array, u4: Uint32Array
+    };
+
+    // Cubos já decodificados, por objeto recebido do Store
+    var decodificados = new WeakMap();
+
+    function decodificarArray(array) {
+        var texto = atob(array.bdata);
+        var bytes = new Uint8Array(texto.length);
+        for (var i = 0; i < texto.length; i++) {
+            bytes[i] = texto.charCodeAt(i);
+        }
+        return new TIPOS[array.dtype](bytes.buffer);
+    }
+
+    function decodificar(dados) {
+        if (!dados) {
+            throw window.dash_clientside.PreventUpdate;
+        }
+        var cubo = decodificados.get(dados);
+        if (cubo) {
+            return cubo;
+        }
+        cubo = {linhas: dados.linhas, dimensoes: {}, medidas: {}, parametros: dados.parametros};
+        Object.keys(dados.dimensoes).forEach(function (coluna) {
+            var dimensao = dados.dimensoes[coluna];
+            cubo.dimensoes[coluna] = {valores: dimensao.valores, codigos: decodificarArray(dimensao.codigos)};
+        });
+        Object.keys(dados.medidas).forEach(function (coluna) {
+            cubo.medidas[coluna] = decodificarArray(dados.medidas[coluna]);
+        });
+        decodificados.set(dados, cubo);
+        return cubo;
+    }
+
+    // Trecho [início, fim) das células com data no período (pontas inclusivas).
+    // O cubo é ordenado por data e os códigos seguem a ordem das datas, então
+    // o período é um trecho contíguo achado com duas buscas binárias
+    function trechoPeriodo(cubo, inicio, fim) {
+        var datas = cubo.dimensoes['Data'];
+        var primeiro = inicio ? primeiraPosicao(datas.valores, String(inicio).slice(0, 10), false) : 0;
+        var ultimo = fim ? primeiraPosicao(datas.valores, String(fim).slice(0, 10), true) : datas.valores.length;
+        return [
+            primeiraPosicao(datas.codigos, primeiro, false),
+            primeiraPosicao(datas.codigos, Math.max(primeiro, ultimo), false)
+        ];
+    }
+
+    // Posições das células que atendem aos filtros (vazio = Todos) e ao período
+    function selecionar(cubo, mes, regiao, produto, inicio, fim) {
+        var filtros = [];
+        var pedidos = [['Mês', mes], ['Região', regiao], ['Produto', produto]];
+        for (var f = 0; f < pedidos.length; f++) {
+            if (!pedidos[f][1]) {
+                continue;
+            }
+            var dimensao = cubo.dimensoes[pedidos[f][0]];
+            var codigo = dimensao.valores.indexOf(pedidos[f][1]);
+            if (codigo < 0) {
+                return [];
+            }
+            filtros.push([dimensao.codigos, codigo]);
+        }
+
+        var trecho = trechoPeriodo(cubo, inicio, fim);
+        var celulas = [];
+        for (var i = trecho[0]; i < trecho[1]; i++) {
+            var atende = true;
+            for (var j = 0; j < filtros.length && atende; j++) {
+                atende = filtros[j][0][i] === filtros[j][1];
+            }
+            if (atende) {
+                celulas.push(i);
+            }
+        }
+        return celulas;
+    }
+
+    function somar(medida, celulas) {
+        var total = 0;
+        for (var i = 0; i < celulas.length; i++) {
+            total += medida[celulas[i]];
+        }
+        return total;
+    }
+
+    // Soma da medida por valor da dimensão, só com os valores presentes, na ordem dos valores
+    function somarPor(cubo, celulas, coluna, nomeMedida) {
+        var dimensao = cubo.dimensoes[coluna];
+        var medida = cubo.medidas[nomeMedida];
+        var somas = new Float64Array(dimensao.valores.length);
+        var presentes = new Uint8Array(dimensao.valores.length);
+        for (var i = 0; i < celulas.length; i++) {
+            var codigo = dimensao.codigos[celulas[i]];
+            somas[codigo] += medida[celulas[i]];
+            presentes[codigo] = 1;
+        }
+        var grupos = [];
+        for (var c = 0; c < somas.length; c++) {
+            if (presentes[c]) {
+                grupos.push({valor: dimensao.valores[c], soma: somas[c]});
+            }
+        }
+        return grupos;
+    }
+
+    // Mesmo resultado de f'{x:,.{casas}f}'.replace(',', '.') em Python
+    function formatar(numero, casas) {
+        return numero.toLocaleString('en-US', {
+            minimumFractionDigits: casas,
+            maximumFractionDigits: casas,
+            useGrouping: true
+        }).replace(/,/g, '.');
+    }
+
+    // Arredondamento com empate para o par, como o round() do pandas
+    function arredondar(numero) {
+        var arredondado = Math.round(numero);
+        if (Math.abs(numero % 1) === 0.5) {
+            arredondado = 2 * Math.round(numero / 2);
+        }
+        return arredondado;
+    }
+
+    // Figura com o primeiro traço trocado (o layout e o uirevision continuam)
+    function trocarTraco(figura, traco) {
+        var dados = (figura.data || [{}]).slice();
+        dados[0] = Object.assign({}, dados[0], traco);
+        return Object.assign({}, figura, {data: dados});
+    }
+
+    // Porte de amostragem.lttb(): índices dos pontos escolhidos
+    function lttb(x, y, pontos) {
+        var n = x.length;
+        var indices = [];
+        if (pontos >= n) {
+            for (var k = 0; k < n; k++) {
+                indices.push(k);
+            }
+            return indices;
+        }
+        if (pontos < 3) {
+            return [0, n - 1].slice(0, Math.max(pontos, 0));
+        }
+
+        var limites = [];
+        var passo = (n - 2) / (pontos - 2);
+        for (var l = 0; l < pontos - 1; l++) {
+            limites.push(Math.trunc(l === pontos - 2 ? n - 1 : l * passo + 1));
+        }
+
+        indices.push(0);
+        var anterior = 0;
+        for (var i = 0; i < pontos - 2; i++) {
+            var inicio = limites[i], fim = limites[i + 1];
+            var proxInicio = limites[i + 1];
+            var proxFim = i + 2 < limites.length ? limites[i + 2] : n;
+            var mediaX = 0, mediaY = 0;
+            for (var p = proxInicio; p < proxFim; p++) {
+                mediaX += x[p];
+                mediaY += y[p];
+            }
+            mediaX /= proxFim - proxInicio;
+            mediaY /= proxFim - proxInicio;
+
+            var melhor = inicio, maiorArea = -1;
+            for (var j = inicio; j < fim; j++) {
+                var area = Math.abs(
+                    (x[anterior] - mediaX) * (y[j] - y[anterior]) -
+                    (x[anterior] - x[j]) * (mediaY - y[anterior])
+                );
+                if (area > maiorArea) {
+                    maiorArea = area;
+                    melhor = j;
+                }
+            }
+            anterior = melhor;
+            indices.push(anterior);
+        }
+        indices.push(n - 1);
+        return indices;
+    }
+
+    // Datas do eixo (ex.: '2024-02-01' ou '2024-02-01 12:00:00.0') em ms, sem fuso
+    function milissegundos(data) {
+        var texto = String(data).replace(' ', 'T');
+        return Date.parse(texto.length <= 10 ? texto : texto + 'Z');
+    }
+
+    // Mesmo critério de intervalo_zoom() em app.py
+    function intervaloZoom(relayout) {
+        if (!relayout) {
+            return null;
+        }
+        if ('xaxis.range[0]' in relayout && 'xaxis.range[1]' in relayout) {
+            return [relayout['xaxis.range[0]'], relayout['xaxis.range[1]']];
+        }
+        if ('xaxis.range' in relayout) {
+            return relayout['xaxis.range'];
+        }
+        return null;
+    }
+
+    function primeiraPosicao(lista, valor, direita) {
+        var baixo = 0, alto = lista.length;
+        while (baixo < alto) {
+            var meio = (baixo + alto) >> 1;
+            if (lista[meio] < valor || (direita && lista[meio] === valor)) {
+                baixo = meio + 1;
+            } else {
+                alto = meio;
+            }
+        }
+        return baixo;
+    }
+
+    window.dash_clientside = Object.assign({}, window.dash_clientside, {
+        dashboard: {
+            kpis: function (mes, regiao, produto, inicio, fim, dados) {
+                var cubo = decodificar(dados);
+                var celulas = selecionar(cubo, mes, regiao, produto, inicio, fim);
+                var vendas = somar(cubo.medidas['Valor'], celulas);
+                var quantidade = somar(cubo.medidas['Quantidade'], celulas);
+                var linhas = somar(cubo.medidas['Linhas'], celulas);
+                var completos = cubo.medidas['Status_Completo'] ? somar(cubo.medidas['Status_Completo'], celulas) : 0;
+                var ticket = quantidade > 0 ? vendas / quantidade : 0;
+                var conversao = linhas > 0 ? completos / linhas * 100 : 0;
+                return [
+                    'R$ ' + formatar(vendas, 2),
+                    formatar(quantidade, 0),
+                    'R$ ' + formatar(ticket, 2),
+                    conversao.toFixed(1) + '%'
+                ];
+            },
+
+            evolucao: function (mes, regiao, produto, inicio, fim, relayout, dados, figura) {
+                var cubo = decodificar(dados);
+                var intervalo = intervaloZoom(relayout);
+                var contexto = window.dash_clientside.callback_context;
+                var disparos = (contexto.triggered || []).map(function (t) { return t.prop_id; });
+                if (intervalo === null && relayout && !relayout['xaxis.autorange'] &&
+                        disparos.indexOf('grafico-evolucao.relayoutData') >= 0) {
+                    // Eventos de layout sem mudança no eixo x (ex.: zoom só no eixo y)
+                    return window.dash_clientside.no_update;
+                }
+
+                var serie = somarPor(cubo, selecionar(cubo, mes, regiao, produto, inicio, fim), 'Data', 'Valor');
+                var x = serie.map(function (g) { return milissegundos(g.valor); });
+                if (intervalo !== null) {
+                    var inicio = Math.max(primeiraPosicao(x, milissegundos(intervalo[0]), false) - 1, 0);
+                    var fim = primeiraPosicao(x, milissegundos(intervalo[1]), true) + 1;
+                    serie = serie.slice(inicio, fim);
+                    x = x.slice(inicio, fim);
+                }
+                var y = serie.map(function (g) { return g.soma; });
+                var escolhidos = lttb(x, y, cubo.parametros.pontos_evolucao);
+                return trocarTraco(figura, {
+                    x: escolhidos.map(function (i) { return serie[i].valor; }),
+                    y: escolhidos.map(function (i) { return y[i]; })
+                });
+            },
+
+            regioes: function (mes, regiao, produto, inicio, fim, dados, figura) {
+                var cubo = decodificar(dados);
+                var grupos = somarPor(cubo, selecionar(cubo, mes, regiao, produto, inicio, fim), 'Região', 'Valor');
+                grupos.sort(function (a, b) { return b.soma - a.soma; });
+                var marcador = Object.assign({}, figura.data[0].marker, {
+                    color: cubo.parametros.cores_regioes.slice(0, grupos.length)
+                });
+                return trocarTraco(figura, {
+                    x: grupos.map(function (g) { return g.valor; }),
+                    y: grupos.map(function (g) { return g.soma; }),
+                    marker: marcador
+                });
+            },
+
+            produtos: function (mes, regiao, produto, inicio, fim, dados, figura) {
+                var cubo = decodificar(dados);
+                var grupos = somarPor(cubo, selecionar(cubo, mes, regiao, produto, inicio, fim), 'Produto', 'Valor');
+                return trocarTraco(figura, {
+                    labels: grupos.map(function (g) { return g.valor; }),
+                    values: grupos.map(function (g) { return g.soma; })
+                });
+            },
+
+            performance: function (mes, regiao, produto, inicio, fim, dados, figura) {
+                var cubo = decodificar(dados);
+                var grupos = somarPor(cubo, selecionar(cubo, mes, regiao, produto, inicio, fim), 'Região', 'Quantidade');
+                grupos.sort(function (a, b) { return a.soma - b.soma; });
+                var maximo = grupos.reduce(function (m, g) { return Math.max(m, g.soma); }, -Infinity);
+                return trocarTraco(figura, {
+                    y: grupos.map(function (g) { return g.valor; }),
+                    x: grupos.map(function (g) { return arredondar(g.soma / maximo * 100); })
+                });
+            },
+
+            mensal: function (mes, regiao, produto, inicio, fim, dados, figura) {
+                var cubo = decodificar(dados);
+                var grupos = somarPor(cubo, selecionar(cubo, mes, regiao, produto, inicio, fim), 'Mês', 'Valor');
+                var ordem = cubo.parametros.meses;
+                var posicao = function (g) {
+                    var i = ordem.indexOf(g.valor);
+                    return i < 0 ? ordem.length : i;
+                };
+                grupos.sort(function (a, b) { return posicao(a) - posicao(b); });
+                return trocarTraco(figura, {
+                    x: grupos.map(function (g) { return g.valor; }),
+                    y: grupos.map(function (g) { return g.soma; })
+                });
+            }
+        }
+    });
+})();
@@ -0,0 +1,317 @@
+"""
+banco.py
+Backend SQL embutido: as vendas ficam em um arquivo SQLite (ou DuckDB,
+quando instalado) e filtros e agregações viram consultas parametrizadas.
+
+O banco é importado uma única vez, em blocos, então o dataset não precisa
+caber na memória. Cada consulta devolve só o resultado já agrupado (uma
+linha por data, região, produto ou mês), que o dashboard termina de
+preparar com as mesmas funções do backend em memória. As consultas rodam
+em um pool de conexões somente leitura, uma por thread ocupada.
+"""
+import hashlib
+import logging
+import os
+import queue
+import sqlite3
+import uuid
+from contextlib import contextmanager
+
+import pandas as pd
+
+from cache import calcular_versao, combinar_versoes
+from periodo import normalizar_periodo
+from tabela import COLUNAS_TABELA, ORDENACAO_PADRAO, formatar_registros, limitar_pagina
+
+try:
+    import duckdb
+except ImportError:
+    duckdb = None
+
+logger = logging.getLogger(__name__)
+
+# Coluna do dashboard -> coluna da tabela vendas
+COLUNAS_SQL = {
+    'Data': 'data',
+    'Mês': 'mes',
+    'Região': 'regiao',
+    'Produto': 'produto',
+    'Quantidade': 'quantidade',
+    'Valor': 'valor',
+    'Status': 'status',
+}
+TIPOS_SQL = {
+    'data': 'TEXT',
+    'mes': 'TEXT',
+    'regiao': 'TEXT',
+    'produto': 'TEXT',
+    'quantidade': 'BIGINT',
+    'valor': 'DOUBLE',
+    'status': 'TEXT',
+}
+INDICES_SQL = ['data', 'mes', 'regiao', 'produto']
+
+# Medidas que podem ser pedidas a agregar(); 'Status' vira uma contagem por status
+MEDIDAS_SQL = {
+    'Valor': 'COALESCE(SUM(valor), 0)',
+    'Quantidade': 'COALESCE(SUM(quantidade), 0)',
+    'Linhas': 'COUNT(*)',
+}
+
+EXTENSOES = {'sqlite': '.sqlite', 'duckdb': '.duckdb'}
+CONEXOES = 4
+
+
+def motor_disponivel(motor):
+    """Motor pedido, ou sqlite quando o DuckDB não está instalado"""
+    if motor == 'duckdb' and duckdb is None:
+        logger.warning('duckdb não está instalado; usando SQLite')
+        return 'sqlite'
+    return motor
+
+
+def _linhas_sql(bloco):
+    """Bloco de vendas no formato da tabela: datas ISO e textos no lugar de categorias"""
+    colunas = {}
+    for coluna, nome in COLUNAS_SQL.items():
+        serie = bloco[coluna]
+        if coluna == 'Data':
+            serie = serie.dt.strftime('%Y-%m-%d')
+        elif TIPOS_SQL[nome] == 'TEXT':
+            serie = serie.astype(object).where(serie.notna(), None)
+        colunas[nome] = serie.to_numpy(dtype=object)
+    return pd.DataFrame(colunas, copy=False)
+
+
+def importar_vendas(caminho, blocos, motor='sqlite'):
+    """
+    Grava os blocos de vendas (DataFrames no formato do dashboard) na tabela
+    vendas de um banco novo em `caminho`, cria os índices das colunas de
+    filtro e retorna a versão dos dados.
+    """
+    con = duckdb.connect(caminho) if motor == 'duckdb' else sqlite3.connect(caminho)
+    try:
+        definicao = ', '.join(f'{nome} {tipo}' for nome, tipo in TIPOS_SQL.items())
+        con.execute(f'CREATE TABLE vendas ({definicao})')
+        con.execute('CREATE TABLE metadados (nome TEXT PRIMARY KEY, valor TEXT)')
+
+        versao = calcular_versao(pd.DataFrame())
+        for bloco in blocos:
+            if not len(bloco):
+                continue
+            tabela = _linhas_sql(bloco)
+            if motor == 'duckdb':
+                con.register('bloco', tabela)
+                con.execute('INSERT INTO vendas SELECT * FROM bloco')
+                con.unregister('bloco')
+            else:
+                marcadores = ', '.join('?' * len(TIPOS_SQL))
+                con.executemany(f'INSERT INTO vendas VALUES ({marcadores})', zip(*(tabela[c] for c in tabela)))
+            versao = combinar_versoes(versao, calcular_versao(bloco))
+
+        for coluna in INDICES_SQL:
+            con.execute(f'CREATE INDEX idx_{coluna} ON vendas ({coluna})')
+        con.execute('INSERT INTO metadados VALUES (?, ?)', ('versao', versao))
+        con.commit()
+    finally:
+        con.close()
+    return versao
+
+
+def materializar_banco(diretorio, chave, gerar_blocos, motor='sqlite'):
+    """
+    Garante que exista em `diretorio` um banco com os dados identificados por
+    `chave` e retorna o caminho dele. Como materializar() do armazenamento
+    colunar: só o primeiro processo importa, o arquivo é gravado com nome
+    temporário e renomeado no final, e bancos de outras chaves são apagados.
+    gerar_blocos() retorna um iterável de DataFrames no formato do dashboard.
+    """
+    os.makedirs(diretorio, exist_ok=True)
+    nome = 'vendas-' + hashlib.sha1(chave.encode('utf-8')).hexdigest()[:16] + EXTENSOES[motor]
+    destino = os.path.join(diretorio, nome)
+    if os.path.exists(destino):
+        return destino
+
+    temporario = f'{destino}.tmp-{os.getpid()}-{uuid.uuid4().hex[:8]}'
+    try:
+        importar_vendas(temporario, gerar_blocos(), motor)
+        os.replace(temporario, destino)
+    finally:
+        if os.path.exists(temporario):
+            os.remove(temporario)
+
+    # Quem ainda tem um banco antigo aberto continua lendo o arquivo apagado
+    for outro in os.listdir(diretorio):
+        if outro.startswith('vendas-') and outro != nome and '.tmp-' not in outro:
+            os.remove(os.path.join(diretorio, outro))
+    return destino
+
+
+class PoolConexoes:
+    """Conexões somente leitura reaproveitadas entre as requisições"""
+
+    def __init__(self, caminho, motor='sqlite', tamanho=CONEXOES):
+        self.caminho = caminho
+        self.motor = motor
+        self._livres = queue.LifoQueue()
+        self._vagas = queue.Queue()
+        for _ in range(tamanho):
+            self._vagas.put(None)
+        # O DuckDB abre o arquivo uma vez por processo; cada cursor é uma conexão própria
+        self._base = duckdb.connect(caminho, read_only=True) if motor == 'duckdb' else None
+
+    def _abrir(self):
+        if self._base is not None:
+            return self._base.cursor()
+        con = sqlite3.connect(f'file:{self.caminho}?mode=ro', uri=True, check_same_thread=False)
+        con.execute('PRAGMA query_only = ON')
+        con.execute('PRAGMA mmap_size = 268435456')
+        return con
+
+    @contextmanager
+    def conexao(self):
+        """Empresta uma conexão livre; sem livres, abre uma nova até o limite ou espera"""
+        try:
+            con = self._livres.get_nowait()
+        except queue.Empty:
+            try:
+                self._vagas.get_nowait()
+                con = self._abrir()
+            except queue.Empty:
+                con = self._livres.get()
+        try:
+            yield con
+        finally:
+            self._livres.put(con)
+
+    @contextmanager
+    def conexao_dedicada(self):
+        """Conexão fora do pool, para leituras longas que não devem ocupar as vagas das consultas curtas"""
+        con = self._abrir()
+        try:
+            yield con
+        finally:
+            con.close()
+
+
+def _onde(filtros, periodo=(None, None)):
+    """
+    Cláusula WHERE e parâmetros de {coluna do dashboard: valor} (vazio = Todos)
+    e do periodo (inicio, fim), com as duas pontas inclusivas. As datas são
+    texto ISO, então o intervalo é uma comparação de texto que usa o índice.
+    """
+    condicoes, parametros = [], []
+    for coluna, valor in filtros.items():
+        if valor:
+            condicoes.append(f'{COLUNAS_SQL[coluna]} = ?')
+            parametros.append(valor)
+    inicio, fim = normalizar_periodo(*periodo)
+    if inicio:
+        condicoes.append('data >= ?')
+        parametros.append(inicio)
+    if fim:
+        condicoes.append('data <= ?')
+        parametros.append(fim)
+    return (' WHERE ' + ' AND '.join(condicoes) if condicoes else ''), parametros
+
+
+class BancoVendas:
+    """
+    Retrato do dataset guardado em um banco embutido. Tem a versão dos dados,
+    como ConjuntoVendas, mas responde com consultas em vez de fatias do cubo.
+    """
+
+    def __init__(self, caminho, motor='sqlite', conexoes=CONEXOES):
+        self.caminho = caminho
+        self.motor = motor
+        self.pool = PoolConexoes(caminho, motor, conexoes)
+        self.versao = self.consultar("SELECT valor FROM metadados WHERE nome = 'versao'")[0][0]
+        self.status = self.valores('Status')
+
+    def consultar(self, sql, parametros=()):
+        with self.pool.conexao() as con:
+            return con.execute(sql, list(parametros)).fetchall()
+
+    def valores(self, coluna):
+        """Valores distintos da coluna, em ordem"""
+        nome = COLUNAS_SQL[coluna]
+        return [v for (v,) in self.consultar(f'SELECT DISTINCT {nome} FROM vendas WHERE {nome} IS NOT NULL ORDER BY {nome}')]
+
+    def intervalo_datas(self):
+        """Primeira e última data dos dados ('AAAA-MM-DD'), ou (None, None) sem dados"""
+        return tuple(self.consultar('SELECT MIN(data), MAX(data) FROM vendas')[0])
+
+    def agregar(self, filtros, por=(), medidas=('Valor',), periodo=(None, None)):
+        """
+        Linhas que atendem aos filtros e ao periodo agrupadas pelas colunas
+        `por`, com as medidas pedidas (Valor, Quantidade, Linhas e
+        Status_<valor>), em um DataFrame com os nomes de coluna do dashboard.
+        """
+        selecao = [f'{COLUNAS_SQL[c]} AS "{c}"' for c in por]
+        parametros = []
+        for medida in medidas:
+            if medida == 'Status':
+                for status in self.status:
+                    selecao.append(f'SUM(CASE WHEN status = ? THEN 1 ELSE 0 END) AS "Status_{status}"')
+                    parametros.append(status)
+            else:
+                selecao.append(f'{MEDIDAS_SQL[medida]} AS "{medida}"')
+
+        onde, parametros_onde = _onde(filtros, periodo)
+        sql = f'SELECT {", ".join(selecao)} FROM vendas{onde}'
+        if por:
+            grupos = ', '.join(COLUNAS_SQL[c] for c in por)
+            sql += f' GROUP BY {grupos} ORDER BY {grupos}'
+
+        with self.pool.conexao() as con:
+            cursor = con.execute(sql, parametros + parametros_onde)
+            colunas = [d[0] for d in cursor.description]
+            resultado = pd.DataFrame(cursor.fetchall(), columns=colunas)
+        if 'Data' in resultado:
+            resultado['Data'] = pd.to_datetime(resultado['Data'], format='%Y-%m-%d')
+        return resultado
+
+    def pagina_detalhes(self, filtros, pagina, tamanho, ordenacao=None, periodo=(None, None)):
+        """
+        Retorna (registros, total de páginas, total de linhas) de uma página da
+        tabela, na mesma ordem de tabela.pagina_detalhes(): nulos no fim e
+        empates pela posição original da linha.
+        """
+        ordenacao = ordenacao or ORDENACAO_PADRAO
+        coluna = COLUNAS_SQL[COLUNAS_TABELA.get(ordenacao[0]['column_id'], 'Valor')]
+        direcao = 'DESC' if ordenacao[0].get('direction') == 'desc' else 'ASC'
+        onde, parametros = _onde(filtros, periodo)
+
+        total = self.consultar(f'SELECT COUNT(*) FROM vendas{onde}', parametros)[0][0]
+        pagina, paginas = limitar_pagina(total, pagina, tamanho)
+
+        colunas = ', '.join(f'{nome} AS "{c}"' for c, nome in COLUNAS_SQL.items())
+        with self.pool.conexao() as con:
+            cursor = con.execute(
+                f'SELECT {colunas} FROM vendas{onde}'
+                f' ORDER BY {coluna} IS NULL, {coluna} {direcao}, rowid LIMIT ? OFFSET ?',
+                parametros + [tamanho, pagina * tamanho],
+            )
+            trecho = pd.DataFrame(cursor.fetchall(), columns=[d[0] for d in cursor.description])
+        trecho['Data'] = pd.to_datetime(trecho['Data'], format='%Y-%m-%d')
+        return formatar_registros(trecho), paginas, total
+
+    def iterar_linhas(self, filtros, tamanho, colunas, periodo=(None, None)):
+        """
+        Linhas que atendem aos filtros e ao período, na ordem em que o banco
+        as lê, em DataFrames de até `tamanho` linhas com as colunas pedidas.
+        O cursor fica em uma conexão própria enquanto o gerador é consumido.
+        """
+        onde, parametros = _onde(filtros, periodo)
+        selecao = ', '.join(f'{COLUNAS_SQL[c]} AS "{c}"' for c in colunas)
+        with self.pool.conexao_dedicada() as con:
+            cursor = con.execute(f'SELECT {selecao} FROM vendas{onde}', parametros)
+            nomes = [d[0] for d in cursor.description]
+            while True:
+                linhas = cursor.fetchmany(tamanho)
+                if not linhas:
+                    break
+                bloco = pd.DataFrame(linhas, columns=nomes)
+                if 'Data' in bloco:
+                    bloco['Data'] = pd.to_datetime(bloco['Data'], format='%Y-%m-%d')
+                yield bloco
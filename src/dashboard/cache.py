@@ -0,0 +1,267 @@
+"""
+cache.py
+Cache de resultados dos callbacks com limite de memória e descarte LRU.
+
+Duas implementações com a mesma interface:
+- CacheMemoria: dicionário ordenado dentro do processo;
+- CacheDisco: arquivo SQLite local, compartilhado entre os workers do gunicorn.
+
+As chaves incluem a versão dos dados, então um dataset novo nunca reaproveita
+resultados antigos; as entradas de outras versões são descartadas com
+descartar_outras_versoes().
+"""
+import atexit
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+import pandas as pd
+
+
+def calcular_versao(df):
+    """Retorna um identificador curto que muda sempre que o conteúdo do DataFrame muda"""
+    hashes = pd.util.hash_pandas_object(df, index=False).to_numpy()
+    return f'{len(df):x}-{int(hashes.sum(dtype="uint64")):016x}'
+
+
+def combinar_versoes(versao, versao_delta):
+    """
+    Versão de um dataset ao qual foram acrescentadas linhas com versao_delta.
+    Como a versão é a contagem mais a soma dos hashes das linhas, o resultado
+    é igual a calcular_versao() das linhas concatenadas, qualquer que seja a
+    divisão em blocos.
+    """
+    linhas, soma = (int(parte, 16) for parte in versao.split('-'))
+    linhas_delta, soma_delta = (int(parte, 16) for parte in versao_delta.split('-'))
+    return f'{linhas + linhas_delta:x}-{(soma + soma_delta) % 2 ** 64:016x}'
+
+
+def _serializar_chave(chave):
+    return repr(chave)
+
+
+class CacheMemoria:
+    """Cache LRU em memória, limitado pelo tamanho serializado dos valores"""
+
+    def __init__(self, limite_bytes):
+        self.limite_bytes = limite_bytes
+        self._itens = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def obter(self, chave, versao):
+        """Retorna (encontrado, valor)"""
+        k = (_serializar_chave(chave), versao)
+        with self._lock:
+            dado = self._itens.get(k)
+            if dado is None:
+                self.misses += 1
+                return False, None
+            self._itens.move_to_end(k)
+            self.hits += 1
+        return True, pickle.loads(dado)
+
+    def contem(self, chave, versao):
+        """Se há resultado guardado, sem contar hit/miss nem renovar a entrada"""
+        with self._lock:
+            return (_serializar_chave(chave), versao) in self._itens
+
+    def guardar(self, chave, versao, valor):
+        dado = pickle.dumps(valor, protocol=pickle.HIGHEST_PROTOCOL)
+        if len(dado) > self.limite_bytes:
+            return
+        k = (_serializar_chave(chave), versao)
+        with self._lock:
+            antigo = self._itens.pop(k, None)
+            if antigo is not None:
+                self._bytes -= len(antigo)
+            self._itens[k] = dado
+            self._bytes += len(dado)
+            while self._bytes > self.limite_bytes:
+                _, removido = self._itens.popitem(last=False)
+                self._bytes -= len(removido)
+
+    def descartar_outras_versoes(self, versao):
+        with self._lock:
+            for k in [k for k in self._itens if k[1] != versao]:
+                self._bytes -= len(self._itens.pop(k))
+
+    def estatisticas(self):
+        with self._lock:
+            return {
+                'backend': 'memoria',
+                'hits': self.hits,
+                'misses': self.misses,
+                'itens': len(self._itens),
+                'bytes': self._bytes,
+                'limite_bytes': self.limite_bytes,
+            }
+
+
+class CacheDisco:
+    """
+    Cache LRU em um arquivo SQLite local.
+    Todos os processos que apontam para o mesmo arquivo compartilham os
+    resultados e os contadores de hit/miss.
+
+    Um hit não precisa de transação de escrita: cada processo soma hits e
+    misses em memória e grava os contadores a cada INTERVALO_CONTADORES
+    segundos, e o horário de acesso de uma entrada só é regravado quando
+    está mais velho que RESOLUCAO_ACESSO segundos. O descarte só roda quando
+    o total guardado passa do limite e então libera espaço até
+    FRACAO_APOS_DESCARTE do limite, para não rodar a cada gravação.
+    """
+
+    INTERVALO_CONTADORES = 5.0
+    RESOLUCAO_ACESSO = 30.0
+    FRACAO_APOS_DESCARTE = 0.9
+
+    def __init__(self, caminho, limite_bytes):
+        self.caminho = caminho
+        self.limite_bytes = limite_bytes
+        self._local = threading.local()
+        self._pendentes = {'hits': 0, 'misses': 0}
+        self._ultima_gravacao = time.monotonic()
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(caminho) or '.', exist_ok=True)
+        with self._conexao() as con:
+            con.execute(
+                'CREATE TABLE IF NOT EXISTS resultados ('
+                ' chave TEXT PRIMARY KEY, versao TEXT, valor BLOB,'
+                ' tamanho INTEGER, acesso REAL)'
+            )
+            con.execute('CREATE INDEX IF NOT EXISTS idx_acesso ON resultados (acesso)')
+            con.execute(
+                'CREATE TABLE IF NOT EXISTS contadores (nome TEXT PRIMARY KEY, valor INTEGER)'
+            )
+            con.execute(
+                "INSERT OR IGNORE INTO contadores VALUES ('hits', 0), ('misses', 0)"
+            )
+            # Total de bytes guardados, mantido a cada gravação para não somar a tabela
+            con.execute(
+                "INSERT OR IGNORE INTO contadores"
+                " SELECT 'bytes', COALESCE(SUM(tamanho), 0) FROM resultados"
+            )
+        # Contadores ainda não gravados não se perdem quando o worker termina
+        atexit.register(self.gravar_contadores)
+
+    def _conexao(self):
+        # sqlite3 não permite compartilhar conexões entre threads
+        con = getattr(self._local, 'con', None)
+        if con is None:
+            con = sqlite3.connect(self.caminho, timeout=30)
+            con.execute('PRAGMA journal_mode=WAL')
+            con.execute('PRAGMA synchronous=NORMAL')
+            self._local.con = con
+        return con
+
+    def _contar(self, nome):
+        with self._lock:
+            self._pendentes[nome] += 1
+            gravar = time.monotonic() - self._ultima_gravacao >= self.INTERVALO_CONTADORES
+        if gravar:
+            self.gravar_contadores()
+
+    def gravar_contadores(self):
+        """Soma nos contadores compartilhados os hits e misses deste processo"""
+        with self._lock:
+            pendentes = [(valor, nome) for nome, valor in self._pendentes.items() if valor]
+            self._pendentes = dict.fromkeys(self._pendentes, 0)
+            self._ultima_gravacao = time.monotonic()
+        if pendentes:
+            with self._conexao() as con:
+                con.executemany('UPDATE contadores SET valor = valor + ? WHERE nome = ?', pendentes)
+
+    def obter(self, chave, versao):
+        """Retorna (encontrado, valor)"""
+        k = f'{versao}|{_serializar_chave(chave)}'
+        con = self._conexao()
+        linha = con.execute(
+            'SELECT valor, acesso FROM resultados WHERE chave = ?', (k,)
+        ).fetchone()
+        if linha is None:
+            self._contar('misses')
+            return False, None
+        agora = time.time()
+        if agora - linha[1] >= self.RESOLUCAO_ACESSO:
+            with con:
+                con.execute('UPDATE resultados SET acesso = ? WHERE chave = ?', (agora, k))
+        self._contar('hits')
+        return True, pickle.loads(linha[0])
+
+    def contem(self, chave, versao):
+        """Se há resultado guardado, sem contar hit/miss nem renovar a entrada"""
+        k = f'{versao}|{_serializar_chave(chave)}'
+        return self._conexao().execute('SELECT 1 FROM resultados WHERE chave = ?', (k,)).fetchone() is not None
+
+    def guardar(self, chave, versao, valor):
+        dado = pickle.dumps(valor, protocol=pickle.HIGHEST_PROTOCOL)
+        if len(dado) > self.limite_bytes:
+            return
+        k = f'{versao}|{_serializar_chave(chave)}'
+        with self._conexao() as con:
+            # Trava de escrita desde a leitura do tamanho antigo: duas gravações da
+            # mesma chave não podem somar as duas o tamanho novo ao total
+            con.execute('BEGIN IMMEDIATE')
+            antigo = con.execute('SELECT tamanho FROM resultados WHERE chave = ?', (k,)).fetchone()
+            con.execute(
+                'INSERT OR REPLACE INTO resultados VALUES (?, ?, ?, ?, ?)',
+                (k, versao, dado, len(dado), time.time()),
+            )
+            total, = con.execute(
+                "UPDATE contadores SET valor = valor + ? WHERE nome = 'bytes' RETURNING valor",
+                (len(dado) - (antigo[0] if antigo else 0),),
+            ).fetchone()
+            if total <= self.limite_bytes:
+                return
+            # Remove as entradas menos recentes até sobrar FRACAO_APOS_DESCARTE do limite
+            con.execute(
+                'DELETE FROM resultados WHERE chave IN ('
+                ' SELECT chave FROM ('
+                '  SELECT chave, SUM(tamanho) OVER (ORDER BY acesso DESC) AS acumulado'
+                '  FROM resultados)'
+                ' WHERE acumulado > ?)',
+                (int(self.limite_bytes * self.FRACAO_APOS_DESCARTE),),
+            )
+            self._recontar_bytes(con)
+
+    def _recontar_bytes(self, con):
+        con.execute(
+            "UPDATE contadores SET valor = (SELECT COALESCE(SUM(tamanho), 0) FROM resultados)"
+            " WHERE nome = 'bytes'"
+        )
+
+    def descartar_outras_versoes(self, versao):
+        with self._conexao() as con:
+            con.execute('DELETE FROM resultados WHERE versao != ?', (versao,))
+            self._recontar_bytes(con)
+
+    def estatisticas(self):
+        self.gravar_contadores()
+        con = self._conexao()
+        contadores = dict(con.execute('SELECT nome, valor FROM contadores'))
+        itens, total = con.execute(
+            'SELECT COUNT(*), COALESCE(SUM(tamanho), 0) FROM resultados'
+        ).fetchone()
+        return {
+            'backend': 'disco',
+            'caminho': self.caminho,
+            'hits': contadores.get('hits', 0),
+            'misses': contadores.get('misses', 0),
+            'itens': itens,
+            'bytes': total,
+            'limite_bytes': self.limite_bytes,
+        }
+
+
+def criar_cache(limite_bytes, diretorio=None):
+    """Cria o cache em disco quando um diretório é informado, senão em memória"""
+    if diretorio:
+        return CacheDisco(os.path.join(diretorio, 'resultados.sqlite'), limite_bytes)
+    return CacheMemoria(limite_bytes)
@@ -0,0 +1,66 @@
+"""
+cliente.py
+Cubo codificado para o modo cliente, em que o navegador filtra e agrega.
+
+O cubo vai uma única vez (por versão dos dados) para um dcc.Store em
+formato colunar: cada dimensão é um dicionário de valores ordenados mais um
+array de códigos inteiros, e cada medida é um array numérico. Os arrays
+seguem o formato de arrays tipados do Plotly ({'dtype': 'f8', 'bdata':
+base64}) e são decodificados no navegador direto para Float64Array,
+Uint8Array etc., sem passar por listas JSON. assets/cliente.js faz o resto.
+"""
+import base64
+
+import numpy as np
+import pandas as pd
+
+from cubo import DIMENSOES
+
+
+def codificar_array(array):
+    """Array numérico no formato {'dtype', 'bdata'} (little-endian, base64)"""
+    array = np.ascontiguousarray(array)
+    array = array.astype(array.dtype.newbyteorder('<'), copy=False)
+    return {'dtype': array.dtype.str[1:], 'bdata': base64.b64encode(array.tobytes()).decode('ascii')}
+
+
+def _tipo_codigos(quantidade):
+    for tipo in (np.uint8, np.uint16, np.uint32):
+        if quantidade <= np.iinfo(tipo).max:
+            return tipo
+    return np.int64
+
+
+def _tipo_medida(serie):
+    """int32 para contagens e somas inteiras que cabem nele; float64 para o resto"""
+    valores = serie.to_numpy()
+    if valores.dtype.kind in 'iu' and (not len(valores) or np.abs(valores).max() < np.iinfo(np.int32).max):
+        return valores.astype(np.int32)
+    return valores.astype(np.float64)
+
+
+def codificar_cubo(cubo, versao, parametros=None):
+    """
+    Cubo (uma linha por célula Data x Mês x Região x Produto) no formato do
+    dcc.Store do modo cliente. parametros vai junto, sem alteração, para
+    os callbacks do navegador (cores, ordem dos meses, limite de pontos).
+    """
+    dimensoes = {}
+    for coluna in DIMENSOES:
+        codigos, valores = pd.factorize(cubo[coluna], sort=True)
+        valores = pd.Index(valores)
+        rotulos = valores.strftime('%Y-%m-%d') if isinstance(valores, pd.DatetimeIndex) else valores.astype(str)
+        dimensoes[coluna] = {
+            'valores': rotulos.tolist(),
+            'codigos': codificar_array(codigos.astype(_tipo_codigos(len(valores)))),
+        }
+
+    medidas = {c: codificar_array(_tipo_medida(cubo[c])) for c in cubo.columns if c not in DIMENSOES}
+
+    return {
+        'versao': versao,
+        'linhas': len(cubo),
+        'dimensoes': dimensoes,
+        'medidas': medidas,
+        'parametros': parametros or {},
+    }
@@ -0,0 +1,277 @@
+"""
+conjunto.py
+Retrato do dataset usado pelo dashboard e a atualização incremental dele.
+
+Um ConjuntoVendas reúne as linhas, o cubo, os índices e a versão dos dados.
+Ele nunca é alterado: atualizações produzem um novo retrato, publicado com
+uma única atribuição. Cada callback pega o retrato atual uma vez e trabalha
+sobre ele sem travas. As linhas acrescentadas ficam em segmentos separados
+do bloco base, que continua sendo o mesmo (e mapeado do disco, quando for o
+caso) em todos os retratos.
+"""
+import logging
+import threading
+from functools import cached_property
+
+import numpy as np
+import pandas as pd
+
+from cache import calcular_versao, combinar_versoes
+from cubo import FILTROS, MEDIDAS_KPIS, construir_cubo, somar_cubos
+from indice import IndiceDimensoes
+from periodo import IndiceDatas, SomasPorPeriodo, limites_periodo
+
+logger = logging.getLogger(__name__)
+
+
+def _alinhar_categorias(df, df_novo):
+    """
+    Deixa df_novo com as colunas de df e, nas categóricas, as categorias de
+    df mais as novas (df não é alterado)
+    """
+    df_novo = df_novo[df.columns]
+    for coluna in df.columns:
+        if not isinstance(df[coluna].dtype, pd.CategoricalDtype):
+            continue
+        categorias = df[coluna].cat.categories
+        novas = pd.Index(df_novo[coluna].dropna().unique()).difference(categorias)
+        tipo = pd.CategoricalDtype(categorias.append(novas)) if len(novas) else df[coluna].dtype
+        df_novo = df_novo.assign(**{coluna: df_novo[coluna].astype(tipo)})
+    return df_novo
+
+
+def _concatenar(partes):
+    """
+    Junta DataFrames (ou Series) de segmentos diferentes. Colunas categóricas
+    com categorias diferentes passam a usar a união delas, em vez de virar
+    texto no pd.concat.
+    """
+    if len(partes) == 1:
+        return partes[0]
+    quadros = [p.to_frame() if isinstance(p, pd.Series) else p for p in partes]
+    for coluna in quadros[0].columns:
+        tipos = [q[coluna].dtype for q in quadros]
+        if all(isinstance(t, pd.CategoricalDtype) for t in tipos) and any(t != tipos[0] for t in tipos):
+            categorias = tipos[0].categories
+            for t in tipos[1:]:
+                categorias = categorias.union(t.categories, sort=False)
+            quadros = [q.assign(**{coluna: q[coluna].cat.set_categories(categorias)}) for q in quadros]
+    junto = pd.concat(quadros, ignore_index=True)
+    return junto.iloc[:, 0] if isinstance(partes[0], pd.Series) else junto
+
+
+class SegmentoVendas:
+    """Bloco de linhas com o próprio índice; os ids do índice são locais ao bloco"""
+
+    def __init__(self, df, indice):
+        self.df = df
+        self.indice = indice
+
+    @classmethod
+    def construir(cls, df):
+        return cls(df, IndiceDimensoes(df, FILTROS.values()))
+
+    # Índice de datas: montado no primeiro filtro por período
+    @cached_property
+    def periodo(self):
+        return IndiceDatas(self.df['Data'])
+
+    def filtrar(self, filtros, limites=(None, None)):
+        """Ids locais das linhas que atendem aos filtros e ao intervalo (ns); None = todas"""
+        ids = self.indice.filtrar(filtros)
+        if any(limite is not None for limite in limites):
+            ids = self.periodo.restringir(ids, *limites)
+        return ids
+
+
+class LinhasVendas:
+    """
+    Linhas de um retrato, guardadas em segmentos: o bloco base (em geral
+    mapeado do disco e compartilhado entre os workers) e os blocos
+    acrescentados pelas atualizações incrementais. Acrescentar linhas cria
+    um segmento novo sem copiar o bloco base nem o índice dele. Os ids
+    recebidos e retornados são globais: a posição da linha no conjunto.
+    """
+
+    def __init__(self, segmentos):
+        self.segmentos = tuple(segmentos)
+        self.inicios = np.cumsum([0] + [len(s.df) for s in self.segmentos])
+
+    def __len__(self):
+        return int(self.inicios[-1])
+
+    def valores(self, coluna):
+        """Valores distintos de uma coluna de filtro, em ordem"""
+        if len(self.segmentos) == 1:
+            return self.segmentos[0].indice.valores(coluna)
+        return sorted(set().union(*(s.indice.valores(coluna) for s in self.segmentos)))
+
+    def filtrar(self, filtros, periodo=(None, None)):
+        """
+        Ids globais ordenados das linhas que atendem aos filtros e ao
+        período; None quando nenhum filtro nem período está ativo
+        """
+        limites = limites_periodo(*periodo)
+        partes = [s.filtrar(filtros, limites) for s in self.segmentos]
+        if all(ids is None for ids in partes):
+            return None
+        if len(partes) == 1:
+            return partes[0]
+        return np.concatenate([
+            (np.arange(len(s.df)) if ids is None else ids).astype(np.int64) + inicio
+            for s, ids, inicio in zip(self.segmentos, partes, self.inicios)
+        ])
+
+    def _por_segmento(self, ids):
+        """(segmento, ids locais ou None = todas) para ids globais ordenados"""
+        if ids is None:
+            return [(s, None) for s in self.segmentos]
+        cortes = np.searchsorted(ids, self.inicios)
+        return [
+            (s, ids[a:b] - inicio)
+            for s, inicio, a, b in zip(self.segmentos, self.inicios, cortes[:-1], cortes[1:])
+            if b > a
+        ] or [(self.segmentos[0], ids[:0])]
+
+    def coluna(self, nome, ids=None):
+        """Valores da coluna nas linhas de ids (ordenados; None = todas), nessa ordem"""
+        return _concatenar([
+            s.df[nome] if locais is None else s.df[nome].take(locais)
+            for s, locais in self._por_segmento(ids)
+        ])
+
+    def take(self, ids):
+        """DataFrame com as linhas de ids, em qualquer ordem"""
+        ids = np.asarray(ids)
+        numero = np.searchsorted(self.inicios, ids, side='right') - 1
+        ordem = np.argsort(numero, kind='stable')
+        ids, numero = ids[ordem], numero[ordem]
+        cortes = np.searchsorted(numero, np.arange(len(self.segmentos) + 1))
+        partes = [
+            s.df.take(ids[a:b] - inicio)
+            for s, inicio, a, b in zip(self.segmentos, self.inicios, cortes[:-1], cortes[1:])
+            if b > a
+        ] or [self.segmentos[0].df.iloc[:0]]
+        return _concatenar(partes).take(np.argsort(ordem))
+
+    def iterar(self, ids, tamanho, colunas):
+        """Linhas de ids (ordenados; None = todas) em DataFrames de até `tamanho` linhas"""
+        for s, locais in self._por_segmento(ids):
+            total = len(s.df) if locais is None else len(locais)
+            for inicio in range(0, total, tamanho):
+                if locais is None:
+                    yield s.df.iloc[inicio:inicio + tamanho][colunas]
+                else:
+                    yield s.df.take(locais[inicio:inicio + tamanho])[colunas]
+
+    def com_linhas(self, df_novo):
+        """
+        Novas linhas com df_novo acrescentado em um segmento próprio. Para o
+        número de segmentos não crescer sem limite, o último acréscimo é
+        juntado ao anterior enquanto o anterior não for maior que ele; o
+        bloco base nunca é copiado.
+        """
+        base = self.segmentos[0].df
+        novo = _alinhar_categorias(base, df_novo.reset_index(drop=True))
+        acrescimos = list(self.segmentos[1:])
+        while acrescimos and len(acrescimos[-1].df) <= len(novo):
+            novo = _concatenar([acrescimos.pop().df, novo])
+        return LinhasVendas([self.segmentos[0], *acrescimos, SegmentoVendas.construir(novo)])
+
+
+class ConjuntoVendas:
+    """Linhas, cubo, índices e versão de uma mesma revisão dos dados"""
+
+    def __init__(self, linhas, cubo, versao):
+        self.linhas = linhas
+        self.cubo = cubo
+        self.indice_cubo = IndiceDimensoes(cubo, FILTROS.values())
+        self.versao = versao
+
+    def valores(self, coluna):
+        """Valores distintos de uma coluna de filtro, em ordem"""
+        return self.linhas.valores(coluna)
+
+    # Índice de datas e somas acumuladas do cubo: montados no primeiro filtro por período
+    @cached_property
+    def periodo_cubo(self):
+        return IndiceDatas(self.cubo['Data'])
+
+    @cached_property
+    def somas_periodo(self):
+        return SomasPorPeriodo(self.cubo, self.indice_cubo, MEDIDAS_KPIS)
+
+    def iterar_linhas(self, filtros, tamanho, colunas, periodo=(None, None)):
+        """
+        Linhas que atendem aos filtros e ao período, na ordem original, em
+        DataFrames de até `tamanho` linhas com as colunas pedidas
+        """
+        return self.linhas.iterar(self.linhas.filtrar(filtros, periodo), tamanho, colunas)
+
+    def intervalo_datas(self):
+        """Primeira e última data dos dados ('AAAA-MM-DD'), ou (None, None) sem dados"""
+        datas = self.cubo['Data']
+        if not len(datas):
+            return None, None
+        return datas.min().strftime('%Y-%m-%d'), datas.max().strftime('%Y-%m-%d')
+
+    @classmethod
+    def construir(cls, df):
+        """Calcula cubo, índice e versão a partir das linhas"""
+        return cls(LinhasVendas([SegmentoVendas.construir(df)]), construir_cubo(df), calcular_versao(df))
+
+    @classmethod
+    def abrir(cls, df, cubo, indice_linhas, versao):
+        """Retrato sobre linhas, cubo e índice já prontos (por exemplo, mapeados do disco)"""
+        return cls(LinhasVendas([SegmentoVendas(df, indice_linhas)]), cubo, versao)
+
+    def com_linhas(self, df_novo):
+        """
+        Retorna um novo retrato com as linhas de df_novo acrescentadas.
+        O cubo é atualizado só com o delta e as linhas novas ganham um
+        segmento com índice próprio, sem copiar nem reindexar as antigas.
+        """
+        linhas = self.linhas.com_linhas(df_novo)
+        return ConjuntoVendas(
+            linhas,
+            somar_cubos(self.cubo, construir_cubo(linhas.segmentos[-1].df.tail(len(df_novo)))),
+            combinar_versoes(self.versao, calcular_versao(df_novo)),
+        )
+
+
+class AtualizadorIncremental(threading.Thread):
+    """
+    Thread que consulta um LeitorIncremental periodicamente e publica novos
+    retratos: com_linhas() para acréscimos e construir() quando o arquivo
+    precisou ser relido por inteiro.
+    """
+
+    def __init__(self, leitor, obter, publicar, preparar, intervalo):
+        super().__init__(name='atualizador-incremental', daemon=True)
+        self.leitor = leitor
+        self.obter = obter
+        self.publicar = publicar
+        self.preparar = preparar
+        self.intervalo = intervalo
+        self._parar = threading.Event()
+
+    def parar(self):
+        self._parar.set()
+
+    def verificar(self):
+        """Executa uma verificação; retorna o tipo de mudança aplicada ou None"""
+        tipo, df_lido = self.leitor.verificar()
+        if tipo == 'delta' and len(df_lido):
+            self.publicar(self.obter().com_linhas(self.preparar(df_lido)))
+            logger.info('Atualização incremental: %s linhas novas', len(df_lido))
+        elif tipo == 'completo':
+            self.publicar(ConjuntoVendas.construir(self.preparar(df_lido)))
+            logger.info('Arquivo reescrito; dataset recarregado com %s linhas', len(df_lido))
+        return tipo
+
+    def run(self):
+        while not self._parar.wait(self.intervalo):
+            try:
+                self.verificar()
+            except Exception:
+                logger.exception('Falha na atualização incremental de %s', self.leitor.caminho)
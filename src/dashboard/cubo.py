@@ -0,0 +1,140 @@
+"""
+cubo.py
+Cubo pré-agregado de vendas usado pelos callbacks do dashboard.
+
+O cubo guarda somas e contagens por célula (Data, Mês, Região, Produto).
+Qualquer combinação de filtros, inclusive os curingas "Todos", é respondida
+fatiando e reagregando as células, sem voltar às linhas originais.
+"""
+import numpy as np
+import pandas as pd
+
+from periodo import limites_periodo
+
+DIMENSOES = ['Data', 'Mês', 'Região', 'Produto']
+MEDIDAS = ['Valor', 'Quantidade']
+
+# Filtros do dashboard -> coluna do cubo
+FILTROS = {
+    'mes': 'Mês',
+    'regiao': 'Região',
+    'produto': 'Produto',
+}
+
+
+def construir_cubo(df):
+    """
+    Agrega o DataFrame de vendas por (Data, Mês, Região, Produto).
+    Retorna um DataFrame com uma linha por célula contendo as somas de Valor
+    e Quantidade, o número de linhas e uma coluna Status_<valor> por status.
+    """
+    grupos = df.groupby(DIMENSOES, observed=True, sort=True)
+
+    cubo = grupos[MEDIDAS].sum()
+    cubo['Linhas'] = grupos.size()
+
+    status = (
+        df.groupby(DIMENSOES + ['Status'], observed=True, sort=False)
+        .size()
+        .unstack('Status', fill_value=0)
+        .reindex(cubo.index, fill_value=0)
+    )
+    for valor in status.columns:
+        cubo[f'Status_{valor}'] = status[valor].to_numpy()
+
+    return cubo.reset_index()
+
+
+def somar_cubos(cubo, outro):
+    """
+    Soma célula a célula dois cubos (por exemplo, o atual e o das linhas novas).
+    Células presentes em apenas um deles são mantidas; as dimensões
+    categóricas passam a usar a união das categorias.
+    """
+    partes = [cubo.copy(deep=False), outro.copy(deep=False)]
+    for coluna in DIMENSOES:
+        if all(isinstance(p[coluna].dtype, pd.CategoricalDtype) for p in partes):
+            categorias = partes[0][coluna].cat.categories.union(partes[1][coluna].cat.categories, sort=False)
+            for p in partes:
+                p[coluna] = p[coluna].cat.set_categories(categorias)
+
+    somado = (
+        pd.concat(partes, ignore_index=True)
+        .fillna({c: 0 for c in partes[0].columns.union(partes[1].columns) if c.startswith('Status_')})
+        .groupby(DIMENSOES, observed=True, sort=True)
+        .sum()
+    )
+    for coluna in ['Linhas'] + [c for c in somado.columns if c.startswith('Status_')]:
+        somado[coluna] = somado[coluna].astype('int64')
+    return somado.reset_index()
+
+
+def filtros_por_coluna(mes=None, regiao=None, produto=None):
+    """Converte os valores dos dropdowns em {coluna: valor}"""
+    valores = {'mes': mes, 'regiao': regiao, 'produto': produto}
+    return {coluna: valores[filtro] for filtro, coluna in FILTROS.items()}
+
+
+def fatiar_cubo(cubo, mes=None, regiao=None, produto=None, indice=None, periodo=(None, None), indice_datas=None):
+    """
+    Retorna as células do cubo que atendem aos filtros (vazio = Todos) e
+    cuja data está no periodo (inicio, fim), com as duas pontas inclusivas.
+    Com um IndiceDimensoes e um IndiceDatas construídos sobre o cubo, a
+    seleção é feita por interseção de ids e busca binária nas datas em vez
+    de comparar cada célula.
+    """
+    filtros = filtros_por_coluna(mes, regiao, produto)
+    inicio, fim = limites_periodo(*periodo)
+
+    com_periodo = inicio is not None or fim is not None
+    if indice is not None and (indice_datas is not None or not com_periodo):
+        ids = indice.filtrar(filtros)
+        if com_periodo:
+            if ids is None and indice_datas.ordem is None:
+                # Só o período: um trecho contíguo do cubo, que é ordenado por data
+                a, b = indice_datas.intervalo(inicio, fim)
+                return cubo.iloc[a:b]
+            ids = indice_datas.restringir(ids, inicio, fim)
+        return cubo if ids is None else cubo.take(ids)
+
+    mascara = None
+    for coluna, valor in filtros.items():
+        if not valor:
+            continue
+        atual = cubo[coluna].to_numpy() == valor
+        mascara = atual if mascara is None else mascara & atual
+    if com_periodo:
+        datas = cubo['Data'].to_numpy(dtype='datetime64[ns]').view('int64')
+        atual = datas > np.iinfo(np.int64).min
+        if inicio is not None:
+            atual &= datas >= inicio
+        if fim is not None:
+            atual &= datas < fim
+        mascara = atual if mascara is None else mascara & atual
+
+    return cubo if mascara is None else cubo[mascara]
+
+
+# Somas do cubo de que os cards de KPI precisam
+MEDIDAS_KPIS = ['Valor', 'Quantidade', 'Linhas', 'Status_Completo']
+
+
+def calcular_kpis(fatia):
+    """Calcula os totais usados nos cards de KPI a partir de uma fatia do cubo"""
+    return kpis_de_totais({coluna: fatia[coluna].sum() for coluna in MEDIDAS_KPIS if coluna in fatia})
+
+
+def kpis_de_totais(totais):
+    """KPIs a partir das somas de MEDIDAS_KPIS (por exemplo, de SomasPorPeriodo.totais())"""
+    total_vendas = totais['Valor']
+    total_quantidade = totais['Quantidade']
+    linhas = totais['Linhas']
+    completos = totais.get('Status_Completo', 0)
+
+    return {
+        'total_vendas': total_vendas,
+        'total_quantidade': total_quantidade,
+        'ticket_medio': total_vendas / total_quantidade if total_quantidade > 0 else 0,
+        'taxa_conversao': (completos / linhas * 100) if linhas > 0 else 0,
+        'linhas': linhas,
+    }
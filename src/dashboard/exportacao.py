@@ -0,0 +1,89 @@
+"""
+exportacao.py
+Download das vendas filtradas em CSV ou Parquet, gerado em blocos.
+
+As linhas chegam em blocos de tamanho fixo (ConjuntoVendas.iterar_linhas ou
+BancoVendas.iterar_linhas) e cada bloco é convertido e entregue antes de o
+próximo ser lido, então a memória usada por um download não depende do
+número de linhas exportadas. Parquet só fica disponível com o pyarrow
+instalado; cada bloco vira um row group do arquivo.
+"""
+import io
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
+# Colunas exportadas, na ordem do arquivo
+COLUNAS_EXPORTACAO = ['Data', 'Mês', 'Região', 'Produto', 'Quantidade', 'Valor', 'Status']
+
+TIPOS_CONTEUDO = {
+    'csv': 'text/csv; charset=utf-8',
+    'parquet': 'application/vnd.apache.parquet',
+}
+
+
+def formatos_disponiveis():
+    """Formatos aceitos pela exportação neste ambiente"""
+    return ['csv', 'parquet'] if pq is not None else ['csv']
+
+
+def gerar_csv(blocos, colunas=COLUNAS_EXPORTACAO):
+    """Bytes do CSV (cabeçalho e depois um trecho por bloco de linhas)"""
+    yield pd.DataFrame(columns=colunas).to_csv(index=False).encode('utf-8')
+    for bloco in blocos:
+        yield bloco[colunas].to_csv(index=False, header=False, date_format='%Y-%m-%d').encode('utf-8')
+
+
+class _SaidaEmPartes(io.RawIOBase):
+    """Arquivo só de escrita que guarda o que foi escrito até ser esvaziado"""
+
+    def __init__(self):
+        super().__init__()
+        self._partes = []
+        self._posicao = 0
+
+    def writable(self):
+        return True
+
+    def write(self, dados):
+        dados = bytes(dados)
+        self._partes.append(dados)
+        self._posicao += len(dados)
+        return len(dados)
+
+    def tell(self):
+        return self._posicao
+
+    def esvaziar(self):
+        dados, self._partes = b''.join(self._partes), []
+        return dados
+
+
+def _esquema_parquet(colunas):
+    tipos = {'Data': pa.timestamp('us'), 'Quantidade': pa.int64(), 'Valor': pa.float64()}
+    return pa.schema([(coluna, tipos.get(coluna, pa.string())) for coluna in colunas])
+
+
+def gerar_parquet(blocos, colunas=COLUNAS_EXPORTACAO):
+    """Bytes do arquivo Parquet, entregues a cada row group gravado"""
+    if pq is None:
+        raise RuntimeError('exportação em Parquet requer o pyarrow')
+    esquema = _esquema_parquet(colunas)
+    saida = _SaidaEmPartes()
+    with pq.ParquetWriter(saida, esquema) as escritor:
+        for bloco in blocos:
+            bloco = bloco[colunas]
+            # Categorias viram texto: blocos diferentes podem ter dicionários diferentes
+            categoricas = [c for c in colunas if isinstance(bloco[c].dtype, pd.CategoricalDtype)]
+            bloco = bloco.astype({c: object for c in categoricas})
+            escritor.write_table(pa.Table.from_pandas(bloco, schema=esquema, preserve_index=False))
+            yield saida.esvaziar()
+    yield saida.esvaziar()
+
+
+GERADORES = {'csv': gerar_csv, 'parquet': gerar_parquet}
@@ -0,0 +1,108 @@
+"""
+indice.py
+Índice invertido das colunas de filtro do dashboard.
+
+Para cada coluna indexada guardamos uma permutação das linhas agrupada por
+valor e os limites de cada grupo, de modo que as linhas de um valor são um
+array ordenado de ids obtido sem varrer a coluna. Um filtro com várias
+dimensões vira a interseção desses arrays, começando pelo menor, e custa
+proporcional ao número de linhas selecionadas e não ao tamanho do DataFrame.
+"""
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+
+def _tipo_ids(n_linhas):
+    return np.int32 if n_linhas < np.iinfo(np.int32).max else np.int64
+
+
+def intersectar(a, b):
+    """Interseção de dois arrays ordenados de ids (busca binária do menor no maior)"""
+    if len(a) > len(b):
+        a, b = b, a
+    if len(a) == 0:
+        return a
+    pos = np.searchsorted(b, a)
+    pos[pos == len(b)] = len(b) - 1
+    return a[b[pos] == a]
+
+
+class IndiceDimensoes:
+    """Índice de ids de linha por valor para um conjunto de colunas"""
+
+    def __init__(self, df, colunas):
+        self.n_linhas = len(df)
+        self.colunas = list(colunas)
+        self._valores = {}
+        self._ordem = {}
+        self._limites = {}
+
+        tipo = _tipo_ids(self.n_linhas)
+        for coluna in self.colunas:
+            codigos, valores = pd.factorize(df[coluna], sort=True)
+            # argsort estável mantém os ids de cada valor em ordem crescente
+            ordem = np.argsort(codigos, kind='stable').astype(tipo, copy=False)
+            limites = np.searchsorted(codigos[ordem], np.arange(len(valores) + 1))
+
+            self._valores[coluna] = {v: i for i, v in enumerate(pd.Index(valores).tolist())}
+            self._ordem[coluna] = ordem
+            self._limites[coluna] = limites
+
+    def valores(self, coluna):
+        """Valores distintos da coluna, em ordem"""
+        return list(self._valores[coluna])
+
+    def linhas(self, coluna, valor):
+        """Ids (ordenados) das linhas em que coluna == valor"""
+        codigo = self._valores[coluna].get(valor)
+        if codigo is None:
+            return np.empty(0, dtype=self._ordem[coluna].dtype)
+        limites = self._limites[coluna]
+        return self._ordem[coluna][limites[codigo]:limites[codigo + 1]]
+
+    def filtrar(self, filtros):
+        """
+        Recebe {coluna: valor} e retorna os ids ordenados das linhas que
+        atendem a todos os filtros. Valores vazios são ignorados ("Todos");
+        retorna None quando nenhum filtro está ativo.
+        """
+        listas = [self.linhas(c, v) for c, v in filtros.items() if v]
+        if not listas:
+            return None
+
+        listas.sort(key=len)
+        ids = listas[0]
+        for outra in listas[1:]:
+            ids = intersectar(ids, outra)
+        return ids
+
+    def salvar(self, diretorio):
+        """Grava o índice em arquivos .npy para ser mapeado por outros processos"""
+        os.makedirs(diretorio, exist_ok=True)
+        colunas = []
+        for i, coluna in enumerate(self.colunas):
+            np.save(os.path.join(diretorio, f'{i:03d}_ordem.npy'), self._ordem[coluna])
+            np.save(os.path.join(diretorio, f'{i:03d}_limites.npy'), self._limites[coluna])
+            colunas.append({'nome': coluna, 'valores': list(self._valores[coluna])})
+        with open(os.path.join(diretorio, 'indice.json'), 'w', encoding='utf-8') as f:
+            json.dump({'n_linhas': self.n_linhas, 'colunas': colunas}, f, ensure_ascii=False)
+
+    @classmethod
+    def carregar(cls, diretorio, mmap=True):
+        """Abre um índice gravado por salvar(), mapeando os arrays somente leitura"""
+        with open(os.path.join(diretorio, 'indice.json'), encoding='utf-8') as f:
+            info = json.load(f)
+
+        indice = cls.__new__(cls)
+        indice.n_linhas = info['n_linhas']
+        indice.colunas = [c['nome'] for c in info['colunas']]
+        indice._valores, indice._ordem, indice._limites = {}, {}, {}
+        modo = 'r' if mmap and indice.n_linhas else None
+        for i, c in enumerate(info['colunas']):
+            indice._valores[c['nome']] = {v: j for j, v in enumerate(c['valores'])}
+            indice._ordem[c['nome']] = np.load(os.path.join(diretorio, f'{i:03d}_ordem.npy'), mmap_mode=modo)
+            indice._limites[c['nome']] = np.load(os.path.join(diretorio, f'{i:03d}_limites.npy'))
+        return indice
@@ -0,0 +1,181 @@
+"""
+metricas.py
+Instrumentação das etapas dos callbacks e exportação no formato Prometheus.
+
+Cada etapa (consulta ao cache, filtro, agregação, figura, página da tabela,
+serialização) é cronometrada com etapa() e acumulada em histogramas com
+rótulos, expostos em texto por exportar(). Os histogramas ficam no processo:
+com vários workers do gunicorn, cada um responde pelas próprias requisições.
+
+instrumentar_servidor() mede as requisições de callback do Dash no Flask
+(tempo total, parte gasta fora dos callbacks e bytes da resposta) e, com um
+diretório de perfil, grava um perfil de cada requisição: pyinstrument
+(amostragem, HTML) quando instalado, senão cProfile (.prof).
+"""
+import bisect
+import os
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+from flask import g, has_request_context, request
+
+LIMITES_SEGUNDOS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+LIMITES_LINHAS = tuple(10 ** i for i in range(9))
+LIMITES_BYTES = tuple(256 * 4 ** i for i in range(9))
+
+ROTA_CALLBACKS = '/_dash-update-component'
+
+
+class Histograma:
+    """Histograma cumulativo com rótulos, no modelo do Prometheus"""
+
+    def __init__(self, nome, ajuda, rotulos, limites):
+        self.nome = nome
+        self.ajuda = ajuda
+        self.rotulos = rotulos
+        self.limites = limites
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observar(self, valor, *rotulos):
+        balde = bisect.bisect_left(self.limites, valor)
+        with self._lock:
+            serie = self._series.get(rotulos)
+            if serie is None:
+                serie = self._series[rotulos] = [[0] * (len(self.limites) + 1), 0.0, 0]
+            serie[0][balde] += 1
+            serie[1] += valor
+            serie[2] += 1
+
+    def exportar(self):
+        linhas = [f'# HELP {self.nome} {self.ajuda}', f'# TYPE {self.nome} histogram']
+        with self._lock:
+            series = sorted((r, [list(s[0]), s[1], s[2]]) for r, s in self._series.items())
+        for rotulos, (baldes, soma, contagem) in series:
+            base = ','.join(f'{n}="{v}"' for n, v in zip(self.rotulos, rotulos))
+            acumulado = 0
+            for limite, quantidade in zip(list(self.limites) + ['+Inf'], baldes):
+                acumulado += quantidade
+                linhas.append(f'{self.nome}_bucket{{{base},le="{limite}"}} {acumulado}')
+            linhas.append(f'{self.nome}_sum{{{base}}} {soma}')
+            linhas.append(f'{self.nome}_count{{{base}}} {contagem}')
+        return '\n'.join(linhas)
+
+
+ETAPAS = Histograma(
+    'dashboard_etapa_segundos', 'Duração de cada etapa do cálculo de um grupo de saídas',
+    ('grupo', 'etapa'), LIMITES_SEGUNDOS,
+)
+LINHAS = Histograma(
+    'dashboard_linhas_filtradas', 'Linhas (ou células do cubo) que atendem aos filtros',
+    ('grupo',), LIMITES_LINHAS,
+)
+RESPOSTA = Histograma(
+    'dashboard_resposta_bytes', 'Tamanho da resposta JSON de um callback',
+    ('grupo',), LIMITES_BYTES,
+)
+HISTOGRAMAS = [ETAPAS, LINHAS, RESPOSTA]
+
+
+def exportar():
+    """Todos os histogramas no formato de texto do Prometheus"""
+    return '\n'.join(h.exportar() for h in HISTOGRAMAS) + '\n'
+
+
+@contextmanager
+def etapa(grupo, nome):
+    """Cronometra o bloco como a etapa `nome` do grupo"""
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        ETAPAS.observar(time.perf_counter() - inicio, grupo, nome)
+
+
+def cronometrar(grupo, nome):
+    """Decorador equivalente a etapa() em volta da função inteira"""
+    def decorador(funcao):
+        @wraps(funcao)
+        def cronometrada(*args, **kwargs):
+            with etapa(grupo, nome):
+                return funcao(*args, **kwargs)
+        return cronometrada
+    return decorador
+
+
+def observar_linhas(grupo, quantidade):
+    LINHAS.observar(quantidade, grupo)
+
+
+@contextmanager
+def callback(grupo):
+    """
+    Cronometra o cálculo de um callback. Dentro de uma requisição, o tempo
+    fica registrado para que o restante (serialização e despacho do Dash)
+    seja medido em separado.
+    """
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        duracao = time.perf_counter() - inicio
+        ETAPAS.observar(duracao, grupo, 'callback')
+        if has_request_context():
+            g.metricas_grupo = grupo
+            g.metricas_callback = g.get('metricas_callback', 0.0) + duracao
+
+
+def _criar_perfilador():
+    try:
+        from pyinstrument import Profiler
+    except ImportError:
+        import cProfile
+        perfil = cProfile.Profile()
+        perfil.enable()
+        return perfil
+    perfil = Profiler(interval=0.001)
+    perfil.start()
+    return perfil
+
+
+def _gravar_perfil(perfil, diretorio, nome):
+    if hasattr(perfil, 'output_html'):
+        perfil.stop()
+        with open(os.path.join(diretorio, nome + '.html'), 'w', encoding='utf-8') as f:
+            f.write(perfil.output_html())
+    else:
+        perfil.disable()
+        perfil.dump_stats(os.path.join(diretorio, nome + '.prof'))
+
+
+def instrumentar_servidor(server, perfil_dir=None):
+    """Registra a medição das requisições de callback no servidor Flask"""
+    if perfil_dir:
+        os.makedirs(perfil_dir, exist_ok=True)
+
+    @server.before_request
+    def _iniciar_medicao():
+        if not request.path.endswith(ROTA_CALLBACKS):
+            return
+        g.metricas_inicio = time.perf_counter()
+        if perfil_dir:
+            g.metricas_perfil = _criar_perfilador()
+
+    @server.after_request
+    def _registrar_medicao(resposta):
+        inicio = g.get('metricas_inicio')
+        if inicio is None:
+            return resposta
+        total = time.perf_counter() - inicio
+        grupo = g.get('metricas_grupo') or (request.get_json(silent=True) or {}).get('output', 'desconhecido')
+
+        ETAPAS.observar(total, grupo, 'requisicao')
+        ETAPAS.observar(max(total - g.get('metricas_callback', 0.0), 0.0), grupo, 'serializacao')
+        RESPOSTA.observar(len(resposta.get_data()), grupo)
+
+        perfil = g.get('metricas_perfil')
+        if perfil is not None:
+            _gravar_perfil(perfil, perfil_dir, f'{time.strftime("%Y%m%d-%H%M%S")}-{grupo}-{total * 1000:.0f}ms')
+        return resposta
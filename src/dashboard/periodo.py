@@ -0,0 +1,128 @@
+"""
+periodo.py
+Filtro por intervalo de datas com busca binária e somas acumuladas.
+
+IndiceDatas guarda as linhas em ordem de data: um intervalo vira duas buscas
+binárias e um trecho contíguo dessa ordem, sem comparar a coluna inteira. O
+cubo já é construído em ordem de data, então para ele a ordem é a
+identidade e o intervalo é uma fatia direta das células.
+
+SomasPorPeriodo guarda, para cada recorte de Mês/Região/Produto pedido, as
+somas acumuladas das medidas do cubo ao longo das datas. O total de um
+intervalo é a diferença entre as somas nas duas pontas, achadas por busca
+binária: O(log n) por consulta depois que o recorte é montado.
+"""
+import threading
+
+import numpy as np
+import pandas as pd
+
+from indice import intersectar
+
+# asi8 de NaT; datas nulas ficam no começo da ordem
+NAT = np.iinfo(np.int64).min
+
+
+def _nanossegundos(datas):
+    return pd.DatetimeIndex(datas).as_unit('ns').asi8
+
+
+def normalizar_periodo(inicio=None, fim=None):
+    """Datas do seletor como 'AAAA-MM-DD' (ou None), para chaves de cache e consultas"""
+    return (
+        pd.Timestamp(inicio).strftime('%Y-%m-%d') if inicio else None,
+        pd.Timestamp(fim).strftime('%Y-%m-%d') if fim else None,
+    )
+
+
+def limites_periodo(inicio=None, fim=None):
+    """
+    Converte as datas do seletor (fim inclusivo, o dia inteiro) no intervalo
+    [inicio, fim) em nanossegundos; None deixa o lado aberto.
+    """
+    return (
+        pd.Timestamp(inicio).normalize().as_unit('ns').value if inicio else None,
+        (pd.Timestamp(fim).normalize() + pd.Timedelta(days=1)).as_unit('ns').value if fim else None,
+    )
+
+
+def _trecho(datas, inicio, fim):
+    """Posições [a, b) do array ordenado `datas` com valores em [inicio, fim); NaT fica de fora"""
+    a = int(np.searchsorted(datas, NAT, side='right'))
+    if inicio is not None:
+        a = max(a, int(np.searchsorted(datas, inicio, side='left')))
+    b = int(np.searchsorted(datas, fim, side='left')) if fim is not None else len(datas)
+    return a, max(a, b)
+
+
+class IndiceDatas:
+    """Posições das linhas de um DataFrame em ordem de data"""
+
+    def __init__(self, datas):
+        valores = _nanossegundos(datas)
+        if np.all(valores[1:] >= valores[:-1]):
+            # Já ordenadas, como o cubo: a ordem é a identidade
+            self.ordem = None
+            self.datas = valores
+        else:
+            self.ordem = np.argsort(valores, kind='stable')
+            self.datas = valores[self.ordem]
+
+    def intervalo(self, inicio=None, fim=None):
+        """Trecho [a, b) da ordem por data com as datas em [inicio, fim) (ns)"""
+        return _trecho(self.datas, inicio, fim)
+
+    def restringir(self, ids, inicio=None, fim=None):
+        """
+        Ids ordenados das linhas (None = todas) que caem no intervalo. Sem
+        intervalo, retorna ids sem alteração.
+        """
+        if inicio is None and fim is None:
+            return ids
+        a, b = self.intervalo(inicio, fim)
+        if self.ordem is None:
+            if ids is None:
+                return np.arange(a, b)
+            return ids[np.searchsorted(ids, a):np.searchsorted(ids, b)]
+        linhas = np.sort(self.ordem[a:b])
+        return linhas if ids is None else intersectar(np.asarray(ids), linhas)
+
+
+class SomasPorPeriodo:
+    """Somas acumuladas das medidas do cubo ao longo das datas, por recorte de filtros"""
+
+    def __init__(self, cubo, indice_cubo, medidas):
+        self.cubo = cubo
+        self.indice_cubo = indice_cubo
+        self.medidas = [m for m in medidas if m in cubo.columns]
+        self._recortes = {}
+        self._lock = threading.Lock()
+
+    def _recorte(self, filtros):
+        """Datas ordenadas e somas acumuladas (começando em 0) das células do recorte"""
+        chave = tuple(sorted((c, v) for c, v in filtros.items() if v))
+        recorte = self._recortes.get(chave)
+        if recorte is not None:
+            return recorte
+
+        ids = self.indice_cubo.filtrar(dict(chave))
+        ids = np.arange(len(self.cubo)) if ids is None else np.asarray(ids)
+        datas = _nanossegundos(self.cubo['Data'])[ids]
+        if not np.all(datas[1:] >= datas[:-1]):
+            ordem = np.argsort(datas, kind='stable')
+            ids, datas = ids[ordem], datas[ordem]
+
+        acumuladas = {}
+        for medida in self.medidas:
+            valores = self.cubo[medida].to_numpy()[ids]
+            tipo = np.int64 if valores.dtype.kind in 'biu' else np.float64
+            acumuladas[medida] = np.concatenate([np.zeros(1, dtype=tipo), np.cumsum(valores, dtype=tipo)])
+
+        with self._lock:
+            return self._recortes.setdefault(chave, (datas, acumuladas))
+
+    def totais(self, filtros, inicio=None, fim=None):
+        """{medida: soma} das células que atendem aos filtros com data em [inicio, fim) (ns)"""
+        datas, acumuladas = self._recorte(filtros)
+        a, b = _trecho(datas, inicio, fim)
+        return {medida: soma[b] - soma[a] for medida, soma in acumuladas.items()}
@@ -0,0 +1,108 @@
+"""
+tabela.py
+Paginação e ordenação no servidor para a tabela de detalhes de vendas.
+
+Só a página pedida é ordenada e serializada: uma seleção parcial
+(np.partition) separa as linhas que podem aparecer até o fim da página e
+apenas elas são ordenadas. A formatação é feita por coluna, sem laço por
+linha em Python.
+"""
+import numpy as np
+import pandas as pd
+
+# Colunas exibidas: id da coluna na tabela -> coluna do DataFrame
+COLUNAS_TABELA = {
+    'Data': 'Data',
+    'Região': 'Região',
+    'Produto': 'Produto',
+    'Quantidade': 'Quantidade',
+    'Valor': 'Valor',
+    'Status': 'Status',
+}
+
+ORDENACAO_PADRAO = [{'column_id': 'Valor', 'direction': 'desc'}]
+
+
+def chave_ordenacao(serie, decrescente=False):
+    """
+    Converte a coluna em um array numérico cuja ordem crescente é a ordem
+    pedida. Categorias são ordenadas pelo texto; nulos ficam sempre no fim.
+    """
+    if isinstance(serie.dtype, pd.CategoricalDtype):
+        categorias = serie.cat.categories
+        posto = np.empty(len(categorias), dtype=np.float64)
+        posto[np.argsort(categorias.astype(str))] = np.arange(len(categorias))
+        codigos = serie.cat.codes.to_numpy()
+        chave = np.where(codigos >= 0, posto[codigos], np.nan)
+    elif pd.api.types.is_datetime64_any_dtype(serie.dtype):
+        chave = serie.to_numpy().view('int64').astype(np.float64)
+        chave[serie.isna().to_numpy()] = np.nan
+    else:
+        chave = serie.to_numpy(dtype=np.float64, na_value=np.nan)
+
+    if decrescente:
+        chave = -chave
+    return np.where(np.isnan(chave), np.inf, chave)
+
+
+def selecionar_pagina(chave, inicio, fim):
+    """
+    Posições das linhas [inicio, fim) na ordem crescente de `chave`, com
+    empates resolvidos pela posição original. Custa O(n) para a seleção
+    mais O(fim log fim) para ordenar os candidatos: mesmo com muitos
+    empates (colunas com poucos valores) só entram as `fim` primeiras linhas.
+    """
+    n = len(chave)
+    fim = min(fim, n)
+    if inicio >= fim:
+        return np.empty(0, dtype=np.int64)
+
+    if fim < n:
+        limite = np.partition(chave, fim - 1)[fim - 1]
+        menores = np.flatnonzero(chave < limite)
+        # Dos empatados no limite, só os primeiros pela posição completam as `fim` linhas
+        empatados = np.flatnonzero(chave == limite)[:fim - len(menores)]
+        candidatos = np.concatenate([menores, empatados])
+    else:
+        candidatos = np.arange(n)
+
+    ordem = candidatos[np.lexsort((candidatos, chave[candidatos]))]
+    return ordem[inicio:fim]
+
+
+def pagina_detalhes(linhas, ids, pagina, tamanho, ordenacao=None):
+    """
+    Retorna (registros, total de páginas, total de linhas) de uma página da
+    tabela. linhas é um conjunto.LinhasVendas e ids são as linhas filtradas
+    (None = todas).
+    """
+    ordenacao = ordenacao or ORDENACAO_PADRAO
+    coluna = COLUNAS_TABELA.get(ordenacao[0]['column_id'], 'Valor')
+    decrescente = ordenacao[0].get('direction') == 'desc'
+
+    valores = linhas.coluna(coluna, ids)
+    total = len(valores)
+    pagina, paginas = limitar_pagina(total, pagina, tamanho)
+
+    posicoes = selecionar_pagina(chave_ordenacao(valores, decrescente), pagina * tamanho, (pagina + 1) * tamanho)
+    selecionadas = posicoes if ids is None else np.asarray(ids)[posicoes]
+
+    return formatar_registros(linhas.take(selecionadas)), paginas, total
+
+
+def limitar_pagina(total, pagina, tamanho):
+    """Página válida mais próxima da pedida e o total de páginas (no mínimo 1)"""
+    paginas = max(-(-total // tamanho), 1)
+    return min(max(pagina or 0, 0), paginas - 1), paginas
+
+
+def formatar_registros(trecho):
+    """Linhas de uma página no formato exibido pela tabela"""
+    return pd.DataFrame({
+        'Data': trecho['Data'].dt.strftime('%d/%m/%Y'),
+        'Região': trecho['Região'].astype(str),
+        'Produto': trecho['Produto'].astype(str),
+        'Quantidade': trecho['Quantidade'].astype('int64'),
+        'Valor': trecho['Valor'].astype('float64'),
+        'Status': '✓ ' + trecho['Status'].astype(str),
+    }).to_dict('records')
@@ -0,0 +1,97 @@
+"""
+backlog.py
+Backlog de chamados (quantos estavam abertos) ao longo do tempo.
+
+Cada chamado vira dois eventos: +1 na abertura e -1 no fechamento. Os
+eventos ficam ordenados por instante uma única vez; o backlog em qualquer
+instante é a soma acumulada dos eventos até ele, e o fim de cada período
+(dia, semana ou mês) é localizado com busca binária. Um recorte por
+responsavel/prioridade só filtra os eventos, que continuam ordenados, então
+cada consulta custa O(eventos + períodos log eventos) em vez de
+O(chamados x períodos).
+
+O CSV de chamados só cresce: cada linha é uma versão de um chamado. Antes de
+montar os eventos cada chamado é reduzido à sua versão final, com a mesma
+regra dos KPIs (kpis_chamados.versoes_finais).
+"""
+import numpy as np
+import pandas as pd
+
+from .kpis_chamados import versoes_finais
+
+GRANULARIDADES = {'dia': 'D', 'semana': 'W', 'mes': 'M'}
+DIMENSOES_BACKLOG = ['responsavel', 'prioridade']
+
+
+def _nanossegundos(datas):
+    return pd.DatetimeIndex(datas).as_unit('ns').asi8
+
+
+class BacklogChamados:
+    """Eventos de abertura/fechamento ordenados, com as dimensões de cada evento"""
+
+    def __init__(self, instantes, variacoes, codigos, categorias):
+        self.instantes = instantes
+        self.variacoes = variacoes
+        self.codigos = codigos
+        self.categorias = categorias
+        self._acumulado = np.cumsum(variacoes, dtype=np.int64)
+
+    @classmethod
+    def construir(cls, df, dimensoes=DIMENSOES_BACKLOG):
+        """Monta os eventos a partir das linhas (versões) do CSV de chamados"""
+        df = versoes_finais(df)
+        fechado = df['data_fechamento'].notna().to_numpy()
+        instantes = np.concatenate([
+            _nanossegundos(df['data_abertura']),
+            _nanossegundos(df['data_fechamento'])[fechado],
+        ])
+        variacoes = np.concatenate([
+            np.ones(len(df), dtype=np.int8),
+            np.full(int(fechado.sum()), -1, dtype=np.int8),
+        ])
+
+        codigos, categorias = {}, {}
+        for dimensao in dimensoes:
+            valores = pd.Categorical(df[dimensao])
+            codigos[dimensao] = np.concatenate([valores.codes, valores.codes[fechado]])
+            categorias[dimensao] = list(valores.categories)
+
+        ordem = np.argsort(instantes, kind='stable')
+        return cls(instantes[ordem], variacoes[ordem], {d: c[ordem] for d, c in codigos.items()}, categorias)
+
+    def valores(self, dimensao):
+        return self.categorias[dimensao]
+
+    def _eventos(self, filtros):
+        """Instantes e backlog acumulado dos eventos do recorte"""
+        mascara = None
+        for dimensao, valor in filtros.items():
+            if dimensao not in self.categorias:
+                raise KeyError(f'Dimensão sem índice de backlog: {dimensao}')
+            codigo = self.categorias[dimensao].index(valor) if valor in self.categorias[dimensao] else -2
+            atual = self.codigos[dimensao] == codigo
+            mascara = atual if mascara is None else mascara & atual
+
+        if mascara is None:
+            return self.instantes, self._acumulado
+        return self.instantes[mascara], np.cumsum(self.variacoes[mascara], dtype=np.int64)
+
+    def serie(self, granularidade='mes', filtros=None, inicio=None, fim=None):
+        """
+        Backlog no fim de cada período, indexado pelo início do período.
+        filtros = {dimensão: valor}; valores vazios são ignorados.
+        """
+        instantes, acumulado = self._eventos({d: v for d, v in (filtros or {}).items() if v})
+        if not len(instantes) and (inicio is None or fim is None):
+            return pd.Series([], index=pd.DatetimeIndex([]), dtype='int64', name='backlog')
+
+        inicio = pd.Timestamp(inicio if inicio is not None else instantes[0])
+        fim = pd.Timestamp(fim if fim is not None else instantes[-1])
+        periodos = pd.period_range(inicio, fim, freq=GRANULARIDADES[granularidade])
+
+        # Último evento antes do início do período seguinte
+        posicoes = np.searchsorted(instantes, _nanossegundos((periodos + 1).start_time), side='left') - 1
+        backlog = np.where(posicoes >= 0, acumulado[np.maximum(posicoes, 0)], 0) if len(acumulado) else np.zeros(len(periodos), dtype=np.int64)
+
+        return pd.Series(backlog, index=periodos.start_time, name='backlog')
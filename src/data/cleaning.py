@@ -1,22 +1,198 @@
 """
 cleaning.py
 Simple cleaning utilities used before visualization.
+
+Dates are parsed with a fixed format inferred once per column from a sample,
+instead of letting pandas guess element by element. clean_csv() runs the
+same steps over chunks of a CSV in a process pool and reports the time and
+rows/second of each step.
 """
+import logging
+import os
+import time
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
 import pandas as pd
+from pandas.tseries.api import guess_datetime_format
+
+logger = logging.getLogger(__name__)
+
+DATE_CANDIDATES = ["date","created_at","created","data","created_at_date"]
+SAMPLE_SIZE = 1000
+CHUNK_SIZE = 500_000
 
-def ensure_date(df, col_candidates=["date","created_at","created","data","created_at_date"]):
+
+def find_date_column(columns, col_candidates=DATE_CANDIDATES):
     for c in col_candidates:
-        if c in df.columns:
-            df[c] = pd.to_datetime(df[c], errors="coerce", dayfirst=True)
+        if c in columns:
             return c
     # try to find any datetime-like column
-    for c in df.columns:
+    for c in columns:
         if "date" in c.lower() or "created" in c.lower():
-            df[c] = pd.to_datetime(df[c], errors="coerce", dayfirst=True)
             return c
     return None
 
+def _natural_order(fmt, dayfirst):
+    # Year-first dates are practically always year-month-day; otherwise follow dayfirst
+    if fmt.startswith("%Y"):
+        return fmt.find("%m") < fmt.find("%d")
+    return (fmt.find("%d") < fmt.find("%m")) == dayfirst
+
+def infer_date_format(values, dayfirst=True, sample_size=SAMPLE_SIZE):
+    """
+    Guess a strftime format from a sample of the values and return the one
+    that parses the most of the sample, or None if no guess parses anything.
+    Ties (e.g. days <= 12) are broken by the natural day/month order.
+    """
+    sample = pd.Series(values).dropna().astype(str)
+    sample = sample[sample.str.strip() != ""].head(sample_size)
+    if sample.empty:
+        return None
+
+    with warnings.catch_warnings():
+        # guess_datetime_format warns when a guess contradicts the dayfirst passed
+        warnings.simplefilter("ignore", UserWarning)
+        guesses = {guess_datetime_format(v, dayfirst=first) for v in sample.head(20) for first in (dayfirst, not dayfirst)}
+    best, best_score = None, (0, False)
+    for fmt in sorted(guesses - {None}):
+        score = (pd.to_datetime(sample, format=fmt, errors="coerce").notna().sum(), _natural_order(fmt, dayfirst))
+        if score[0] and score > best_score:
+            best, best_score = fmt, score
+    return best
+
+def parse_dates(values, date_format=None, dayfirst=True):
+    """
+    Parse each distinct value once (exports repeat the same dates many
+    times), with a fixed format when one is known, otherwise pandas inference.
+    Values the fixed format does not match (e.g. a column mixing dates with
+    and without a time) are parsed again one by one with inference; the
+    number of values that still fail is logged.
+    """
+    values = pd.Series(values)
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return values
+    codes, uniques = pd.factorize(values)
+    if date_format:
+        parsed = pd.DatetimeIndex(pd.to_datetime(uniques, format=date_format, errors="coerce")).as_unit("ns")
+        missing = parsed.isna()
+        if missing.any():
+            retried = pd.to_datetime(uniques[missing], errors="coerce", dayfirst=dayfirst, format="mixed")
+            merged = parsed.to_numpy(copy=True)
+            merged[missing] = pd.DatetimeIndex(retried).as_unit("ns").to_numpy()
+            parsed = pd.DatetimeIndex(merged)
+    else:
+        parsed = pd.DatetimeIndex(pd.to_datetime(uniques, errors="coerce", dayfirst=dayfirst))
+
+    failed = np.flatnonzero(parsed.isna() & (pd.Series(uniques).astype(str).str.strip() != "").to_numpy())
+    if len(failed):
+        logger.warning(
+            "parse_dates: %d values (%d distinct) of column %s could not be parsed, e.g. %r",
+            int(np.isin(codes, failed).sum()), len(failed), values.name, uniques[failed[0]],
+        )
+    return pd.Series(pd.DatetimeIndex(parsed).take(codes, allow_fill=True, fill_value=pd.NaT), index=values.index, name=values.name)
+
+def ensure_date(df, col_candidates=DATE_CANDIDATES, date_format=None):
+    c = find_date_column(df.columns, col_candidates)
+    if c is None:
+        return None
+    if date_format is None and not pd.api.types.is_datetime64_any_dtype(df[c]):
+        date_format = infer_date_format(df[c])
+    df[c] = parse_dates(df[c], date_format)
+    return c
+
+def tidy_column_name(c):
+    return c.strip().lower().replace(" ", "_")
+
 def tidy_columns(df):
-    df = df.copy()
-    df.columns = [c.strip().lower().replace(" ", "_") for c in df.columns]
+    # Shallow copy: only the column labels change, the data is shared
+    df = df.copy(deep=False)
+    df.columns = [tidy_column_name(c) for c in df.columns]
     return df
+
+
+def _clean_chunk(chunk, date_columns):
+    """Clean one chunk; returns the chunk and the seconds spent on each step"""
+    timings = {}
+
+    start = time.perf_counter()
+    chunk = tidy_columns(chunk)
+    timings["tidy_columns"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for column, date_format in date_columns.items():
+        chunk[column] = parse_dates(chunk[column], date_format)
+    timings["parse_dates"] = time.perf_counter() - start
+
+    return chunk, timings
+
+def timing_report(timings, rows):
+    """Seconds and rows/second per step"""
+    report = pd.DataFrame({"seconds": pd.Series(timings, dtype="float64")})
+    report["rows_per_second"] = (rows / report["seconds"].where(report["seconds"] > 0)).round(0)
+    report.index.name = "step"
+    return report
+
+def clean_csv(path, date_columns=None, chunksize=CHUNK_SIZE, workers=None, dayfirst=True):
+    """
+    Read and clean a CSV in chunks, cleaning the chunks in a process pool.
+
+    date_columns are tidy column names; by default the column found by
+    ensure_date's rules. The date format of each one is inferred once from
+    the first chunk and reused for every chunk. Returns the cleaned
+    DataFrame and the per-step timing report. Step times measured inside the
+    workers are summed over chunks (CPU time across the pool).
+    """
+    timings = {}
+    workers = workers or os.cpu_count() or 1
+
+    start = time.perf_counter()
+    reader = pd.read_csv(path, chunksize=chunksize)
+    first = next(reader, None)
+    timings["read"] = time.perf_counter() - start
+    if first is None:
+        return pd.DataFrame(), timing_report(timings, 0)
+
+    start = time.perf_counter()
+    columns = [tidy_column_name(c) for c in first.columns]
+    if date_columns is None:
+        found = find_date_column(columns)
+        date_columns = [found] if found else []
+    first_tidy = tidy_columns(first)
+    formats = {c: infer_date_format(first_tidy[c], dayfirst=dayfirst) for c in date_columns}
+    timings["infer_date_format"] = time.perf_counter() - start
+    logger.info("clean_csv: date formats %s", formats)
+
+    results = []
+    wall = time.perf_counter()
+    if workers == 1:
+        chunks = [first]
+        read_start = time.perf_counter()
+        chunks += list(reader)
+        timings["read"] += time.perf_counter() - read_start
+        results = [_clean_chunk(chunk, formats) for chunk in chunks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(_clean_chunk, first, formats)]
+            while True:
+                read_start = time.perf_counter()
+                chunk = next(reader, None)
+                timings["read"] += time.perf_counter() - read_start
+                if chunk is None:
+                    break
+                futures.append(pool.submit(_clean_chunk, chunk, formats))
+            results = [future.result() for future in futures]
+    timings["clean_wall"] = time.perf_counter() - wall
+
+    for _, chunk_timings in results:
+        for step, seconds in chunk_timings.items():
+            timings[step] = timings.get(step, 0.0) + seconds
+
+    start = time.perf_counter()
+    df = pd.concat([chunk for chunk, _ in results], ignore_index=True)
+    timings["concat"] = time.perf_counter() - start
+
+    report = timing_report(timings, len(df))
+    logger.info("clean_csv: %s rows from %s\n%s", len(df), os.path.basename(path), report.to_string())
+    return df, report
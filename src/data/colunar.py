@@ -0,0 +1,149 @@
+"""
+colunar.py
+Armazenamento colunar em arquivos .npy, um por coluna.
+
+Colunas numéricas e de data são gravadas como estão; colunas de texto e
+categóricas são gravadas como códigos inteiros, com o dicionário de valores
+no manifesto. Na leitura os arquivos são mapeados em memória somente leitura,
+então vários processos (por exemplo, workers do gunicorn) compartilham as
+mesmas páginas sem copiar os dados.
+"""
+import hashlib
+import json
+import os
+import shutil
+import uuid
+
+import numpy as np
+import pandas as pd
+
+MANIFESTO = 'manifesto.json'
+
+
+def _eh_nativa(serie):
+    """Colunas que o formato .npy grava sem conversão (números, booleanos e datas)"""
+    return isinstance(serie.dtype, np.dtype) and serie.dtype.kind in 'biufM'
+
+
+def _eh_mascarada(serie):
+    """Inteiros, floats e booleanos anuláveis do pandas (Int64, Float64, boolean): valores + máscara"""
+    return isinstance(serie.array, (pd.arrays.IntegerArray, pd.arrays.FloatingArray, pd.arrays.BooleanArray))
+
+
+def salvar_colunas(df, diretorio, metadados=None):
+    """
+    Grava cada coluna do DataFrame em um .npy e o manifesto por último.
+    Datas com fuso são gravadas em UTC com o fuso no manifesto; tipos
+    anuláveis (Int64, boolean...) gravam os valores e a máscara de nulos;
+    o resto vira categoria, desde que as categorias sejam texto ou números.
+    """
+    os.makedirs(diretorio, exist_ok=True)
+
+    colunas = []
+    for i, nome in enumerate(df.columns):
+        serie = df[nome]
+        info = {'nome': nome, 'arquivo': f'{i:03d}.npy'}
+        caminho = os.path.join(diretorio, info['arquivo'])
+
+        if isinstance(serie.dtype, pd.DatetimeTZDtype):
+            np.save(caminho, serie.dt.tz_convert('UTC').dt.tz_localize(None).to_numpy('datetime64[ns]'))
+            info['fuso'] = str(serie.dtype.tz)
+        elif _eh_nativa(serie):
+            np.save(caminho, serie.to_numpy())
+        elif _eh_mascarada(serie):
+            nulos = serie.isna().to_numpy()
+            np.save(caminho, serie.to_numpy(dtype=serie.dtype.numpy_dtype, na_value=0))
+            info['mascara'] = f'{i:03d}_nulos.npy'
+            info['tipo'] = str(serie.dtype)
+            np.save(os.path.join(diretorio, info['mascara']), nulos)
+        else:
+            categorias = serie if isinstance(serie.dtype, pd.CategoricalDtype) else serie.astype('category')
+            valores = categorias.cat.categories
+            if not (pd.api.types.is_string_dtype(valores) or pd.api.types.is_numeric_dtype(valores)):
+                raise TypeError(
+                    f'coluna {nome!r}: tipo {serie.dtype} não suportado no armazenamento colunar '
+                    '(categorias precisam ser texto ou números)'
+                )
+            np.save(caminho, categorias.cat.codes.to_numpy())
+            info['categorias'] = valores.tolist()
+            info['ordenada'] = bool(categorias.cat.ordered)
+        colunas.append(info)
+
+    manifesto = {'linhas': len(df), 'colunas': colunas, 'metadados': metadados or {}}
+    with open(os.path.join(diretorio, MANIFESTO), 'w', encoding='utf-8') as f:
+        json.dump(manifesto, f, ensure_ascii=False)
+
+
+def ler_manifesto(diretorio):
+    with open(os.path.join(diretorio, MANIFESTO), encoding='utf-8') as f:
+        return json.load(f)
+
+
+def abrir_colunas(diretorio, colunas=None, mmap=True):
+    """
+    Abre um diretório gravado por salvar_colunas como DataFrame.
+    Com mmap=True os arrays são mapeados somente leitura, sem cópia.
+    colunas limita a leitura a um subconjunto das colunas.
+    """
+    manifesto = ler_manifesto(diretorio)
+
+    dados = {}
+    for info in manifesto['colunas']:
+        if colunas is not None and info['nome'] not in colunas:
+            continue
+        caminho = os.path.join(diretorio, info['arquivo'])
+        # Arquivos de arrays vazios não podem ser mapeados
+        array = np.load(caminho, mmap_mode='r' if mmap and manifesto['linhas'] else None)
+        if 'categorias' in info:
+            array = pd.Categorical.from_codes(
+                array, categories=info['categorias'], ordered=info['ordenada'], validate=False
+            )
+        elif 'fuso' in info:
+            array = pd.DatetimeIndex(array).tz_localize('UTC').tz_convert(info['fuso'])
+        elif 'mascara' in info:
+            nulos = np.load(os.path.join(diretorio, info['mascara']), mmap_mode='r' if mmap and manifesto['linhas'] else None)
+            array = pd.api.types.pandas_dtype(info['tipo']).construct_array_type()(array, nulos)
+        dados[info['nome']] = array
+
+    return pd.DataFrame(dados, copy=False)
+
+
+def materializar(diretorio, chave, gerar, complementar=None):
+    """
+    Garante que exista em `diretorio` uma versão colunar dos dados identificados
+    por `chave` e retorna o caminho dela. Cada diretório guarda um único
+    conjunto de dados: versões com outras chaves são apagadas.
+
+    Só o primeiro processo a chegar chama gerar() (que retorna o DataFrame). A
+    gravação acontece em um diretório temporário renomeado no final, então os
+    outros processos nunca enxergam arquivos pela metade. complementar(df,
+    diretorio_temporario), se informado, grava arquivos derivados junto e pode
+    retornar um dicionário de metadados para o manifesto.
+    """
+    destino = os.path.join(diretorio, hashlib.sha1(chave.encode('utf-8')).hexdigest()[:16])
+    if os.path.exists(os.path.join(destino, MANIFESTO)):
+        return destino
+
+    temporario = f'{destino}.tmp-{os.getpid()}-{uuid.uuid4().hex[:8]}'
+    os.makedirs(temporario)
+    try:
+        df = gerar()
+        metadados = {'chave': chave}
+        if complementar is not None:
+            metadados.update(complementar(df, temporario) or {})
+        salvar_colunas(df, temporario, metadados)
+        os.rename(temporario, destino)
+    except OSError:
+        # Outro processo materializou a mesma chave primeiro
+        if not os.path.exists(os.path.join(destino, MANIFESTO)):
+            raise
+    finally:
+        shutil.rmtree(temporario, ignore_errors=True)
+
+    # Versões antigas não são mais usadas; quem ainda as mapeia mantém o acesso
+    for nome in os.listdir(diretorio):
+        caminho = os.path.join(diretorio, nome)
+        if caminho != destino and '.tmp-' not in nome and os.path.isdir(caminho):
+            shutil.rmtree(caminho, ignore_errors=True)
+
+    return destino
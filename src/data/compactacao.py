@@ -0,0 +1,40 @@
+"""
+compactacao.py
+Representação compacta em memória do DataFrame de vendas.
+
+Dimensões de texto viram categorias (dicionário + códigos inteiros), inteiros
+são reduzidos ao menor tipo que comporta os valores e colunas derivadas, como
+a data formatada, deixam de ser materializadas por linha.
+"""
+import pandas as pd
+
+COLUNAS_CATEGORICAS = ['Região', 'Produto', 'Status', 'Mês']
+COLUNAS_DERIVADAS = ['Data_Formatada']
+
+
+def compactar_vendas(df, categoricas=COLUNAS_CATEGORICAS, derivadas=COLUNAS_DERIVADAS):
+    """Retorna uma cópia compacta do DataFrame de vendas"""
+    compacto = df.drop(columns=[c for c in derivadas if c in df.columns])
+
+    for coluna in categoricas:
+        if coluna in compacto.columns:
+            compacto[coluna] = compacto[coluna].astype('category')
+
+    for coluna in compacto.select_dtypes(include='integer').columns:
+        compacto[coluna] = pd.to_numeric(compacto[coluna], downcast='integer')
+
+    return compacto
+
+
+def relatorio_memoria(antes, depois):
+    """
+    Compara o uso de memória (bytes por coluna) de duas versões do DataFrame.
+    Colunas removidas aparecem com 0 bytes depois.
+    """
+    relatorio = pd.DataFrame({
+        'antes': antes.memory_usage(index=False, deep=True),
+        'depois': depois.memory_usage(index=False, deep=True),
+    }).fillna(0).astype('int64')
+    relatorio.loc['TOTAL'] = relatorio.sum()
+    relatorio['reducao'] = (relatorio['antes'] / relatorio['depois'].where(relatorio['depois'] > 0)).round(1)
+    return relatorio
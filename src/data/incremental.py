@@ -0,0 +1,113 @@
+"""
+incremental.py
+Leitura incremental de CSVs que só crescem por acréscimo no final.
+
+O leitor guarda até onde o arquivo já foi lido e uma assinatura dos bytes do
+começo e do trecho logo antes dessa posição. Se o arquivo cresceu e a
+assinatura continua igual, só a cauda nova é lida. Se ele foi truncado,
+substituído ou reescrito, a leitura volta a ser completa.
+"""
+import hashlib
+import io
+import os
+
+import pandas as pd
+
+from .load_data import DATAS_VENDAS, TIPOS_VENDAS, fim_ultima_linha, ler_csv_em_blocos
+
+TAMANHO_ASSINATURA = 4096
+
+
+class LeitorIncremental:
+    """Acompanha um CSV e devolve apenas as linhas acrescentadas desde a última leitura"""
+
+    def __init__(self, caminho, bytes_lidos=0, tipos=TIPOS_VENDAS, datas=DATAS_VENDAS):
+        self.caminho = caminho
+        self._tipos_base = tipos
+        self._datas_base = datas
+        self.bytes_lidos = 0
+        self._inode = None
+        self._assinatura = None
+        self._cabecalho = None
+        if bytes_lidos:
+            self._marcar(bytes_lidos)
+
+    def _marcar(self, bytes_lidos):
+        self.bytes_lidos = bytes_lidos
+        self._inode = os.stat(self.caminho).st_ino
+        self._assinatura = self._assinar(bytes_lidos)
+        self._cabecalho = pd.read_csv(self.caminho, nrows=0).columns.tolist()
+
+    def _assinar(self, ate):
+        with open(self.caminho, 'rb') as f:
+            inicio = f.read(min(ate, TAMANHO_ASSINATURA))
+            f.seek(max(0, ate - TAMANHO_ASSINATURA))
+            fim = f.read(min(ate, TAMANHO_ASSINATURA))
+        return hashlib.sha1(inicio + b'|' + fim).hexdigest()
+
+    def _tipos(self):
+        tipos = {c: t for c, t in self._tipos_base.items() if c in self._cabecalho}
+        datas = [c for c in self._datas_base if c in self._cabecalho]
+        return tipos, datas
+
+    def ler_completo(self):
+        """Lê todas as linhas completas do arquivo e recomeça o acompanhamento"""
+        fim = fim_ultima_linha(self.caminho, os.stat(self.caminho).st_size)
+        df = ler_csv_em_blocos(self.caminho, self._tipos_base, self._datas_base, limite_bytes=fim)
+        self._marcar(fim)
+        return df
+
+    def posicao(self):
+        """Até onde o arquivo foi lido, para retomar a leitura em outro processo com ler_ate()"""
+        return {'bytes_lidos': self.bytes_lidos, 'assinatura': self._assinatura}
+
+    def ler_ate(self, posicao):
+        """
+        Lê as linhas até uma posição gravada por posicao() e continua o
+        acompanhamento dali. Retorna None, sem ler nada, se o arquivo não
+        começa mais com os mesmos bytes.
+        """
+        bytes_lidos = (posicao or {}).get('bytes_lidos', 0)
+        try:
+            tamanho = os.stat(self.caminho).st_size
+        except FileNotFoundError:
+            return None
+        if not bytes_lidos or tamanho < bytes_lidos or self._assinar(bytes_lidos) != posicao.get('assinatura'):
+            return None
+        df = ler_csv_em_blocos(self.caminho, self._tipos_base, self._datas_base, limite_bytes=bytes_lidos)
+        self._marcar(bytes_lidos)
+        return df
+
+    def verificar(self):
+        """
+        Retorna ('delta', df) com as linhas novas, ('completo', df) quando o
+        arquivo foi truncado ou reescrito, ou (None, None) quando nada mudou.
+        """
+        try:
+            info = os.stat(self.caminho)
+        except FileNotFoundError:
+            return None, None
+
+        if (
+            not self.bytes_lidos
+            or info.st_ino != self._inode
+            or info.st_size < self.bytes_lidos
+            or self._assinar(self.bytes_lidos) != self._assinatura
+        ):
+            return 'completo', self.ler_completo()
+
+        fim = fim_ultima_linha(self.caminho, info.st_size)
+        if fim <= self.bytes_lidos:
+            return None, None
+
+        with open(self.caminho, 'rb') as f:
+            f.seek(self.bytes_lidos)
+            cauda = f.read(fim - self.bytes_lidos)
+
+        tipos, datas = self._tipos()
+        delta = pd.read_csv(
+            io.BytesIO(cauda), header=None, names=self._cabecalho, dtype=tipos, parse_dates=datas
+        )
+        self.bytes_lidos = fim
+        self._assinatura = self._assinar(fim)
+        return 'delta', delta
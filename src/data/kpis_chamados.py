@@ -0,0 +1,295 @@
+"""
+kpis_chamados.py
+KPIs do dataset de chamados (data/raw/chamados.csv).
+
+Totais, fechados, abertos, tempo médio de resolução e cumprimento do SLA,
+no geral e por responsavel/prioridade. Tudo é calculado com operações
+vetorizadas sobre data_abertura/data_fechamento.
+
+O motor guarda somas por grupo (não médias), então linhas novas entram em
+O(delta): um chamado novo soma no total e, se já vier fechado, nas somas de
+resolução; um chamado aberto que fecha soma só nas somas de resolução.
+Cada linha do CSV é uma versão do chamado e vale a última de cada id;
+chamados fechados são considerados finais, e versões que chegam depois do
+fechamento são ignoradas.
+
+Os percentis (p50/p90/p99) de tempo_atendimento vêm de t-digests por
+responsavel x prioridade (quantis.py), alimentados quando os chamados
+fecham e combinados para os totais ("Todos"). Os digests são gravados com a
+posição do CSV até onde foram alimentados; ao reiniciar, retomar() os
+carrega e só as linhas acrescentadas depois disso entram neles, enquanto as
+somas são recalculadas (vetorizadas) a partir das linhas já lidas.
+
+As tabelas seguem o formato dos arquivos kpis_*.csv de data/raw. Para
+gerá-las em data/processed (a partir de src/):
+    python -m data.kpis_chamados
+"""
+import argparse
+import logging
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from .incremental import LeitorIncremental
+from .load_data import ler_csv_em_blocos
+from .quantis import QuantisPorRecorte
+
+logger = logging.getLogger(__name__)
+
+TIPOS_CHAMADOS = {
+    'responsavel': 'category',
+    'prioridade': 'category',
+    'status': 'category',
+}
+DATAS_CHAMADOS = ['data_abertura', 'data_fechamento']
+
+DIMENSOES_CHAMADOS = ['responsavel', 'prioridade']
+SLA_HORAS = 24
+COLUNA_TEMPO = 'tempo_atendimento'
+
+SOMAS = ['tickets_total', 'tickets_fechados', 'soma_horas', 'dentro_sla']
+
+ARQUIVO_QUANTIS = 'quantis_tempo_atendimento.json'
+
+RAIZ_PROJETO = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def ler_chamados(caminho):
+    """Lê o CSV de chamados com tipos declarados e datas convertidas"""
+    return ler_csv_em_blocos(caminho, TIPOS_CHAMADOS, DATAS_CHAMADOS)
+
+
+def versoes_finais(df):
+    """
+    Uma linha por chamado: a última versão de cada id, desconsiderando as
+    que chegam depois da primeira versão fechada (o fechamento é final)
+    """
+    fechada = df['data_fechamento'].notna()
+    fechadas_antes = fechada.astype('int64').groupby(df['id'].to_numpy()).cumsum() - fechada
+    return df[(fechadas_antes == 0).to_numpy()].drop_duplicates('id', keep='last')
+
+
+def horas_resolucao(df):
+    """Horas entre abertura e fechamento (NaN para chamados abertos)"""
+    return (df['data_fechamento'] - df['data_abertura']) / np.timedelta64(1, 'h')
+
+
+def tempos_atendimento(df, coluna=COLUNA_TEMPO):
+    """Tempo de atendimento de cada chamado; sem a coluna, as horas de resolução"""
+    if coluna in df.columns:
+        return pd.to_numeric(df[coluna], errors='coerce')
+    return horas_resolucao(df)
+
+
+def somar(df, sla_horas=SLA_HORAS, por=None, contar_total=True):
+    """
+    Somas dos KPIs das linhas de df, no geral (Series) ou por coluna (DataFrame).
+    contar_total=False soma só os fechamentos, para chamados já contados.
+    """
+    horas = horas_resolucao(df)
+    fechado = horas.notna()
+    partes = pd.DataFrame({
+        'tickets_total': np.int64(contar_total),
+        'tickets_fechados': fechado.astype('int64'),
+        'soma_horas': horas.where(fechado, 0.0),
+        'dentro_sla': (horas <= sla_horas).astype('int64'),
+    }, index=df.index)
+
+    if por is None:
+        return partes.sum()
+    somas = partes.groupby(df[por], observed=True).sum()
+    somas.index = somas.index.astype(str)
+    return somas
+
+
+def indicadores(somas):
+    """Converte somas em KPIs: abertos, média de horas e % dentro do SLA"""
+    fechados = somas['tickets_fechados']
+    com_fechados = fechados.where(fechados > 0) if isinstance(fechados, pd.Series) else (fechados or np.nan)
+    return {
+        'total': somas['tickets_total'],
+        'fechados': fechados,
+        'abertos': somas['tickets_total'] - fechados,
+        'media_horas': somas['soma_horas'] / com_fechados,
+        'sla_pct': somas['dentro_sla'] / com_fechados * 100,
+    }
+
+
+class MotorKpisChamados:
+    """Somas dos KPIs de chamados, atualizáveis por delta"""
+
+    def __init__(self, sla_horas=SLA_HORAS, dimensoes=DIMENSOES_CHAMADOS, coluna_tempo=COLUNA_TEMPO):
+        self.sla_horas = sla_horas
+        self.dimensoes = list(dimensoes)
+        self.coluna_tempo = coluna_tempo
+        self.geral = pd.Series(0.0, index=SOMAS)
+        self.por_dimensao = {d: pd.DataFrame(columns=SOMAS, dtype='float64') for d in self.dimensoes}
+        self.quantis = QuantisPorRecorte(self.dimensoes)
+        # Chamados ainda abertos: id -> dimensões e data de abertura
+        self.abertos = pd.DataFrame(columns=self.dimensoes + ['data_abertura'])
+        # Ids de chamados já fechados (e contados): novas linhas deles são ignoradas
+        self.fechados = set()
+
+    @classmethod
+    def construir(cls, df, **parametros):
+        """Calcula os KPIs sobre o histórico inteiro"""
+        motor = cls(**parametros)
+        motor.atualizar(df)
+        return motor
+
+    @classmethod
+    def retomar(cls, leitor, caminho_quantis, **parametros):
+        """
+        Retoma o cálculo a partir dos digests gravados por salvar(): as linhas
+        até a posição gravada refazem só as somas, os digests vêm do arquivo
+        e as linhas seguintes são aplicadas normalmente. Sem arquivo válido,
+        ou com o CSV reescrito, calcula tudo do zero com construir().
+        """
+        motor = cls(**parametros)
+        try:
+            quantis = QuantisPorRecorte.carregar(caminho_quantis)
+        except (OSError, ValueError, KeyError):
+            quantis = None
+        lidas = None
+        if quantis is not None and quantis.dimensoes == motor.dimensoes:
+            lidas = leitor.ler_ate(quantis.metadados.get('leitura'))
+        if lidas is None:
+            return cls.construir(leitor.ler_completo(), **parametros)
+
+        motor.atualizar(lidas, com_quantis=False)
+        motor.quantis = quantis
+        logger.info('t-digests retomados de %s (%s linhas já aplicadas)', caminho_quantis, len(lidas))
+        tipo, df = leitor.verificar()
+        if tipo == 'delta':
+            motor.atualizar(df)
+        elif tipo == 'completo':
+            return cls.construir(df, **parametros)
+        return motor
+
+    def _acumular(self, df, contar_total):
+        if not len(df):
+            return
+        self.geral = self.geral.add(somar(df, self.sla_horas, contar_total=contar_total), fill_value=0)
+        for dimensao in self.dimensoes:
+            self.por_dimensao[dimensao] = self.por_dimensao[dimensao].add(
+                somar(df, self.sla_horas, por=dimensao, contar_total=contar_total), fill_value=0
+            )
+
+    def atualizar(self, delta, com_quantis=True):
+        """
+        Aplica linhas novas do CSV: chamados novos (abertos ou já fechados) e
+        novas versões de chamados abertos. Linhas de chamados já fechados
+        são ignoradas. O custo depende do delta e do número de chamados
+        abertos, não do histórico. com_quantis=False não alimenta os
+        digests (usado por retomar(), que os lê do arquivo).
+        """
+        delta = versoes_finais(delta).set_index('id')
+        delta = delta[~delta.index.isin(self.fechados)]
+        conhecido = delta.index.isin(self.abertos.index)
+
+        novos = delta[~conhecido]
+        # Quem fecha mantém as dimensões e a abertura com que foi contado
+        colunas = ['data_fechamento'] + [c for c in [self.coluna_tempo] if c in delta.columns]
+        fechando = delta.loc[conhecido & delta['data_fechamento'].notna().to_numpy(), colunas]
+        fechando = fechando.join(self.abertos)
+
+        self._acumular(novos, contar_total=True)
+        self._acumular(fechando, contar_total=False)
+
+        for fechados in (novos[novos['data_fechamento'].notna()], fechando):
+            if com_quantis and len(fechados):
+                self.quantis.adicionar(fechados, tempos_atendimento(fechados, self.coluna_tempo))
+
+        self.fechados.update(novos.index[novos['data_fechamento'].notna()].tolist())
+        self.fechados.update(fechando.index.tolist())
+        partes = [self.abertos.drop(fechando.index), novos.loc[novos['data_fechamento'].isna(), self.abertos.columns]]
+        self.abertos = pd.concat([p for p in partes if len(p)] or partes[:1])
+        return len(novos), len(fechando)
+
+    def relatorio(self):
+        """Linha única no formato de kpis_report.csv"""
+        kpis = indicadores(self.geral)
+        return pd.DataFrame([{
+            'total_tickets': int(kpis['total']),
+            'tickets_fechados': int(kpis['fechados']),
+            'tickets_abertos': int(kpis['abertos']),
+            'avg_resolution_hours': kpis['media_horas'],
+            'sla_compliance_pct': kpis['sla_pct'],
+        }])
+
+    def resumo(self):
+        """Formato métrica/valor de kpis_summary.csv"""
+        linha = self.relatorio().iloc[0].astype('float64')
+        return pd.DataFrame({'metric': linha.index, 'value': linha.to_numpy()})
+
+    def por(self, dimensao):
+        """KPIs por valor da dimensão, no formato de kpis_por_responsavel.csv"""
+        somas = self.por_dimensao[dimensao]
+        kpis = indicadores(somas)
+        tabela = pd.DataFrame({
+            dimensao: somas.index.astype(str),
+            'tickets_total': kpis['total'].astype('int64').to_numpy(),
+            'tickets_fechados': kpis['fechados'].astype('int64').to_numpy(),
+            'avg_resolution_hours': kpis['media_horas'].to_numpy(),
+            'sla_pct': kpis['sla_pct'].to_numpy(),
+        })
+        return tabela.sort_values(dimensao, ignore_index=True)
+
+    def percentis(self, dimensao):
+        """p50/p90/p99 de tempo de atendimento por valor da dimensão e para todos"""
+        tabela = self.quantis.tabela(dimensao)
+        return tabela.rename(columns={c: f'{c}_{self.coluna_tempo}' for c in tabela.columns[1:]})
+
+    def salvar(self, diretorio, leitura=None):
+        """
+        Grava kpis_report, kpis_summary, kpis_por_<dimensão> e
+        kpis_percentis_por_<dimensão> em CSV, mais os t-digests em JSON com
+        leitura (LeitorIncremental.posicao()), a posição do CSV já aplicada
+        """
+        os.makedirs(diretorio, exist_ok=True)
+        self.relatorio().to_csv(os.path.join(diretorio, 'kpis_report.csv'), index=False)
+        self.resumo().to_csv(os.path.join(diretorio, 'kpis_summary.csv'), index=False)
+        for dimensao in self.dimensoes:
+            self.por(dimensao).to_csv(os.path.join(diretorio, f'kpis_por_{dimensao}.csv'), index=False)
+            self.percentis(dimensao).to_csv(os.path.join(diretorio, f'kpis_percentis_por_{dimensao}.csv'), index=False)
+        self.quantis.metadados = {'leitura': leitura}
+        self.quantis.salvar(os.path.join(diretorio, ARQUIVO_QUANTIS))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Calcula os KPIs do CSV de chamados')
+    parser.add_argument('--entrada', default=os.path.join(RAIZ_PROJETO, 'data', 'raw', 'chamados.csv'))
+    parser.add_argument('--saida', default=os.path.join(RAIZ_PROJETO, 'data', 'processed'))
+    parser.add_argument('--sla-horas', type=float, default=SLA_HORAS)
+    parser.add_argument('--acompanhar', type=float, default=0,
+                        help='segundos entre verificações do CSV; linhas novas atualizam os KPIs por delta')
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(name)s: %(message)s')
+
+    leitor = LeitorIncremental(args.entrada, tipos=TIPOS_CHAMADOS, datas=DATAS_CHAMADOS)
+    inicio = time.perf_counter()
+    motor = MotorKpisChamados.retomar(leitor, os.path.join(args.saida, ARQUIVO_QUANTIS), sla_horas=args.sla_horas)
+    motor.salvar(args.saida, leitor.posicao())
+    logger.info('KPIs de %s chamados gravados em %s (%.3f s)',
+                int(motor.geral['tickets_total']), args.saida, time.perf_counter() - inicio)
+
+    while args.acompanhar > 0:
+        time.sleep(args.acompanhar)
+        tipo, df = leitor.verificar()
+        if tipo is None:
+            continue
+        inicio = time.perf_counter()
+        if tipo == 'delta':
+            novos, fechados = motor.atualizar(df)
+            logger.info('%s chamados novos, %s fechados', novos, fechados)
+        else:
+            motor = MotorKpisChamados.construir(df, sla_horas=args.sla_horas)
+            logger.info('Arquivo reescrito; KPIs recalculados')
+        motor.salvar(args.saida, leitor.posicao())
+        logger.info('KPIs atualizados em %.3f s', time.perf_counter() - inicio)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,14 +1,153 @@
 import pandas as pd
+import io
+import logging
 import os
+import time
 
-def carregar_dados():
+from pandas.api.types import union_categoricals
+
+from .colunar import abrir_colunas, ler_manifesto, materializar
+
+logger = logging.getLogger(__name__)
+
+# Tipos declarados das colunas conhecidas do export de vendas; colunas fora
+# desta lista continuam com o tipo inferido pelo pandas
+TIPOS_VENDAS = {
+    'Região': 'category',
+    'Produto': 'category',
+    'Status': 'category',
+    'Mês': 'category',
+    'Quantidade': 'int64',
+    'Valor': 'float64',
+}
+DATAS_VENDAS = ['Data']
+
+TAMANHO_BLOCO = 1_000_000
+
+
+def caminho_padrao():
+    return os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "dados.csv")
+
+
+class _ArquivoLimitado(io.RawIOBase):
+    """Expõe apenas os primeiros `limite` bytes de um arquivo binário"""
+
+    def __init__(self, arquivo, limite):
+        self._arquivo = arquivo
+        self._restante = limite
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        n = min(len(buffer), self._restante)
+        if n <= 0:
+            return 0
+        lidos = self._arquivo.readinto(memoryview(buffer)[:n])
+        self._restante -= lidos
+        return lidos
+
+
+def fim_ultima_linha(caminho, limite):
+    """Posição logo após a última quebra de linha antes de `limite` (0 se não houver linha completa)"""
+    passo = 64 * 1024
+    with open(caminho, 'rb') as f:
+        fim = limite
+        while fim > 0:
+            inicio = max(0, fim - passo)
+            f.seek(inicio)
+            pos = f.read(fim - inicio).rfind(b'\n')
+            if pos >= 0:
+                return inicio + pos + 1
+            fim = inicio
+    return 0
+
+
+def _concatenar(partes):
+    """Concatena os blocos de uma coluna, unindo os dicionários das categóricas"""
+    if isinstance(partes[0].dtype, pd.CategoricalDtype):
+        return pd.Series(union_categoricals(partes), name=partes[0].name)
+    return pd.concat(partes, ignore_index=True)
+
+
+def ler_csv_em_blocos(caminho, tipos=TIPOS_VENDAS, datas=DATAS_VENDAS, tamanho_bloco=TAMANHO_BLOCO,
+                      limite_bytes=None):
+    """
+    Lê o CSV em blocos com tipos declarados. Cada bloco é convertido para a
+    forma compacta (categorias, inteiros reduzidos) antes do próximo ser lido,
+    então o pico de memória fica perto do tamanho final e não do texto do CSV.
+    Com limite_bytes, só os bytes anteriores a essa posição são lidos.
+    """
+    cabecalho = pd.read_csv(caminho, nrows=0).columns
+    tipos = {c: t for c, t in tipos.items() if c in cabecalho}
+    datas = [c for c in datas if c in cabecalho]
+
+    partes = {c: [] for c in cabecalho}
+    with open(caminho, 'rb') as arquivo:
+        fonte = arquivo if limite_bytes is None else io.BufferedReader(_ArquivoLimitado(arquivo, limite_bytes))
+        for bloco in pd.read_csv(fonte, dtype=tipos, parse_dates=datas, chunksize=tamanho_bloco):
+            for coluna in bloco.columns:
+                serie = bloco[coluna]
+                if pd.api.types.is_integer_dtype(serie.dtype):
+                    serie = pd.to_numeric(serie, downcast='integer')
+                partes[coluna].append(serie)
+
+    if not partes or not next(iter(partes.values())):
+        return pd.read_csv(io.StringIO(','.join(cabecalho) + '\n'), dtype=tipos, parse_dates=datas)
+
+    df = pd.DataFrame({c: _concatenar(p) for c, p in partes.items()})
+    # Blocos diferentes podem ter sido reduzidos para tipos diferentes
+    for coluna in df.select_dtypes(include='integer').columns:
+        df[coluna] = pd.to_numeric(df[coluna], downcast='integer')
+    return df
+
+
+def carregar_dados(colunas=None, diretorio_colunar=None, caminho=None):
     """
     Lê o arquivo dados.csv que deve estar na pasta raiz do projeto.
     Retorna um DataFrame pandas.
+
+    Na primeira leitura o CSV é importado em blocos e gravado como cache
+    colunar (.npy por coluna) ao lado do arquivo, ou em diretorio_colunar.
+    O cache é refeito quando o tamanho ou a data de modificação do CSV
+    mudam. As leituras seguintes mapeiam o cache em memória somente leitura,
+    apenas com as colunas pedidas, e o DataFrame é compartilhado entre
+    processos. Os tempos de carga a frio e a quente vão para o log.
+
+    Só linhas completas são importadas; df.attrs['bytes_lidos'] guarda até
+    onde o arquivo foi lido, para que LeitorIncremental continue dali, e
+    df.attrs['chave'] identifica a versão do CSV que está no cache.
     """
-    caminho = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "dados.csv")
+    caminho = caminho or caminho_padrao()
 
     if not os.path.exists(caminho):
         raise FileNotFoundError(f"Arquivo dados.csv não encontrado no caminho: {caminho}")
 
-    return pd.read_csv(caminho)
+    if diretorio_colunar is None:
+        diretorio_colunar = os.path.splitext(caminho)[0] + '.colunas'
+
+    inicio = time.perf_counter()
+    info = os.stat(caminho)
+    chave = f"{os.path.abspath(caminho)}|{info.st_size}|{info.st_mtime_ns}"
+
+    bytes_lidos = fim_ultima_linha(caminho, info.st_size)
+
+    importou = []
+    def importar():
+        importou.append(True)
+        return ler_csv_em_blocos(caminho, limite_bytes=bytes_lidos)
+
+    destino = materializar(
+        diretorio_colunar, chave, importar, lambda df, d: {'bytes_lidos': bytes_lidos}
+    )
+    df = abrir_colunas(destino, colunas=colunas)
+    metadados = ler_manifesto(destino)['metadados']
+    df.attrs['bytes_lidos'] = metadados['bytes_lidos']
+    df.attrs['chave'] = metadados['chave']
+
+    logger.info(
+        'carregar_dados: %s linhas de %s em %.3f s (%s)',
+        len(df), os.path.basename(caminho), time.perf_counter() - inicio,
+        'cache frio, CSV importado' if importou else 'cache quente',
+    )
+    return df
@@ -0,0 +1,195 @@
+"""
+quantis.py
+Percentis aproximados com t-digest, atualizáveis e combináveis.
+
+Um TDigest resume uma distribuição em poucos centroides (média e peso),
+menores nas caudas, onde os percentis altos precisam de precisão. Valores
+novos vão para um buffer; quando ele enche, centroides e buffer são
+ordenados e reagrupados de uma vez: cada ponto recebe o índice
+floor(k(q)) da função de escala k1 = compressao / (2 pi) * asin(2q - 1) e
+os pontos de mesmo índice viram um centroide (np.add.reduceat). Combinar
+digests é o mesmo reagrupamento sobre os centroides de todos.
+
+QuantisPorRecorte mantém um digest por combinação de dimensões (por
+exemplo responsavel x prioridade) e combina os digests dos recortes pedidos;
+filtros vazios ("Todos") combinam todos.
+"""
+import json
+
+import numpy as np
+import pandas as pd
+
+COMPRESSAO = 200
+PERCENTIS = (0.5, 0.9, 0.99)
+
+
+class TDigest:
+    """Resumo de uma distribuição para estimar percentis"""
+
+    def __init__(self, compressao=COMPRESSAO, medias=(), pesos=(), minimo=np.inf, maximo=-np.inf):
+        self.compressao = compressao
+        self.medias = np.asarray(medias, dtype=np.float64)
+        self.pesos = np.asarray(pesos, dtype=np.float64)
+        self.minimo = float(minimo)
+        self.maximo = float(maximo)
+        self._buffer = []
+        self._no_buffer = 0
+
+    @property
+    def contagem(self):
+        return float(self.pesos.sum()) + self._no_buffer
+
+    def adicionar(self, valores):
+        """Acrescenta valores (NaN são ignorados)"""
+        valores = np.asarray(valores, dtype=np.float64).ravel()
+        valores = valores[~np.isnan(valores)]
+        if not len(valores):
+            return self
+        self.minimo = min(self.minimo, float(valores.min()))
+        self.maximo = max(self.maximo, float(valores.max()))
+        self._buffer.append(valores)
+        self._no_buffer += len(valores)
+        if self._no_buffer >= 10 * self.compressao:
+            self._comprimir()
+        return self
+
+    def _comprimir(self):
+        if not self._buffer:
+            return
+        novos = np.concatenate(self._buffer)
+        self.medias, self.pesos = self._agrupar(
+            np.concatenate([self.medias, novos]),
+            np.concatenate([self.pesos, np.ones(len(novos))]),
+        )
+        self._buffer, self._no_buffer = [], 0
+
+    def _agrupar(self, medias, pesos):
+        ordem = np.argsort(medias, kind='stable')
+        medias, pesos = medias[ordem], pesos[ordem]
+
+        total = pesos.sum()
+        q = (np.cumsum(pesos) - pesos / 2) / total
+        k = np.floor(self.compressao / (2 * np.pi) * np.arcsin(2 * q - 1))
+        inicios = np.flatnonzero(np.r_[True, np.diff(k) != 0])
+
+        pesos_agrupados = np.add.reduceat(pesos, inicios)
+        return np.add.reduceat(medias * pesos, inicios) / pesos_agrupados, pesos_agrupados
+
+    @classmethod
+    def combinar(cls, digests, compressao=COMPRESSAO):
+        """Novo digest equivalente a todos os valores dos digests informados"""
+        combinado = cls(compressao)
+        partes = [d for d in digests if d.contagem]
+        if not partes:
+            return combinado
+        for d in partes:
+            d._comprimir()
+        combinado.medias, combinado.pesos = combinado._agrupar(
+            np.concatenate([d.medias for d in partes]),
+            np.concatenate([d.pesos for d in partes]),
+        )
+        combinado.minimo = min(d.minimo for d in partes)
+        combinado.maximo = max(d.maximo for d in partes)
+        return combinado
+
+    def quantis(self, qs=PERCENTIS):
+        """Estimativas dos percentis qs (frações entre 0 e 1); NaN se vazio"""
+        self._comprimir()
+        qs = np.asarray(qs, dtype=np.float64)
+        if not len(self.pesos):
+            return np.full(qs.shape, np.nan)
+
+        total = self.pesos.sum()
+        # Cada centroide representa seu peso centrado na média; min e max fecham as pontas
+        posicoes = np.r_[0.0, np.cumsum(self.pesos) - self.pesos / 2, total]
+        valores = np.r_[self.minimo, self.medias, self.maximo]
+        return np.interp(qs * total, posicoes, valores)
+
+    def para_dict(self):
+        self._comprimir()
+        return {
+            'compressao': self.compressao,
+            'medias': self.medias.tolist(),
+            'pesos': self.pesos.tolist(),
+            'minimo': self.minimo if np.isfinite(self.minimo) else None,
+            'maximo': self.maximo if np.isfinite(self.maximo) else None,
+        }
+
+    @classmethod
+    def de_dict(cls, dados):
+        return cls(
+            dados['compressao'], dados['medias'], dados['pesos'],
+            np.inf if dados['minimo'] is None else dados['minimo'],
+            -np.inf if dados['maximo'] is None else dados['maximo'],
+        )
+
+
+class QuantisPorRecorte:
+    """Um TDigest por combinação de valores das dimensões"""
+
+    def __init__(self, dimensoes, compressao=COMPRESSAO):
+        self.dimensoes = list(dimensoes)
+        self.compressao = compressao
+        self.digests = {}
+        # Informações de quem grava (por exemplo, até onde a fonte foi lida)
+        self.metadados = {}
+
+    def adicionar(self, df, valores):
+        """Acrescenta os valores (Series alinhada a df) ao recorte de cada linha"""
+        valores = pd.Series(np.asarray(valores, dtype=np.float64), index=df.index)
+        valores = valores[valores.notna()]
+        if not len(valores):
+            return
+        chaves = [df.loc[valores.index, d].astype(str) for d in self.dimensoes]
+        for chave, serie in valores.groupby(chaves, observed=True):
+            chave = chave if isinstance(chave, tuple) else (chave,)
+            digest = self.digests.get(chave)
+            if digest is None:
+                digest = self.digests[chave] = TDigest(self.compressao)
+            digest.adicionar(serie.to_numpy())
+
+    def digest(self, filtros=None):
+        """Digest combinado dos recortes que atendem a {dimensão: valor} (vazio = todos)"""
+        filtros = {d: v for d, v in (filtros or {}).items() if v}
+        posicoes = {d: self.dimensoes.index(d) for d in filtros}
+        selecionados = [
+            digest for chave, digest in self.digests.items()
+            if all(chave[posicoes[d]] == str(v) for d, v in filtros.items())
+        ]
+        return TDigest.combinar(selecionados, self.compressao)
+
+    def quantis(self, filtros=None, qs=PERCENTIS):
+        return self.digest(filtros).quantis(qs)
+
+    def tabela(self, dimensao, qs=PERCENTIS, rotulo_todos='Todos'):
+        """Percentis por valor da dimensão, mais a linha combinada de todos"""
+        valores = sorted({chave[self.dimensoes.index(dimensao)] for chave in self.digests})
+        linhas = [(v, self.quantis({dimensao: v}, qs)) for v in valores] + [(rotulo_todos, self.quantis(None, qs))]
+        return pd.DataFrame(
+            [[v, *q] for v, q in linhas],
+            columns=[dimensao] + [f'p{round(q * 100):g}' for q in qs],
+        )
+
+    def para_dict(self):
+        return {
+            'dimensoes': self.dimensoes,
+            'compressao': self.compressao,
+            'recortes': [{'chave': list(c), 'digest': d.para_dict()} for c, d in self.digests.items()],
+            'metadados': self.metadados,
+        }
+
+    @classmethod
+    def de_dict(cls, dados):
+        quantis = cls(dados['dimensoes'], dados['compressao'])
+        quantis.digests = {tuple(r['chave']): TDigest.de_dict(r['digest']) for r in dados['recortes']}
+        quantis.metadados = dados.get('metadados', {})
+        return quantis
+
+    def salvar(self, caminho):
+        with open(caminho, 'w', encoding='utf-8') as f:
+            json.dump(self.para_dict(), f, ensure_ascii=False)
+
+    @classmethod
+    def carregar(cls, caminho):
+        with open(caminho, encoding='utf-8') as f:
+            return cls.de_dict(json.load(f))
@@ -0,0 +1,112 @@
+"""
+simulacao.py
+Gerador de vendas simuladas em qualquer escala.
+
+Os sorteios são feitos em blocos sobre arrays pré-alocados de códigos
+inteiros, então gerar 10M-100M linhas não cria objetos Python por linha.
+Com os parâmetros padrão o resultado é idêntico ao dataset de 500 linhas
+que o dashboard sempre usou (mesma semente, mesma ordem de sorteios).
+
+A assimetria segue uma lei de Zipf: o i-ésimo valor de região e de produto
+tem peso 1 / i ** assimetria (0 = distribuição uniforme).
+"""
+import numpy as np
+import pandas as pd
+
+REGIOES = ['Norte', 'Nordeste', 'Centro-Oeste', 'Sudeste', 'Sul']
+PRODUTOS = ['Produto A', 'Produto B', 'Produto C', 'Produto D']
+STATUS = ['Completo', 'Pendente']
+PROPORCAO_STATUS = [0.9, 0.1]
+QUANTIDADE = (50, 300)
+VALOR = (1000, 10000)
+
+TAMANHO_BLOCO = 1_000_000
+
+
+def nomes_dimensao(base, quantidade, prefixo):
+    """Os primeiros `quantidade` nomes de base, completados com '<prefixo> <n>'"""
+    return list(base[:quantidade]) + [f'{prefixo} {i + 1}' for i in range(len(base), quantidade)]
+
+
+def pesos_zipf(quantidade, assimetria):
+    """Probabilidades de Zipf para `quantidade` valores (None = uniforme)"""
+    if not assimetria:
+        return None
+    pesos = 1.0 / np.arange(1, quantidade + 1) ** assimetria
+    return pesos / pesos.sum()
+
+
+def _sortear(rng, quantidade, n, pesos=None):
+    # Sem pesos, choice() e randint() consomem o gerador da mesma forma
+    if pesos is None:
+        return rng.randint(0, quantidade, n)
+    return rng.choice(quantidade, n, p=pesos)
+
+
+def _categoria(valores_por_codigo, codigos):
+    """Categórica com categorias ordenadas a partir de códigos que indexam valores_por_codigo"""
+    base = pd.Categorical(valores_por_codigo)
+    return pd.Categorical.from_codes(base.codes[codigos], base.categories)
+
+
+def _tipo_codigo(quantidade):
+    return np.min_scalar_type(-max(quantidade, 1))
+
+
+def gerar_vendas(linhas=500, regioes=5, produtos=4, dias=121, inicio='2024-01-01',
+                 assimetria=0.0, semente=42, compacto=False, tamanho_bloco=TAMANHO_BLOCO):
+    """
+    Gera um DataFrame de vendas simuladas.
+
+    linhas, regioes, produtos e dias controlam o volume e a cardinalidade de
+    cada dimensão; assimetria concentra as vendas nas primeiras regiões e
+    produtos. Com compacto=True as dimensões já saem categóricas, os
+    inteiros reduzidos e sem Data_Formatada (a forma de compactar_vendas),
+    o que é necessário para dezenas de milhões de linhas.
+    """
+    nomes_regioes = np.asarray(nomes_dimensao(REGIOES, regioes, 'Região'))
+    nomes_produtos = np.asarray(nomes_dimensao(PRODUTOS, produtos, 'Produto'))
+    datas = pd.date_range(start=inicio, periods=dias, freq='D')
+    pesos_regioes = pesos_zipf(regioes, assimetria)
+    pesos_produtos = pesos_zipf(produtos, assimetria)
+
+    codigo_data = np.empty(linhas, dtype=_tipo_codigo(dias))
+    codigo_regiao = np.empty(linhas, dtype=_tipo_codigo(regioes))
+    codigo_produto = np.empty(linhas, dtype=_tipo_codigo(produtos))
+    codigo_status = np.empty(linhas, dtype=np.int8)
+    quantidade = np.empty(linhas, dtype=np.int16)
+    valor = np.empty(linhas, dtype=np.float64)
+
+    rng = np.random.RandomState(semente)
+    for inicio_bloco in range(0, linhas, tamanho_bloco):
+        bloco = slice(inicio_bloco, min(inicio_bloco + tamanho_bloco, linhas))
+        n = bloco.stop - bloco.start
+        codigo_data[bloco] = _sortear(rng, dias, n)
+        codigo_regiao[bloco] = _sortear(rng, regioes, n, pesos_regioes)
+        codigo_produto[bloco] = _sortear(rng, produtos, n, pesos_produtos)
+        quantidade[bloco] = rng.randint(*QUANTIDADE, n)
+        valor[bloco] = rng.uniform(*VALOR, n)
+        codigo_status[bloco] = rng.choice(len(STATUS), n, p=PROPORCAO_STATUS)
+
+    if not compacto:
+        df = pd.DataFrame({
+            'Data': datas.to_numpy()[codigo_data],
+            'Região': nomes_regioes[codigo_regiao],
+            'Produto': nomes_produtos[codigo_produto],
+            'Quantidade': quantidade.astype(np.int64),
+            'Valor': valor,
+            'Status': np.asarray(STATUS)[codigo_status],
+        })
+        df['Mês'] = df['Data'].dt.strftime('%B')
+        df['Data_Formatada'] = df['Data'].dt.strftime('%d/%m/%Y')
+        return df
+
+    return pd.DataFrame({
+        'Data': datas.to_numpy()[codigo_data],
+        'Região': _categoria(nomes_regioes, codigo_regiao),
+        'Produto': _categoria(nomes_produtos, codigo_produto),
+        'Quantidade': quantidade,
+        'Valor': valor,
+        'Status': _categoria(STATUS, codigo_status),
+        'Mês': _categoria(datas.strftime('%B'), codigo_data),
+    })
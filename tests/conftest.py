@@ -0,0 +1,6 @@
+import os
+import sys
+
+RAIZ_PROJETO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(RAIZ_PROJETO, 'src'))
+sys.path.insert(0, os.path.join(RAIZ_PROJETO, 'src', 'dashboard'))
@@ -0,0 +1,36 @@
+import numpy as np
+import pandas as pd
+
+from data.backlog import BacklogChamados
+from data.kpis_chamados import MotorKpisChamados
+from test_kpis_chamados import historico
+
+
+def abertos_por_forca_bruta(linhas, periodos):
+    """Backlog no fim de cada período contando chamado a chamado, com a versão final de cada um"""
+    finais = {}
+    for linha in linhas.itertuples(index=False):
+        anterior = finais.get(linha.id)
+        if anterior is None or pd.isna(anterior.data_fechamento):
+            finais[linha.id] = linha
+    contagens = []
+    for proximo in (periodos + 1).start_time:
+        contagens.append(sum(
+            c.data_abertura < proximo and (pd.isna(c.data_fechamento) or c.data_fechamento >= proximo)
+            for c in finais.values()
+        ))
+    return np.array(contagens)
+
+
+def test_backlog_usa_a_versao_final_de_cada_chamado():
+    linhas = historico()
+    # Versões que chegam depois do fechamento não reabrem o chamado
+    fechadas = linhas[linhas['data_fechamento'].notna()].iloc[:15]
+    linhas = pd.concat([linhas, fechadas.assign(status='Aberto', data_fechamento=pd.NaT)], ignore_index=True)
+
+    serie = BacklogChamados.construir(linhas).serie('semana')
+    periodos = pd.period_range(serie.index[0], serie.index[-1], freq='W')
+
+    np.testing.assert_array_equal(serie.to_numpy(), abertos_por_forca_bruta(linhas, periodos))
+    # No fim, o mesmo número de abertos que o motor de KPIs
+    assert serie.iloc[-1] == MotorKpisChamados.construir(linhas).relatorio()['tickets_abertos'].iloc[0]
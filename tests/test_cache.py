@@ -0,0 +1,63 @@
+import sqlite3
+import threading
+from functools import reduce
+
+import pandas as pd
+
+from cache import CacheDisco, calcular_versao, combinar_versoes
+from data.simulacao import gerar_vendas
+
+
+def test_versao_combinada_nao_depende_da_divisao_em_blocos():
+    df = gerar_vendas()
+    esperado = calcular_versao(df)
+
+    for cortes in ([300, 400], [300], [1, 250, 499]):
+        limites = [0, *cortes, len(df)]
+        blocos = [df.iloc[a:b] for a, b in zip(limites, limites[1:])]
+        assert reduce(combinar_versoes, map(calcular_versao, blocos)) == esperado
+
+    assert combinar_versoes(calcular_versao(pd.DataFrame()), esperado) == esperado
+
+
+def test_cache_disco_conta_e_descarta_sem_passar_do_limite(tmp_path):
+    caminho = str(tmp_path / 'resultados.sqlite')
+    cache, outro_processo = CacheDisco(caminho, 20_000), CacheDisco(caminho, 20_000)
+    valor = 'x' * 1000
+
+    for i in range(60):
+        cache.guardar(('k', i), 'v1', valor)
+    assert cache.obter(('k', 59), 'v1') == (True, valor)
+    assert cache.obter(('k', 0), 'v1') == (False, None)
+    assert outro_processo.obter(('k', 58), 'v1') == (True, valor)
+    # contem() (usado pelo aquecimento) não entra nos contadores
+    assert cache.contem(('k', 59), 'v1') and not cache.contem(('k', 0), 'v1')
+
+    estatisticas = cache.estatisticas()
+    assert estatisticas['bytes'] <= 20_000
+    assert estatisticas['itens'] < 60
+    assert (estatisticas['hits'], estatisticas['misses']) == (1, 1)
+    # Os contadores de cada processo aparecem para todos depois de gravados
+    assert outro_processo.estatisticas()['hits'] == 2
+
+    cache.descartar_outras_versoes('v2')
+    assert cache.estatisticas()['bytes'] == 0
+
+
+def test_cache_disco_total_de_bytes_com_gravacoes_concorrentes(tmp_path):
+    caminho = str(tmp_path / 'resultados.sqlite')
+    caches = [CacheDisco(caminho, 10_000_000) for _ in range(4)]
+
+    def gravar(cache):
+        for i in range(50):
+            cache.guardar(('k', i % 10), 'v1', 'x' * (100 + i % 10))
+
+    threads = [threading.Thread(target=gravar, args=(c,)) for c in caches]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    con = sqlite3.connect(caminho)
+    contador, = con.execute("SELECT valor FROM contadores WHERE nome = 'bytes'").fetchone()
+    assert contador == caches[0].estatisticas()['bytes']
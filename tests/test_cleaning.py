@@ -0,0 +1,21 @@
+import logging
+
+import pandas as pd
+
+from data.cleaning import infer_date_format, parse_dates
+
+
+def test_parse_dates_com_formatos_misturados(caplog):
+    valores = pd.Series(['05/03/2024'] * 30 + ['06/03/2024 14:30', '07/03/2024 09:05:10', 'não é data', None, ''], name='data')
+    formato = infer_date_format(valores)
+    assert formato == '%d/%m/%Y'
+
+    with caplog.at_level(logging.WARNING, logger='data.cleaning'):
+        datas = parse_dates(valores, formato)
+
+    assert (datas.iloc[:30] == pd.Timestamp('2024-03-05')).all()
+    assert datas.iloc[30] == pd.Timestamp('2024-03-06 14:30')
+    assert datas.iloc[31] == pd.Timestamp('2024-03-07 09:05:10')
+    assert datas.iloc[32:].isna().all()
+    # Só o texto que não é data conta como falha; nulos e vazios não
+    assert '1 values (1 distinct)' in caplog.text
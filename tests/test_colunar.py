@@ -0,0 +1,25 @@
+import pandas as pd
+import pytest
+
+from data.colunar import abrir_colunas, salvar_colunas
+
+
+def test_salvar_colunas_com_fuso_e_tipos_anulaveis(tmp_path):
+    df = pd.DataFrame({
+        'Data': pd.date_range('2024-01-01', periods=4, freq='h', tz='America/Sao_Paulo').as_unit('ns'),
+        'Quantidade': pd.array([1, None, 3, 4], dtype='Int64'),
+        'Ativo': pd.array([True, None, False, True], dtype='boolean'),
+        'Região': pd.array(['Sul', None, 'Norte', 'Sul'], dtype='string'),
+        'Valor': [1.0, 2.0, 3.0, 4.0],
+    })
+    salvar_colunas(df, str(tmp_path))
+    lido = abrir_colunas(str(tmp_path))
+
+    pd.testing.assert_frame_equal(lido.drop(columns='Região'), df.drop(columns='Região'))
+    assert lido['Região'].astype(object).where(lido['Região'].notna(), None).tolist() == ['Sul', None, 'Norte', 'Sul']
+
+
+def test_salvar_colunas_rejeita_categorias_que_nao_sao_texto_nem_numero(tmp_path):
+    df = pd.DataFrame({'Periodo': pd.period_range('2024-01', periods=3, freq='M')})
+    with pytest.raises(TypeError, match='Periodo'):
+        salvar_colunas(df, str(tmp_path))
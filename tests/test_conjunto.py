@@ -0,0 +1,64 @@
+import numpy as np
+import pandas as pd
+
+from conjunto import ConjuntoVendas
+from cubo import filtros_por_coluna
+from data.simulacao import gerar_vendas
+from tabela import pagina_detalhes
+
+
+def vendas():
+    df = gerar_vendas(linhas=2000, compacto=True)
+    # Uma região que só aparece nas linhas acrescentadas e fica antes das outras na ordem
+    novas = np.arange(len(df)) % 7 == 0
+    novas[:1500] = False
+    regiao = df['Região'].astype(str).where(~novas, 'Acre')
+    return df.assign(Região=regiao.astype('category'))
+
+
+def acrescentar(df, cortes):
+    limites = [*cortes, len(df)]
+    conjunto = ConjuntoVendas.construir(df.iloc[:limites[0]].reset_index(drop=True))
+    for a, b in zip(limites, limites[1:]):
+        conjunto = conjunto.com_linhas(df.iloc[a:b])
+    return conjunto
+
+
+def test_linhas_acrescentadas_em_segmentos_equivalem_ao_conjunto_completo():
+    df = vendas()
+    completo = ConjuntoVendas.construir(df)
+    incremental = acrescentar(df, [1000, 1200, 1210, 1400, 1401, 1800])
+
+    # O bloco base não é copiado e os acréscimos são juntados em poucos segmentos
+    assert len(incremental.linhas.segmentos[0].df) == 1000
+    assert len(incremental.linhas.segmentos) < 6
+    assert incremental.versao == completo.versao
+    for coluna in ['Mês', 'Região', 'Produto']:
+        assert incremental.valores(coluna) == sorted(completo.valores(coluna))
+    assert incremental.valores('Região')[0] == 'Acre'
+
+    consultas = [
+        ({}, (None, None)),
+        ({'regiao': 'Acre'}, (None, None)),
+        ({'produto': completo.valores('Produto')[1]}, ('2024-02-01', '2024-03-15')),
+        ({}, ('2024-04-01', None)),
+    ]
+    for filtros, periodo in consultas:
+        filtros = filtros_por_coluna(**filtros)
+        ids_completo = completo.linhas.filtrar(filtros, periodo)
+        ids_incremental = incremental.linhas.filtrar(filtros, periodo)
+        if ids_completo is None:
+            assert ids_incremental is None
+        else:
+            np.testing.assert_array_equal(ids_incremental, ids_completo)
+
+        for ordenacao in [None, [{'column_id': 'Região', 'direction': 'asc'}], [{'column_id': 'Data', 'direction': 'desc'}]]:
+            for pagina in [0, 3]:
+                assert (
+                    pagina_detalhes(incremental.linhas, ids_incremental, pagina, 25, ordenacao)
+                    == pagina_detalhes(completo.linhas, ids_completo, pagina, 25, ordenacao)
+                )
+
+        exportado = [pd.concat(list(c.iterar_linhas(filtros, 300, ['Data', 'Região', 'Valor'], periodo)), ignore_index=True)
+                     for c in (completo, incremental)]
+        pd.testing.assert_frame_equal(exportado[1].astype({'Região': str}), exportado[0].astype({'Região': str}))
@@ -0,0 +1,86 @@
+import numpy as np
+import pandas as pd
+import pandas.testing as tm
+
+from data.incremental import LeitorIncremental
+from data.kpis_chamados import ARQUIVO_QUANTIS, DATAS_CHAMADOS, DIMENSOES_CHAMADOS, TIPOS_CHAMADOS, MotorKpisChamados
+
+
+def historico(chamados=300, semente=7):
+    """Linhas do CSV de chamados em ordem de chegada: abertura e, para a maioria, o fechamento"""
+    rng = np.random.default_rng(semente)
+    abertura = pd.Timestamp('2025-01-01') + pd.to_timedelta(rng.integers(0, 90 * 24, chamados), unit='h')
+    base = pd.DataFrame({
+        'id': np.arange(1, chamados + 1),
+        'responsavel': rng.choice(['Ana', 'Bruno', 'Carla'], chamados),
+        'prioridade': rng.choice(['Alta', 'Média', 'Baixa'], chamados),
+        'data_abertura': abertura,
+    })
+    abertos = base.assign(status='Aberto', data_fechamento=pd.NaT, tempo_atendimento=np.nan, chegada=abertura)
+
+    horas = rng.integers(1, 72, chamados)
+    fecha = rng.random(chamados) < 0.7
+    fechados = base.assign(
+        status='Fechado',
+        data_fechamento=abertura + pd.to_timedelta(horas, unit='h'),
+        tempo_atendimento=horas.astype('float64'),
+        chegada=abertura + pd.to_timedelta(horas, unit='h'),
+    )[fecha]
+
+    linhas = pd.concat([abertos, fechados]).sort_values('chegada', kind='stable').drop(columns='chegada')
+    return linhas.reset_index(drop=True)
+
+
+def comparar(motor, esperado):
+    tm.assert_frame_equal(motor.relatorio(), esperado.relatorio())
+    for dimensao in DIMENSOES_CHAMADOS:
+        tm.assert_frame_equal(motor.por(dimensao), esperado.por(dimensao))
+        tm.assert_frame_equal(motor.percentis(dimensao), esperado.percentis(dimensao))
+
+
+def test_atualizacao_incremental_igual_ao_calculo_completo():
+    df = historico()
+    completo = MotorKpisChamados.construir(df)
+
+    motor = MotorKpisChamados.construir(df.iloc[:100])
+    for inicio in range(100, len(df), 37):
+        motor.atualizar(df.iloc[inicio:inicio + 37])
+
+    comparar(motor, completo)
+
+
+def test_linhas_repetidas_de_chamados_fechados_sao_ignoradas():
+    df = historico()
+    completo = MotorKpisChamados.construir(df)
+
+    motor = MotorKpisChamados.construir(df)
+    fechados = df[df['data_fechamento'].notna()]
+    novos, fechando = motor.atualizar(pd.concat([fechados.iloc[:20], df.iloc[:5]]))
+
+    assert (novos, fechando) == (0, 0)
+    comparar(motor, completo)
+
+
+def test_retomar_usa_os_digests_gravados_e_so_aplica_linhas_novas(tmp_path):
+    df = historico()
+    csv = tmp_path / 'chamados.csv'
+    caminho_quantis = str(tmp_path / ARQUIVO_QUANTIS)
+    df.iloc[:180].to_csv(csv, index=False)
+
+    leitor = LeitorIncremental(str(csv), tipos=TIPOS_CHAMADOS, datas=DATAS_CHAMADOS)
+    MotorKpisChamados.retomar(leitor, caminho_quantis).salvar(str(tmp_path), leitor.posicao())
+
+    df.iloc[180:].to_csv(csv, mode='a', header=False, index=False)
+    leitor = LeitorIncremental(str(csv), tipos=TIPOS_CHAMADOS, datas=DATAS_CHAMADOS)
+    motor = MotorKpisChamados.retomar(leitor, caminho_quantis)
+    completo = MotorKpisChamados.construir(
+        LeitorIncremental(str(csv), tipos=TIPOS_CHAMADOS, datas=DATAS_CHAMADOS).ler_completo()
+    )
+
+    tm.assert_frame_equal(motor.relatorio(), completo.relatorio())
+    for dimensao in DIMENSOES_CHAMADOS:
+        tm.assert_frame_equal(motor.por(dimensao), completo.por(dimensao))
+        tm.assert_frame_equal(motor.percentis(dimensao), completo.percentis(dimensao), rtol=0.05)
+    # Cada chamado fechado entra uma vez nos digests: as linhas já gravadas não são reaplicadas
+    assert motor.quantis.digest().contagem == completo.geral['tickets_fechados']
+    assert leitor.verificar() == (None, None)
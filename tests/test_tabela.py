@@ -0,0 +1,13 @@
+import numpy as np
+
+from tabela import selecionar_pagina
+
+
+def test_pagina_igual_a_ordenacao_completa_mesmo_com_empates():
+    rng = np.random.default_rng(3)
+    for valores in (3, 50, 10_000):
+        chave = rng.integers(0, valores, 5000).astype(np.float64)
+        chave[rng.random(5000) < 0.1] = np.inf
+        ordem = np.argsort(chave, kind='stable')
+        for inicio in (0, 25, 4975, 4990):
+            np.testing.assert_array_equal(selecionar_pagina(chave, inicio, inicio + 25), ordem[inicio:inicio + 25])